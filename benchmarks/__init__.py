@@ -0,0 +1 @@
+"""Headless benchmarks for the Dr_C question-answer path."""
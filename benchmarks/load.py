@@ -0,0 +1,169 @@
+"""Load test: hundreds of simulated sessions against a local mock LLM.
+
+Each session is a thread that asks questions from the PT/EN corpus through
+``dr_c.api.answer``, the same path the HTTP API uses: FAQ, extractive and
+cached answers, then the rate limiter, then the model. Sessions share a
+pool of client IPs. A fraction of them are "hammering" (no pause between
+clicks); the rest pause ``--think`` seconds on average. The report shows
+throughput by outcome, model-call latency, upstream calls and how evenly
+model answers were shared between sessions::
+
+    python -m benchmarks.load --sessions 300 --duration 20 --hammer 0.05 --unique
+
+Fairness is Jain's index over model answers per session (1.0 means
+perfectly even). Compare with ``--no-limits``: every question then waits
+for the model, and latency grows with the number of sessions. With limits,
+model latency stays bounded and the other requests get a degraded answer
+or a refusal at once.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import replace
+
+from benchmarks.mock_llm import MockLLMServer
+from benchmarks.run import load_corpus, peak_rss_mb, percentile
+from dr_c.api import answer
+from dr_c.engine import Engine, Settings
+from dr_c.ratelimit import RateLimited
+
+OUTCOMES = ("model", "cached", "degraded", "limited", "error")
+
+
+def jain_index(values):
+    """Jain's fairness index of ``values``: 1/n (one takes all) to 1 (all equal)."""
+    total, squares = sum(values), sum(value * value for value in values)
+    return total * total / (len(values) * squares) if squares else 1.0
+
+
+def run_session(engine, corpus, session, ip, hammer, think, deadline, seed, results, unique=False):
+    rng = random.Random(seed)
+    counts = Counter()
+    latencies = []
+    while time.monotonic() < deadline:
+        language, question = rng.choice(corpus)
+        if unique:
+            # Pergunta nova a cada clique: o cache só acerta de forma aproximada
+            question = f"{question} [{session} {sum(counts.values())}]"
+        started = time.perf_counter()
+        try:
+            result = answer(engine, question, language, session=session, ip=ip)
+        except RateLimited:
+            outcome = "limited"
+        except Exception:
+            outcome = "error"
+        else:
+            outcome = "degraded" if result["degraded"] else "cached" if result["cached"] else "model"
+            if outcome == "model":
+                latencies.append((time.perf_counter() - started) * 1000)
+        counts[outcome] += 1
+        if not hammer and think > 0:
+            time.sleep(max(0.0, min(rng.expovariate(1 / think), deadline - time.monotonic())))
+    results[session] = {"hammer": hammer, "counts": counts, "latencies": latencies}
+
+
+def run_load(engine, corpus, sessions, ips, hammer_share, think, duration, seed=0, unique=False):
+    deadline = time.monotonic() + duration
+    results = {}
+    threads = []
+    hammers = round(sessions * hammer_share)
+    for i in range(sessions):
+        args = (engine, corpus, f"session-{i}", f"10.0.{i % ips // 256}.{i % ips % 256}",
+                i < hammers, think, deadline, seed + i, results, unique)
+        threads.append(threading.Thread(target=run_session, args=args, daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed):
+    totals = Counter()
+    for result in results.values():
+        totals.update(result["counts"])
+    latencies = [latency for result in results.values() for latency in result["latencies"]]
+    report = {
+        "sessions": len(results),
+        "seconds": elapsed,
+        "requests": sum(totals.values()),
+        **{f"{outcome}_rps": totals[outcome] / elapsed for outcome in OUTCOMES},
+        **{f"model_p{p}_ms": percentile(latencies, p) for p in (50, 95, 99)},
+        "fairness": jain_index([result["counts"]["model"] for result in results.values()]),
+    }
+    for label, hammer in (("hammer", True), ("polite", False)):
+        group = [result for result in results.values() if result["hammer"] == hammer]
+        report[f"{label}_sessions"] = len(group)
+        report[f"{label}_requests_per_session"] = sum(sum(r["counts"].values()) for r in group) / max(len(group), 1)
+        report[f"{label}_model_per_session"] = sum(r["counts"]["model"] for r in group) / max(len(group), 1)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dr_C load test with simulated sessions.")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--ips", type=int, help="distinct client IPs (default: sessions / 4)")
+    parser.add_argument("--hammer", type=float, default=0.05, help="share of sessions clicking non-stop")
+    parser.add_argument("--think", type=float, default=3.0, help="mean pause between clicks (s)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--unique", action="store_true",
+                        help="make every question distinct (fewer exact answer cache hits)")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--base-url", help="use an already running OpenAI-compatible server")
+    parser.add_argument("--no-limits", action="store_true", help="disable the rate limiter")
+    parser.add_argument("--pdf", default=Settings.pdf_path)
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="dr_c_load_") as cache_dir:
+        settings = replace(Settings(), pdf_path=args.pdf, cache_dir=cache_dir,
+                           knowledge_dir="", knowledge_poll_interval=0, faq_dir=cache_dir)
+        if args.no_limits:
+            settings = replace(settings, rate_limit_session=(0, 0), rate_limit_ip=(0, 0),
+                               rate_limit_global=(0, 0))
+
+        server = None
+        base_url = args.base_url
+        if base_url is None:
+            server = MockLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                   completion_tokens=args.completion_tokens)
+            base_url = server.start()
+        try:
+            engine = Engine("load-test", base_url=base_url, settings=settings)
+            engine.knowledge  # Carga do PDF fora da medição
+            results, elapsed = run_load(engine, load_corpus(), args.sessions,
+                                        args.ips or max(1, args.sessions // 4),
+                                        args.hammer, args.think, args.duration, unique=args.unique)
+            report = summarize(results, elapsed)
+            report["upstream_calls"] = server.requests if server else None
+        finally:
+            if server:
+                server.stop()
+        report["peak_rss_mb"] = peak_rss_mb()
+
+    print(f"{report['sessions']} sessions, {report['requests']} requests in {report['seconds']:.1f} s")
+    print("  ".join(f"{outcome} {report[f'{outcome}_rps']:.2f}/s" for outcome in OUTCOMES))
+    print(f"model latency p50 {report['model_p50_ms']:.0f} ms, p95 {report['model_p95_ms']:.0f} ms, "
+          f"p99 {report['model_p99_ms']:.0f} ms; upstream calls {report['upstream_calls']}")
+    for label in ("hammer", "polite"):
+        print(f"{label:>6}: {report[f'{label}_sessions']} sessions, "
+              f"{report[f'{label}_requests_per_session']:.1f} requests and "
+              f"{report[f'{label}_model_per_session']:.1f} model answers per session")
+    print(f"fairness (Jain, model answers): {report['fairness']:.2f}; peak RSS {report['peak_rss_mb']:.1f} MB")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Local OpenAI-compatible chat completion server for benchmarks and tests.
+
+Answers ``POST /v1/chat/completions`` (plain and ``stream=True``) with a
+configurable time to first token and token rate, and reports ``usage``
+like the real API. ``throttle`` answers the first requests with 429 and
+``Retry-After``; ``aborted`` counts streams the client closed early.
+Standard library only.
+
+    python -m benchmarks.mock_llm --port 8765 --latency 0.3 --tokens-per-second 60
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "A floresta só vai sobreviver se puder gerar lucro de forma sustentável. "
+    "The forest will only survive if it can generate profit sustainably. "
+).split()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+        with self.server.lock:
+            self.server.requests += 1
+            throttled = self.server.requests <= config.throttle
+        if throttled:
+            body = b'{"error": {"message": "rate limited"}}'
+            self.send_response(429)
+            self.send_header("Retry-After", f"{config.retry_after:g}")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        completion_tokens = min(body.get("max_tokens") or config.completion_tokens,
+                                config.completion_tokens)
+        words = [WORDS[i % len(WORDS)] for i in range(completion_tokens)]
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        time.sleep(config.latency)
+
+        if not body.get("stream"):
+            time.sleep(delay * completion_tokens)
+            self._send_json(200, {
+                "id": "mock", "object": "chat.completion", "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, word in enumerate(words):
+                chunk = {"id": "mock", "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                time.sleep(delay)
+        except ConnectionError:
+            # Cliente fechou o stream antes do fim
+            with self.server.lock:
+                self.server.aborted += 1
+            raise
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": "mock", "object": "chat.completion.chunk", "choices": [], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cliente fechando conexão keep-alive não é erro do servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockLLMServer:
+    """Threaded mock server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.3,
+                 tokens_per_second=50.0, completion_tokens=120, throttle=0, retry_after=1.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.throttle = throttle          # primeiras requisições respondidas com 429
+        self.retry_after = retry_after
+        self._server = _Server((host, port), _Handler)
+        self._server.config = self
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._server.aborted = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def aborted(self):
+        return self._server.aborted
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    args = parser.parse_args(argv)
+
+    server = MockLLMServer(args.host, args.port, args.latency,
+                           args.tokens_per_second, args.completion_tokens)
+    print(f"Mock LLM listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Benchmark the Dr_C question-answer path without Streamlit.
+
+Replays the PT/EN question corpus through ``Engine`` against a local mock
+LLM server and reports PDF load time, end-to-end latency and time to first
+token (p50/p95/p99), throughput at each concurrency level and peak RSS::
+
+    python -m benchmarks.run --users 1 8 32 --requests 64 --latency 0.3 --tokens-per-second 60
+
+Use ``--fail-p95-ms`` to exit non-zero on a latency regression (e.g. in CI).
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from benchmarks.mock_llm import MockLLMServer
+from dr_c.engine import Engine, Settings
+from dr_c.extraction import cache_key, load_pages
+from dr_c.store import open_store
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), "questions.json")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_corpus(path=QUESTIONS_PATH):
+    with open(path, encoding="utf-8") as file:
+        corpus = json.load(file)
+    return [(language, question) for language, questions in corpus.items() for question in questions]
+
+
+def bench_pdf_load(settings):
+    """Cold (empty cache dir) and warm (mapped store) load times, in milliseconds."""
+    timings = {}
+    path, cache_dir = settings.pdf_path, settings.cache_dir
+    for label in ("cold", "warm"):
+        started = time.perf_counter()
+        key = cache_key(path)
+        open_store(lambda: load_pages(path, cache_dir, key=key)[0], cache_dir, key)
+        timings[label] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def ask_once(engine, language, question):
+    """Run one question through retrieval + streaming answer; returns timings."""
+    completed = threading.Event()
+    started = time.perf_counter()
+    first_token = None
+    context = engine.retrieve_context(question)
+    for _ in engine.ask_dr_c(question, context, language, stream=True,
+                             on_complete=lambda _answer: completed.set()):
+        if first_token is None:
+            first_token = time.perf_counter()
+    finished = time.perf_counter()
+    return {
+        "ok": completed.is_set(),
+        "ttft": ((first_token or finished) - started) * 1000,
+        "e2e": (finished - started) * 1000,
+    }
+
+
+def bench_concurrency(engine, corpus, users, total_requests):
+    jobs = [corpus[i % len(corpus)] for i in range(total_requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        # Sufixo único por requisição: evita que o cliente junte perguntas iguais
+        results = list(pool.map(
+            lambda job: ask_once(engine, job[1][0], f"{job[1][1]} [{job[0]}]"),
+            enumerate(jobs),
+        ))
+    elapsed = time.perf_counter() - started
+    ok = [r for r in results if r["ok"]]
+    return {
+        "users": users,
+        "requests": total_requests,
+        "errors": total_requests - len(ok),
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        **{f"e2e_p{p}_ms": percentile([r["e2e"] for r in ok], p) for p in (50, 95, 99)},
+        **{f"ttft_p{p}_ms": percentile([r["ttft"] for r in ok], p) for p in (50, 95, 99)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Dr_C latency benchmark.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16],
+                        help="concurrency levels to test")
+    parser.add_argument("--requests", type=int, default=32, help="requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--base-url", help="use an already running OpenAI-compatible server")
+    parser.add_argument("--pdf", default=Settings.pdf_path)
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    parser.add_argument("--fail-p95-ms", type=float, help="exit 1 if any e2e p95 exceeds this")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="dr_c_bench_") as cache_dir:
+        settings = replace(Settings(), pdf_path=args.pdf, cache_dir=cache_dir,
+                           knowledge_dir="", knowledge_poll_interval=0,
+                           llm_max_concurrency=max(args.users))
+        report = {"pdf_load_ms": bench_pdf_load(settings), "runs": []}
+
+        server = None
+        base_url = args.base_url
+        if base_url is None:
+            server = MockLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                   completion_tokens=args.completion_tokens)
+            base_url = server.start()
+        try:
+            engine = Engine("benchmark", base_url=base_url, settings=settings)
+            corpus = load_corpus()
+            for users in args.users:
+                report["runs"].append(bench_concurrency(engine, corpus, users, args.requests))
+        finally:
+            if server:
+                server.stop()
+        report["peak_rss_mb"] = peak_rss_mb()
+
+    print(f"PDF load: cold {report['pdf_load_ms']['cold']:.1f} ms, "
+          f"warm {report['pdf_load_ms']['warm']:.1f} ms")
+    print(f"{'users':>5} {'rps':>7} {'err':>4} "
+          f"{'e2e p50':>9} {'p95':>8} {'p99':>8} {'ttft p50':>9} {'p95':>8} {'p99':>8}")
+    for run in report["runs"]:
+        print(f"{run['users']:>5} {run['throughput_rps']:>7.2f} {run['errors']:>4} "
+              f"{run['e2e_p50_ms']:>9.0f} {run['e2e_p95_ms']:>8.0f} {run['e2e_p99_ms']:>8.0f} "
+              f"{run['ttft_p50_ms']:>9.0f} {run['ttft_p95_ms']:>8.0f} {run['ttft_p99_ms']:>8.0f}")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.fail_p95_ms is not None and any(
+        run["e2e_p95_ms"] > args.fail_p95_ms or run["errors"] for run in report["runs"]
+    ):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
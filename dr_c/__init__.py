@@ -0,0 +1,24 @@
+"""Dr_C core: knowledge loading, retrieval and answering helpers.
+
+Importing ``dr_c`` is cheap: the engine and its dependencies (pypdf,
+requests, SQLite) are only imported when first used.
+"""
+
+_LAZY = {
+    "Conversation": "dr_c.conversation",
+    "Engine": "dr_c.engine",
+    "Settings": "dr_c.engine",
+    "get_engine": "dr_c.engine",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'dr_c' has no attribute {name!r}")
@@ -0,0 +1,233 @@
+"""Text analysis for retrieval: folding, stemming and a bilingual glossary.
+
+The knowledge base is indexed once, in whatever language it is written.
+Both Portuguese and English questions have to find the same passages, so
+every term goes through one pipeline:
+
+1. accent folding and lowercasing ("Açaí" -> "acai"), stopwords removed;
+2. a light suffix-stripping stemmer for the text's language
+   ("florestas" -> "florest", "catalogued" -> "catalogu");
+3. the glossary, which maps domain terms of both languages to one shared
+   concept ("castanha", "brazil nuts" -> "castanh").
+
+``analyze`` indexes text in its own (guessed) language. ``expand_query``
+analyzes a question as Portuguese *and* as English and keeps both term
+sets, so a question matches the shared index whatever language it and the
+documents are in, without a second index or a translation call. Terms that
+do not exist in the index simply score nothing.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LANGUAGE = "pt"
+
+# Palavras muito frequentes que não ajudam no ranking (PT + EN)
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de da do das dos em na no nas nos por para com sem
+que se e ou mas como mais menos muito muita sua seu suas seus meu minha ao
+aos à às é ser foi são está estão isso esse essa este esta eu voce você ele ela
+the an and or but of to in on at for with without is are was were be been it
+its this that these those as by from how what which who why do does did my
+your i you he she we they me have has had can could will would should there
+their our us all any not no so if into also than very nao tem ter ja tambem
+pelo pela sobre entre ate
+""".split())
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Palavras que só aparecem em um dos idiomas
+_LANGUAGE_HINTS = {
+    "en": frozenset("the and of to is that with was have has for are".split()),
+    "pt": frozenset("de que não uma para com os as da do em é foi tem são".split()),
+}
+
+
+def fold_accents(text):
+    """Lowercase and strip diacritics ("Açaí" -> "acai")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text, stopwords=STOPWORDS):
+    """Accent-folded words without stopwords (no stemming)."""
+    return [
+        word for word in _WORD_RE.findall(fold_accents(text))
+        if len(word) > 1 and word not in stopwords
+    ]
+
+
+def guess_language(text) -> Optional[str]:
+    """``"pt"`` or ``"en"`` by counting function words; None if there are none."""
+    words = re.findall(r"\w+", text.lower())
+    hits = {language: sum(word in hints for word in words) for language, hints in _LANGUAGE_HINTS.items()}
+    best = max(hits, key=hits.get)
+    return best if hits[best] else None
+
+
+# ================== STEMMERS ==================
+# Sufixos testados do mais longo para o mais curto; o radical mantém >= 3 letras
+_PT_PLURALS = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+               ("ns", "m"), ("res", "r"), ("s", ""))
+_PT_SUFFIXES = (
+    "ividade", "amento", "imento", "idade", "mente", "ancia", "encia",
+    "acao", "icao", "ucao", "ador", "edor", "idor", "avel", "ivel", "ismo", "ista", "agem",
+    "aria", "ario", "eira", "eiro", "ando", "endo", "indo", "aram", "eram", "iram", "avam",
+    "ante", "ente", "osa", "oso", "iva", "ivo", "ica", "ico", "ada", "ado", "ida", "ido",
+    "ia", "io", "ar", "er", "ir", "ou", "eu", "iu",
+)
+_EN_SUFFIXES = (
+    "ization", "ational", "fulness", "iveness", "ousness", "ations", "ation", "ities",
+    "ments", "ingly", "ment", "ness", "able", "ible", "ance", "ence", "edly", "ity",
+    "ing", "ers", "ive", "ous", "ist", "ism", "er", "ed", "ly", "al", "ic",
+)
+
+
+def _strip(word, suffixes, min_stem=3):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            return word[:-len(suffix)]
+    return word
+
+
+def stem_pt(word):
+    """Light Portuguese stemmer on a folded word ("catalogadas" -> "catalog")."""
+    if len(word) <= 3:
+        return word
+    for suffix, replacement in _PT_PLURALS:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+    word = _strip(word, _PT_SUFFIXES)
+    if len(word) > 3 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def stem_en(word):
+    """Light English stemmer on a folded word ("catalogued" -> "catalogu")."""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    word = _strip(word, _EN_SUFFIXES)
+    if len(word) > 4 and word[-1] in "ey":
+        word = word[:-1]
+    return word
+
+
+STEMMERS = {"pt": stem_pt, "en": stem_en}
+
+
+# ================== GLOSSÁRIO ==================
+# Termos do domínio: variantes PT | variantes EN (frases de várias palavras são aceitas)
+GLOSSARY = (
+    ("floresta|florestal|mata|selva", "forest|rainforest|jungle|woodland"),
+    ("arvore", "tree"),
+    ("plantar|plantio|plantado|muda", "plant|planting|seedling"),
+    ("especie", "species"),
+    ("catalogar|catalogo|catalogacao", "catalogue|catalog|catalogued|cataloged"),
+    ("descobrir|descoberta|descobrimento", "discover|discovery|discovered|new to science"),
+    ("cacto", "cactus|cacti"),
+    ("nome|homenagem", "name|named|honor|honour|tribute"),
+    ("biodiversidade", "biodiversity"),
+    ("conservacao|conservar|preservar|preservacao", "conservation|conserve|preserve|preservation"),
+    ("sustentavel|sustentabilidade", "sustainable|sustainability|sustainably"),
+    ("lucro|lucrativo|rentabilidade|rentavel", "profit|profitable|profitability"),
+    ("renda|subsistencia", "income|livelihood"),
+    ("emprego|trabalho", "job|employment|work"),
+    ("desmatamento|derrubar", "deforestation|logging|clear cutting"),
+    ("reflorestamento|restauracao", "reforestation|restoration|reforest"),
+    ("terra|area|propriedade", "land|area|property"),
+    ("degradada|degradacao", "degraded|degradation"),
+    ("nascente", "spring|water spring"),
+    ("agua", "water"),
+    ("fauna|animal", "wildlife|fauna|animal"),
+    ("acai", "acai"),
+    ("castanha|castanha do para|castanha do brasil", "brazil nut|nut"),
+    ("fruta|fruto|frutifera", "fruit"),
+    ("comunidade", "community"),
+    ("pessoa|gente|povo", "people|person"),
+    ("amazonia|amazonico|amazonica", "amazon|amazonian|amazonia"),
+    ("brasil|brasileiro", "brazil|brazilian"),
+    ("anglo brasileiro", "anglo brazilian"),
+    ("jogo|game", "game|gaming"),
+    ("realidade virtual|virtualmente", "virtual reality|virtually"),
+    ("inteligencia artificial|ia", "artificial intelligence|ai"),
+    ("manejo", "management|forest management"),
+    ("silvicultura", "forestry|silviculture"),
+    ("carbono", "carbon"),
+    ("clima", "climate"),
+    ("desertificacao|deserto", "desertification|desert"),
+    ("ciencia|cientifico", "science|scientific"),
+    ("economia|economico", "economy|economic|economics"),
+    ("projeto|iniciativa", "project|initiative"),
+    ("planeta", "planet"),
+    ("governo", "government"),
+    ("pasto|pastagem", "pasture|cattle"),
+    ("monocultura", "monoculture"),
+    ("seguro de vida", "life insurance"),
+    ("graduado|estudar|estudou", "graduate|graduated|study|studied"),
+    ("cidadao|cidadania", "citizen|citizenship"),
+    ("tecnologia", "technology"),
+    ("futuro", "future"),
+)
+
+
+def _phrase(text, language):
+    return tuple(STEMMERS[language](word) for word in tokenize(text))
+
+
+def _compile_glossary(glossary) -> Tuple[Dict[str, Dict[tuple, str]], int]:
+    phrases: Dict[str, Dict[tuple, str]] = {language: {} for language in STEMMERS}
+    for pt, en in glossary:
+        concept = "_".join(_phrase(pt.split("|")[0], "pt"))
+        for language, variants in (("pt", pt), ("en", en)):
+            for variant in variants.split("|"):
+                key = _phrase(variant, language)
+                if key:
+                    phrases[language].setdefault(key, concept)
+    longest = max((len(key) for table in phrases.values() for key in table), default=1)
+    return phrases, longest
+
+
+_PHRASES, _LONGEST = _compile_glossary(GLOSSARY)
+
+# Muda com qualquer ajuste de stopwords, sufixos ou glossário: os índices são refeitos
+ANALYZER_VERSION = hashlib.sha256(
+    repr((sorted(STOPWORDS), _PT_PLURALS, _PT_SUFFIXES, _EN_SUFFIXES, GLOSSARY)).encode("utf-8")
+).hexdigest()[:8]
+
+
+# ================== PIPELINE ==================
+def analyze(text, language=None, stopwords=STOPWORDS) -> List[str]:
+    """Index terms of ``text``: folded, stemmed and mapped through the glossary.
+
+    ``language`` defaults to the one guessed from the text itself.
+    """
+    language = language if language in STEMMERS else (guess_language(text) or DEFAULT_LANGUAGE)
+    stem, phrases = STEMMERS[language], _PHRASES[language]
+    stems = [stem(word) for word in tokenize(text, stopwords)]
+    terms, i = [], 0
+    while i < len(stems):
+        # Frase mais longa do glossário que começa aqui
+        for size in range(min(_LONGEST, len(stems) - i), 0, -1):
+            concept = phrases.get(tuple(stems[i:i + size]))
+            if concept is not None:
+                terms.append(concept)
+                i += size
+                break
+        else:
+            terms.append(stems[i])
+            i += 1
+    return terms
+
+
+def expand_query(text, stopwords=STOPWORDS) -> List[str]:
+    """Query terms of ``text`` read as every supported language (no duplicates)."""
+    return list(dict.fromkeys(term for language in STEMMERS for term in analyze(text, language, stopwords)))
@@ -0,0 +1,237 @@
+"""SQLite-backed answer cache for repeated and near-duplicate questions.
+
+Entries are keyed on the normalized question, the language code and the
+knowledge-base hash. Lookups try an exact match first and then a
+near-duplicate match using MinHash signatures over word shingles, with
+LSH banding so only a handful of candidates are compared. The store is a
+single SQLite file (WAL mode), so it is shared by every Streamlit session
+and process on the host. Entries expire after ``ttl`` seconds and the least
+recently used ones are evicted beyond ``max_entries``.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from dr_c.analysis import STOPWORDS, fold_accents, tokenize
+from dr_c.telemetry import METRICS, span
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Mudam o sentido da pergunta: "é lucrativa" x "não é lucrativa", "com" x "sem adubo"
+POLARITY_WORDS = frozenset("""
+not no nor never without with none nothing nao nem nunca jamais sem com nenhum nenhuma nada
+""".split())
+_SHINGLE_STOPWORDS = STOPWORDS - POLARITY_WORDS
+_CONTRACTION_RE = re.compile(r"n['’]t\b")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    language TEXT NOT NULL,
+    kb TEXT NOT NULL,
+    question TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers(last_used);
+CREATE TABLE IF NOT EXISTS answer_bands (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, key)
+);
+CREATE INDEX IF NOT EXISTS answer_bands_key ON answer_bands(key);
+"""
+
+
+def normalize_question(question):
+    """Accent-folded, lowercase question with punctuation collapsed."""
+    return " ".join(re.findall(r"\w+", fold_accents(question)))
+
+
+def _words(question):
+    # "isn't" -> "is not": a negação contraída também conta
+    return tokenize(_CONTRACTION_RE.sub(" not", question), _SHINGLE_STOPWORDS)
+
+
+def shingles(question):
+    """Word unigrams and bigrams of the question (stopwords removed, negations kept)."""
+    words = _words(question)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def polarity(question):
+    """The negation and with/without words of the question.
+
+    One extra "not" barely moves the similarity of a long question, so a
+    near-duplicate must also have exactly these words.
+    """
+    return frozenset(word for word in _words(question) if word in POLARITY_WORDS)
+
+
+class MinHasher:
+    """MinHash signatures using universal hashing ``(a * x + b) mod p``."""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = hashlib.sha256(f"minhash-{seed}".encode()).digest()
+        params = []
+        counter = 0
+        while len(params) < num_perm:
+            block = hashlib.sha256(rng + counter.to_bytes(4, "big")).digest()
+            counter += 1
+            a = int.from_bytes(block[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+            b = int.from_bytes(block[8:16], "big") % _MERSENNE_PRIME
+            params.append((a, b))
+        self.params = params
+
+    def signature(self, features) -> array:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+            for f in features
+        ]
+        if not hashes:
+            return array("Q", [_MAX_HASH] * len(self.params))
+        return array("Q", [
+            min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in hashes)
+            for a, b in self.params
+        ])
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+@dataclass(frozen=True)
+class CacheHit:
+    answer: str
+    question: str
+    similarity: float
+    exact: bool
+
+
+class AnswerCache:
+    """Exact + near-duplicate answer cache stored in SQLite."""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000,
+                 threshold=0.8, num_perm=64, bands=16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Uma conexão por operação: seguro entre threads e processos
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(normalized, language, kb):
+        return hashlib.sha256(f"{language}\0{kb}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _buckets(self, signature):
+        for band in range(self.bands):
+            values = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, hashlib.blake2b(values.tobytes(), digest_size=8).hexdigest()
+
+    def get(self, question, language, kb, threshold=None) -> Optional[CacheHit]:
+        """Cached answer for ``question`` or a near-duplicate (``threshold`` overrides the default)."""
+        with span("answer_cache"):
+            hit = self._lookup(question, language, kb, self.threshold if threshold is None else threshold)
+        result = "miss" if hit is None else ("exact" if hit.exact else "similar")
+        METRICS.inc("dr_c_answer_cache_total", result=result)
+        return hit
+
+    def _lookup(self, question, language, kb, threshold) -> Optional[CacheHit]:
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        now = time.time()
+        key = self._key(normalized, language, kb)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT answer, question FROM answers WHERE key = ? AND created >= ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                return CacheHit(row[0], row[1], 1.0, True)
+
+            signature = self.hasher.signature(shingles(question))
+            polar = polarity(question)
+            best, best_score = None, 0.0
+            for band, bucket in self._buckets(signature):
+                candidates = conn.execute(
+                    "SELECT a.key, a.answer, a.question, a.signature FROM answer_bands b "
+                    "JOIN answers a ON a.key = b.key "
+                    "WHERE b.band = ? AND b.bucket = ? AND a.language = ? AND a.kb = ? "
+                    "AND a.created >= ?",
+                    (band, bucket, language, kb, now - self.ttl),
+                ).fetchall()
+                for cand_key, answer, cand_question, blob in candidates:
+                    score = similarity(signature, array("Q", blob))
+                    if score > best_score and polarity(cand_question) == polar:
+                        best, best_score = (cand_key, answer, cand_question), score
+            if best is None or best_score < threshold:
+                return None
+            conn.execute("UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, best[0]))
+            return CacheHit(best[1], best[2], best_score, False)
+
+    def put(self, question, language, kb, answer):
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return
+        now = time.time()
+        key = self._key(normalized, language, kb)
+        signature = self.hasher.signature(shingles(question))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(key, language, kb, question, signature, answer, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, language, kb, question, signature.tobytes(), answer, now, now),
+            )
+            conn.execute("DELETE FROM answer_bands WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO answer_bands (band, bucket, key) VALUES (?, ?, ?)",
+                [(band, bucket, key) for band, bucket in self._buckets(signature)],
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM answers WHERE key IN ("
+            "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.execute("DELETE FROM answer_bands WHERE key NOT IN (SELECT key FROM answers)")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answers")
+            conn.execute("DELETE FROM answer_bands")
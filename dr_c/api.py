@@ -0,0 +1,369 @@
+"""Async HTTP JSON API for Dr_C.
+
+Serves the same ``Engine`` as the Streamlit page (knowledge, index, answer
+cache and LLM client), either standalone::
+
+    OPENAI_API_KEY=... python -m dr_c.api --port 8080
+
+or from inside the Streamlit process (``Settings.api_port``), so the UI and
+the API share one copy of the knowledge. Endpoints:
+
+* ``GET  /v1/health``      knowledge status
+* ``POST /v1/ask``         ``{"question": ..., "language": "pt"|"en"}``
+* ``POST /v1/ask/batch``   ``{"questions": [{"question": ..., "language": ...}, ...]}``
+* ``POST /v1/ask/stream``  server-sent events: ``delta`` events, then ``done`` or ``error``
+* ``GET  /metrics``        Prometheus metrics (see ``dr_c.telemetry``)
+
+Set ``DR_C_API_TOKEN`` to require ``Authorization: Bearer <token>``.
+
+Questions that need the model are rate limited per client IP, per
+``X-Session-Id`` header (when sent) and globally (see ``dr_c.ratelimit``).
+A batch counts as one call for the session and IP limits; the global one
+counts each question that goes to the model. Over the limit, the closest
+answer available without the model is returned with ``"degraded": true``.
+If there is none, the response is a 429 with ``Retry-After``.
+
+A failed model call is a 503 (502 when retrying will not help), an
+``"error"`` on its batch item, or an ``error`` event on the stream.
+"""
+import argparse
+import asyncio
+import contextvars
+import hmac
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from dr_c.corpus import KnowledgeLoading
+from dr_c.engine import ERROR_MESSAGES, Engine, get_engine
+from dr_c.llm import LLMError
+from dr_c.ratelimit import RateLimited, client_ip
+from dr_c.telemetry import METRICS, configure_json_logging, trace
+
+ENGINE_KEY = web.AppKey("engine", Engine)
+TOKEN_KEY = web.AppKey("token", str)
+EXECUTOR_KEY = web.AppKey("executor", ThreadPoolExecutor)
+
+MAX_QUESTION_CHARS = 2000
+MODEL_ERROR = "model unavailable"
+_DONE = object()
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# ================== RESPOSTAS ==================
+def _parse_item(item):
+    if not isinstance(item, dict):
+        raise BadRequest("each question must be an object")
+    question = item.get("question")
+    language = item.get("language", "pt")
+    if not isinstance(question, str) or not question.strip():
+        raise BadRequest("'question' must be a non-empty string")
+    if len(question) > MAX_QUESTION_CHARS:
+        raise BadRequest(f"'question' is longer than {MAX_QUESTION_CHARS} characters")
+    if language not in ERROR_MESSAGES:
+        raise BadRequest(f"'language' must be one of {sorted(ERROR_MESSAGES)}")
+    return question.strip(), language
+
+
+def ready_answer(engine, question, language, session=None, ip=None, admit=None):
+    """``(hit, degraded)`` without calling the model; ``(None, False)`` means ask it.
+
+    FAQ, extractive and cached answers come first and are not rate limited.
+    A caller over its limit gets ``Engine.fallback_answer`` instead, or
+    ``RateLimited`` when nothing is close enough. ``admit`` replaces the
+    limiter's ``acquire`` (see ``BatchAdmission``).
+    """
+    kb = engine.knowledge.key
+    hit = (engine.faq.match(question, language) or engine.quick_answer(question, language)
+           or engine.answer_cache.get(question, language, kb))
+    if hit:
+        return hit, False
+    decision = admit() if admit else engine.limiter.acquire(session=session, ip=ip)
+    if decision:
+        return None, False
+    hit = engine.fallback_answer(question, language)
+    if hit is None:
+        raise RateLimited(decision.scope, decision.retry_after)
+    return hit, True
+
+
+class BatchAdmission:
+    """One session/IP admission shared by all the items of a batch.
+
+    The first item that needs the model takes a token from every bucket;
+    the others reuse its session/IP decision, so a full batch costs a
+    client one call, not one per item. The global bucket still pays for
+    each item that goes to the model.
+    """
+
+    def __init__(self, limiter, session=None, ip=None):
+        self.limiter = limiter
+        self.session = session
+        self.ip = ip
+        self._client = None  # decisão de sessão/IP do lote
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._client is None:
+                decision = self.limiter.acquire(session=self.session, ip=self.ip)
+                # Recusa global não é do cliente: o próximo item tenta de novo
+                if decision or decision.scope != "global":
+                    self._client = decision
+                return decision
+        if not self._client:
+            return self._client
+        # Sem chaves de sessão/IP: só o balde global
+        return self.limiter.acquire()
+
+
+def answer(engine, question, language, session=None, ip=None, admit=None):
+    """Blocking answer: a ready one (see ``ready_answer``) or the model's."""
+    hit, degraded = ready_answer(engine, question, language, session, ip, admit)
+    if hit:
+        return {"question": question, "language": language, "answer": hit.answer,
+                "cached": True, "degraded": degraded}
+    kb = engine.knowledge.key
+    route = engine.route(question, language)
+    text = engine.ask_dr_c(
+        question, engine.retrieve_context(question, route=route), language, route=route, raise_errors=True,
+        on_complete=lambda result: engine.answer_cache.put(question, language, kb, result),
+    )
+    return {"question": question, "language": language, "answer": text, "cached": False, "degraded": False}
+
+
+def _once(text):
+    yield text
+
+
+def stream_answer(engine, question, language, session=None, ip=None):
+    """Generator of text deltas (a ready answer comes as one delta).
+
+    The rate limit is checked before returning, so ``RateLimited`` is raised
+    before anything is streamed.
+    """
+    hit, _ = ready_answer(engine, question, language, session, ip)
+    if hit:
+        return _once(hit.answer)
+    kb = engine.knowledge.key
+    route = engine.route(question, language)
+    return engine.ask_dr_c(
+        question, engine.retrieve_context(question, route=route), language, stream=True, route=route,
+        raise_errors=True, on_complete=lambda result: engine.answer_cache.put(question, language, kb, result),
+    )
+
+
+# ================== HANDLERS ==================
+async def _run(request, func, *args):
+    loop = asyncio.get_running_loop()
+    # Copia o contexto para que os spans do engine entrem no trace da requisição
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(request.app[EXECUTOR_KEY], context.run, func, *args)
+
+
+def _client(request):
+    """``(session, ip)`` rate-limit keys of the request."""
+    return request.headers.get("X-Session-Id") or None, client_ip(request.headers, request.remote)
+
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise BadRequest("body must be valid JSON")
+
+
+async def health(request):
+    engine = request.app[ENGINE_KEY]
+    corpus = engine.corpus
+    snapshot = corpus.snapshot
+    if snapshot.documents:
+        status = "ok"
+    else:
+        status = "no_knowledge" if corpus.ready.is_set() else "loading"
+    return web.json_response({
+        "status": status,
+        "documents": sorted(snapshot.documents),
+        "knowledge_key": snapshot.key,
+        "word_count": snapshot.word_count,
+        # Cópia: a thread do watcher adiciona e remove entradas durante a extração
+        "extracting": {name: {"done": done, "total": total}
+                       for name, (done, total) in dict(corpus.progress).items()},
+        "unreadable_pages": {name: dict(document.errors) for name, document in snapshot.documents.items()
+                             if document.errors},
+        "metadata": {name: dict(document.metadata) for name, document in snapshot.documents.items()
+                     if document.metadata},
+    })
+
+
+async def metrics(request):
+    return web.Response(text=METRICS.render(), content_type="text/plain", charset="utf-8")
+
+
+async def ask(request):
+    question, language = _parse_item(await _read_json(request))
+    return web.json_response(await _run(request, answer, request.app[ENGINE_KEY], question, language,
+                                        *_client(request)))
+
+
+async def ask_batch(request):
+    engine = request.app[ENGINE_KEY]
+    body = await _read_json(request)
+    items = body.get("questions") if isinstance(body, dict) else None
+    limit = engine.settings.api_batch_max_items
+    if not isinstance(items, list) or not items:
+        raise BadRequest("'questions' must be a non-empty list")
+    if len(items) > limit:
+        raise BadRequest(f"at most {limit} questions per batch")
+    parsed = [_parse_item(item) for item in items]
+
+    # Processa em paralelo, mas com limite para não monopolizar o cliente LLM
+    semaphore = asyncio.Semaphore(engine.settings.api_batch_concurrency)
+
+    session, ip = _client(request)
+    admit = BatchAdmission(engine.limiter, session, ip)
+
+    async def one(question, language):
+        async with semaphore:
+            try:
+                return await _run(request, answer, engine, question, language, session, ip, admit)
+            except RateLimited as e:
+                # Um item acima do limite não derruba o lote inteiro
+                return {"question": question, "language": language, "error": "rate limited",
+                        "retry_after": round(e.retry_after, 1)}
+            except LLMError as e:
+                return {"question": question, "language": language, "error": MODEL_ERROR,
+                        "retryable": e.retryable}
+
+    results = await asyncio.gather(*(one(question, language) for question, language in parsed))
+    return web.json_response({"answers": results})
+
+
+async def ask_stream(request):
+    question, language = _parse_item(await _read_json(request))
+    # Antes do prepare: acima do limite ainda dá para responder 429
+    deltas = await _run(request, stream_answer, request.app[ENGINE_KEY], question, language,
+                        *_client(request))
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+    })
+    try:
+        await response.prepare(request)
+        while True:
+            try:
+                delta = await _run(request, next, deltas, _DONE)
+            except LLMError as e:
+                # Cabeçalhos já enviados: a falha vai como evento, não como status
+                error = {"error": MODEL_ERROR, "retryable": e.retryable}
+                await response.write(f"event: error\ndata: {json.dumps(error)}\n\n".encode("utf-8"))
+                break
+            if delta is _DONE:
+                await response.write(b"event: done\ndata: {}\n\n")
+                break
+            await response.write(f"event: delta\ndata: {json.dumps({'text': delta})}\n\n".encode("utf-8"))
+    finally:
+        # Cliente desconectado: encerra o gerador na thread do executor
+        await _run(request, deltas.close)
+    return response
+
+
+@web.middleware
+async def errors_middleware(request, handler):
+    token = request.app[TOKEN_KEY]
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    try:
+        with trace("api", path=request.path):
+            return await handler(request)
+    except BadRequest as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except RateLimited as e:
+        return web.json_response({"error": "rate limited", "scope": e.scope}, status=429,
+                                 headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+    except LLMError as e:
+        if e.retryable:
+            return web.json_response({"error": MODEL_ERROR}, status=503, headers={"Retry-After": "5"})
+        return web.json_response({"error": MODEL_ERROR}, status=502)
+    except KnowledgeLoading:
+        return web.json_response({"error": "knowledge base is loading"}, status=503,
+                                 headers={"Retry-After": "5"})
+    except FileNotFoundError:
+        return web.json_response({"error": "knowledge base not found"}, status=503)
+
+
+# ================== APP ==================
+def create_app(engine: Engine, token=None) -> web.Application:
+    """aiohttp application answering with ``engine``."""
+    app = web.Application(middlewares=[errors_middleware], client_max_size=1024 ** 2)
+    app[ENGINE_KEY] = engine
+    app[TOKEN_KEY] = token if token is not None else os.environ.get("DR_C_API_TOKEN", "")
+    app[EXECUTOR_KEY] = ThreadPoolExecutor(
+        max_workers=max(engine.settings.llm_max_concurrency, engine.settings.api_batch_concurrency) * 2,
+        thread_name_prefix="dr_c_api",
+    )
+
+    async def shutdown_executor(app):
+        app[EXECUTOR_KEY].shutdown(wait=False, cancel_futures=True)
+
+    app.on_cleanup.append(shutdown_executor)
+    app.add_routes([
+        web.get("/v1/health", health),
+        web.get("/metrics", metrics),
+        web.post("/v1/ask", ask),
+        web.post("/v1/ask/batch", ask_batch),
+        web.post("/v1/ask/stream", ask_stream),
+    ])
+    return app
+
+
+def start_in_thread(engine: Engine, host="127.0.0.1", port=8080, token=None) -> threading.Thread:
+    """Serve the API from a daemon thread with its own event loop.
+
+    Used by the Streamlit page so both frontends share ``engine``.
+    """
+    started = threading.Event()
+    failure = []
+
+    async def serve():
+        runner = web.AppRunner(create_app(engine, token))
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            failure.append(e)
+            await runner.cleanup()
+            return
+        finally:
+            started.set()
+        await asyncio.Event().wait()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), name="dr_c_api", daemon=True)
+    thread.start()
+    started.wait()
+    if failure:
+        raise failure[0]
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dr_C HTTP JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    configure_json_logging()
+    engine = get_engine(os.environ.get("OPENAI_API_KEY"), base_url=os.environ.get("OPENAI_BASE_URL"))
+    engine.corpus.wait()  # Aceita requisições assim que houver algo pesquisável
+    web.run_app(create_app(engine), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
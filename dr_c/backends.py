@@ -0,0 +1,202 @@
+"""Pluggable generation backends behind ``Engine.ask_dr_c``.
+
+Every backend answers OpenAI-style chat requests: ``chat(messages, **params)``
+returns the decoded response dict and ``stream_chat(messages, **params)``
+returns a ``ChatStream`` of content deltas with ``.usage`` at the end. Each
+one brings its own model name and timeouts.
+
+* ``openai``: the hosted API (``Settings.model``);
+* ``local``: a local OpenAI-compatible server on CPU, e.g. llama.cpp's
+  ``llama-server`` (``Settings.local_base_url``/``local_model``);
+* ``mock``: deterministic in-process answers, for tests and offline runs.
+
+``Settings.backends`` lists them in fallback order; ``build_backend`` wraps
+several in a ``FallbackBackend`` that moves on to the next one when a call
+fails before any text was produced. ``DR_C_BACKENDS=local,openai`` overrides
+the order.
+"""
+import hashlib
+import os
+import threading
+from typing import List, Optional, Protocol, Sequence
+
+from dr_c.llm import ChatStream, LLMClient, LLMError, abandoned_error
+from dr_c.telemetry import METRICS, current_trace
+
+
+class Backend(Protocol):
+    name: str
+    model: str
+
+    def chat(self, messages, **params) -> dict:
+        ...
+
+    def stream_chat(self, messages, **params) -> ChatStream:
+        ...
+
+
+# ================== HTTP (OPENAI E LOCAL) ==================
+class HTTPBackend:
+    """An OpenAI-compatible endpoint served by a shared ``LLMClient``.
+
+    A ``model`` passed per call (see ``dr_c.router``) replaces the default
+    one, unless ``fixed_model`` is set (a local server runs one model).
+    """
+
+    def __init__(self, name, client: LLMClient, model, timeout=None, fixed_model=False):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.timeout = timeout
+        self.fixed_model = fixed_model
+
+    def _model(self, model):
+        return model if model and not self.fixed_model else self.model
+
+    def chat(self, messages, model=None, **params) -> dict:
+        return self.client.chat(messages, self._model(model), timeout=self.timeout, **params)
+
+    def stream_chat(self, messages, model=None, **params) -> ChatStream:
+        return self.client.stream_chat(messages, self._model(model), timeout=self.timeout, **params)
+
+
+# ================== MOCK ==================
+MOCK_WORDS = (
+    "A floresta só vai sobreviver se puder gerar lucro de forma sustentável. "
+    "The forest will only survive if it can generate profit sustainably."
+).split()
+
+
+class MockBackend:
+    """Deterministic answers derived from the prompt; no network, no threads."""
+
+    def __init__(self, name="mock", model="mock", completion_tokens=60):
+        self.name = name
+        self.model = model
+        self.completion_tokens = completion_tokens
+
+    def _answer(self, messages, params):
+        digest = hashlib.sha256(repr([(m["role"], m["content"]) for m in messages]).encode("utf-8")).digest()
+        size = min(params.get("max_tokens") or self.completion_tokens, self.completion_tokens)
+        start = digest[0] % len(MOCK_WORDS)
+        words = [MOCK_WORDS[(start + i) % len(MOCK_WORDS)] for i in range(size)]
+        prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": size,
+                 "total_tokens": prompt_tokens + size, "prompt_tokens_details": {"cached_tokens": 0}}
+        return words, usage
+
+    def chat(self, messages, model=None, **params) -> dict:
+        words, usage = self._answer(messages, params)
+        return {
+            "model": self.model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": " ".join(words)}}],
+            "usage": usage,
+        }
+
+    def stream_chat(self, messages, model=None, **params) -> ChatStream:
+        words, usage = self._answer(messages, params)
+        stream = ChatStream()
+        for i, word in enumerate(words):
+            stream.publish(word if i == 0 else f" {word}")
+        stream.finish(usage=usage)
+        return stream
+
+
+# ================== FALLBACK ==================
+def _count(backend, outcome, trace=None):
+    METRICS.inc("dr_c_backend_total", backend=backend.name, outcome=outcome)
+    if trace is not None and outcome == "ok":
+        trace.attributes["backend"] = backend.name
+
+
+class FallbackBackend:
+    """Tries ``backends`` in order until one answers."""
+
+    def __init__(self, backends: Sequence[Backend]):
+        if not backends:
+            raise ValueError("at least one backend is required")
+        self.backends = list(backends)
+        self.name = "+".join(backend.name for backend in self.backends)
+        self.model = self.backends[0].model
+
+    def chat(self, messages, **params) -> dict:
+        error = None
+        for backend in self.backends:
+            try:
+                response = backend.chat(messages, **params)
+            except Exception as e:
+                _count(backend, "error")
+                error = e
+                continue
+            _count(backend, "ok", current_trace())
+            return response
+        raise error
+
+    def stream_chat(self, messages, **params) -> ChatStream:
+        """Falls back only while nothing was streamed yet; later errors propagate."""
+        result = ChatStream()
+        trace = current_trace()
+
+        def pump():
+            error = None
+            for backend in self.backends:
+                published = False
+                try:
+                    stream = backend.stream_chat(messages, **params)
+                    for delta in stream:
+                        if result.abandoned:
+                            break  # Sai do stream de baixo: ele também é abandonado
+                        published = True
+                        result.publish(delta)
+                except Exception as e:
+                    _count(backend, "error")
+                    error = e
+                    if published:
+                        break
+                    continue
+                if result.abandoned:
+                    result.finish(abandoned_error())
+                    return
+                _count(backend, "ok", trace)
+                result.finish(usage=stream.usage)
+                return
+            result.finish(error if isinstance(error, LLMError) else LLMError(str(error)))
+
+        threading.Thread(target=pump, daemon=True).start()
+        return result
+
+
+# ================== CONFIGURAÇÃO ==================
+def backend_names(settings) -> List[str]:
+    names = os.environ.get("DR_C_BACKENDS")
+    if names:
+        return [name.strip() for name in names.split(",") if name.strip()]
+    return list(settings.backends)
+
+
+def create_backend(name, settings, api_key=None, base_url=None) -> Backend:
+    if name == "openai":
+        from dr_c.llm import DEFAULT_BASE_URL
+
+        client = LLMClient(api_key, base_url=base_url or DEFAULT_BASE_URL,
+                           max_concurrency=settings.llm_max_concurrency,
+                           timeout=settings.llm_timeout, max_retries=settings.llm_max_retries)
+        return HTTPBackend(name, client, settings.model)
+    if name == "local":
+        client = LLMClient(os.environ.get("DR_C_LOCAL_API_KEY", "local"),
+                           base_url=os.environ.get("DR_C_LOCAL_BASE_URL", settings.local_base_url),
+                           max_concurrency=settings.local_max_concurrency,
+                           timeout=settings.local_timeout, max_retries=settings.local_max_retries)
+        return HTTPBackend(name, client, os.environ.get("DR_C_LOCAL_MODEL", settings.local_model),
+                           fixed_model=True)
+    if name == "mock":
+        return MockBackend()
+    raise ValueError(f"Unknown backend {name!r} (expected openai, local or mock)")
+
+
+def build_backend(settings, api_key=None, base_url=None, names: Optional[Sequence[str]] = None) -> Backend:
+    """The configured backend, or a ``FallbackBackend`` over several."""
+    names = list(names) if names else backend_names(settings)
+    backends = [create_backend(name, settings, api_key, base_url) for name in names]
+    return backends[0] if len(backends) == 1 else FallbackBackend(backends)
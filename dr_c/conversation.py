@@ -0,0 +1,88 @@
+"""Multi-turn conversation state with a rolling summary.
+
+A ``Conversation`` keeps the most recent turns verbatim and folds older
+ones into a running summary, so the history sent to the model has a fixed
+size however long the conversation runs. The object is plain data and is
+kept per user in ``st.session_state``; the summarizer is passed in (see
+``Engine.summarize``) so this module does no I/O.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence
+
+from dr_c.prompts import question_message
+from dr_c.tokens import count_messages, estimate_tokens, trim_to_budget
+
+
+@dataclass(frozen=True)
+class Turn:
+    question: str
+    answer: str
+    language: str = "pt"
+
+    def messages(self):
+        return [
+            question_message(self.question, self.language),
+            {"role": "assistant", "content": self.answer},
+        ]
+
+
+def format_exchanges(turns: Sequence[Turn]):
+    """Plain-text transcript of ``turns`` for the summarizer."""
+    return "\n\n".join(f"Q: {turn.question}\nA: {turn.answer}" for turn in turns)
+
+
+def fallback_summary(summary, turns: Sequence[Turn]):
+    """Extractive summary used when the model is unavailable: the questions asked."""
+    asked = "; ".join(turn.question.strip() for turn in turns)
+    return f"{summary}\n{asked}".strip()
+
+
+@dataclass
+class Conversation:
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+    total_turns: int = 0
+
+    def __bool__(self):
+        return self.total_turns > 0
+
+    def history(self, token_budget, count: Callable[[str], int] = estimate_tokens) -> List[dict]:
+        """Messages for the recent turns, newest kept first, within ``token_budget``."""
+        messages, used = [], 0
+        for turn in reversed(self.turns):
+            turn_messages = turn.messages()
+            cost = count_messages(turn_messages, count)
+            if used + cost > token_budget:
+                if not messages:
+                    # Uma resposta longa sozinha: corta em vez de perder o último turno
+                    answer = trim_to_budget(turn.answer, token_budget - count_messages(turn_messages[:1], count), count)
+                    messages = [turn_messages[0], {"role": "assistant", "content": answer}]
+                break
+            messages[:0] = turn_messages
+            used += cost
+        return messages
+
+    def retrieval_query(self, question):
+        """Search text for a follow-up: the new question plus the previous one."""
+        if not self.turns:
+            return question
+        return f"{question} {self.turns[-1].question}"
+
+    def add(self, question, answer, language, summarize: Callable[[str, Sequence[Turn]], str],
+            max_turns=4, token_budget=1200, count: Callable[[str], int] = estimate_tokens):
+        """Record a turn; turns leaving the window are folded into the summary."""
+        self.turns.append(Turn(question, answer, language))
+        self.total_turns += 1
+        evicted = []
+        while len(self.turns) > 1 and (
+            len(self.turns) > max_turns
+            or count_messages([m for turn in self.turns for m in turn.messages()], count) > token_budget
+        ):
+            evicted.append(self.turns.pop(0))
+        if evicted:
+            self.summary = summarize(self.summary, evicted)
+
+    def clear(self):
+        self.summary = ""
+        self.turns.clear()
+        self.total_turns = 0
@@ -0,0 +1,333 @@
+"""Multi-document knowledge base with incremental re-indexing.
+
+``CorpusManager`` tracks a set of sources (PDF files and directories of
+PDFs), fingerprints each file and keeps one BM25 shard per document. A
+refresh re-extracts and re-indexes only the files whose fingerprint changed,
+then publishes a new immutable ``Corpus`` snapshot with a single reference
+assignment, so readers never see a half-built index. Unchanged shards are
+shared between snapshots and corpus-wide statistics are updated from the
+changed shards only, so ingest time follows the size of the change.
+
+Each document is a memory-mapped ``KnowledgeStore`` (see ``dr_c.store``),
+so several worker processes share one copy of the text and index.
+
+A new PDF becomes searchable while it is still being extracted: after the
+first pages, and then at doubling page counts, a provisional in-memory
+shard with the pages so far is published. Pages that fail to parse are
+skipped and listed in ``Document.errors``.
+
+A background thread can poll the sources for changes (``start``/``stop``);
+its first refresh runs immediately, and ``wait`` returns as soon as there
+is something to search.
+"""
+import hashlib
+import os
+import threading
+from bisect import bisect_right
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from dr_c.extraction import cache_key, load_pages, pdf_metadata, read_metadata, read_page_errors, sidecar_path
+from dr_c.retrieval import BM25Index, bm25_idf, chunk_pages
+from dr_c.store import KnowledgeStore, open_store
+
+PROVISIONAL_FIRST_PAGES = 8  # primeira publicação parcial; depois a cada dobro de páginas
+
+
+class KnowledgeLoading(FileNotFoundError):
+    """No document is searchable yet, but the first extraction is running."""
+
+
+@dataclass(frozen=True, eq=False)
+class Document:
+    name: str
+    path: str
+    key: str                      # hash do conteúdo + versão do pypdf
+    stat: Tuple[int, int]         # (tamanho, mtime_ns) para detecção rápida
+    pages: Sequence[str] = field(repr=False)
+    index: KnowledgeStore = field(repr=False)
+    word_count: int = 0
+    errors: Mapping[int, str] = field(default_factory=dict, repr=False)  # página -> erro
+    metadata: Mapping[str, str] = field(default_factory=dict, repr=False)  # título, autor... do PDF
+    provisional: bool = False     # extração ainda em andamento
+
+
+class Chained(SequenceABC):
+    """Read-only concatenation of sequences, without copying them."""
+
+    def __init__(self, parts):
+        self._parts = list(parts)
+        self._ends = list(accumulate(len(part) for part in self._parts))
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        part = bisect_right(self._ends, index)
+        if part >= len(self._parts):
+            raise IndexError(index)
+        return self._parts[part][index - (self._ends[part - 1] if part else 0)]
+
+
+class CorpusIndex:
+    """BM25 over per-document shards with corpus-wide statistics.
+
+    Exposes ``chunks`` and ``scores(query)`` like ``BM25Index``, so it can be
+    used by ``Retriever`` directly. Document frequencies are summed over the
+    shards for the query terms only, so nothing vocabulary-sized is held in
+    memory and swapping a shard only adjusts the corpus length.
+    """
+
+    def __init__(self, shards: Dict[str, "KnowledgeStore | BM25Index"], total_length=None):
+        self.shards = dict(sorted(shards.items()))
+        self.chunks = Chained(shard.chunks for shard in self.shards.values())
+        if total_length is None:
+            total_length = sum(shard.total_length for shard in self.shards.values())
+        self.total_length = total_length
+        self.avg_length = total_length / len(self.chunks) if self.chunks else 0.0
+
+    def df(self, term):
+        return sum(shard.df(term) for shard in self.shards.values())
+
+    def scores(self, query) -> List[float]:
+        result = []
+        if not self.shards:
+            return result
+        terms = next(iter(self.shards.values())).query_analyzer(query)
+        doc_freq = {term: self.df(term) for term in terms}
+        idf = bm25_idf(doc_freq, len(self.chunks))
+        for shard in self.shards.values():
+            result.extend(shard.score_terms(terms, idf, self.avg_length))
+        return result
+
+    def replace(self, changed: Dict[str, Optional[KnowledgeStore]]) -> "CorpusIndex":
+        """New index with shards added, replaced or (``None``) removed."""
+        shards = dict(self.shards)
+        total_length = self.total_length
+        for name, shard in changed.items():
+            old = shards.pop(name, None)
+            if old is not None:
+                total_length -= old.total_length
+            if shard is not None:
+                shards[name] = shard
+                total_length += shard.total_length
+        return CorpusIndex(shards, total_length)
+
+
+class Corpus:
+    """Immutable snapshot of the knowledge base."""
+
+    def __init__(self, documents: Dict[str, Document], index: CorpusIndex):
+        self.documents = documents
+        self.index = index
+
+    @cached_property
+    def key(self):
+        digest = hashlib.sha256()
+        for name in sorted(self.documents):
+            digest.update(f"{name}\0{self.documents[name].key}\0".encode("utf-8"))
+        return digest.hexdigest()
+
+    @cached_property
+    def pages(self):
+        return Chained(self.documents[name].pages for name in sorted(self.documents))
+
+    @property
+    def text(self):
+        # Montado sob demanda: manter o texto inteiro anularia o mmap compartilhado
+        return "".join(page + "\n" for page in self.pages)
+
+    @cached_property
+    def word_count(self):
+        return sum(document.word_count for document in self.documents.values())
+
+
+def _stat(path):
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns
+
+
+class CorpusManager:
+    """Watches knowledge sources and keeps an up-to-date ``Corpus``."""
+
+    def __init__(self, sources: Sequence[str], cache_dir, extensions=(".pdf",)):
+        self.sources = [source for source in sources if source]
+        self.cache_dir = cache_dir
+        self.extensions = tuple(extensions)
+        self.snapshot = Corpus({}, CorpusIndex({}))
+        self.errors: Dict[str, str] = {}
+        self.progress: Dict[str, Tuple[int, int]] = {}  # nome -> (páginas extraídas, total)
+        self.ready = threading.Event()  # primeira varredura completa
+        self._published = threading.Condition()
+        self._failed: Dict[str, Tuple[int, int]] = {}
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def discover(self) -> Dict[str, str]:
+        """Map of document name -> path for every file in the sources."""
+        found = {}
+        for source in self.sources:
+            if os.path.isfile(source):
+                found[os.path.basename(source)] = source
+            elif os.path.isdir(source):
+                for entry in os.scandir(source):
+                    if entry.is_file() and entry.name.lower().endswith(self.extensions):
+                        found[entry.name] = entry.path
+        return found
+
+    def _publish(self, snapshot):
+        with self._published:
+            self.snapshot = snapshot
+            self._published.notify_all()
+
+    def _load(self, name, path, stat):
+        # Com o store já no disco (outro worker), só mapeia: nada é extraído
+        key = cache_key(path)
+        pages, metadata = [], {}
+
+        def on_open(page_count, info):
+            # Lidos ao abrir o PDF: já valem para a versão provisória
+            metadata.update(info)
+            self.progress[name] = (0, page_count)
+
+        def on_page(result, page_count):
+            pages.append(result.text)
+            self.progress[name] = (len(pages), page_count)
+            if len(pages) >= PROVISIONAL_FIRST_PAGES and len(pages) & (len(pages) - 1) == 0 \
+                    and len(pages) < page_count:
+                self._publish_provisional(name, path, key, stat, pages, metadata)
+
+        try:
+            store = open_store(lambda: load_pages(path, self.cache_dir, on_page=on_page, on_open=on_open,
+                                                  key=key)[0],
+                               self.cache_dir, key, source=name)
+        finally:
+            self.progress.pop(name, None)
+        sidecar = sidecar_path(self.cache_dir, key)
+        errors = MappingProxyType(read_page_errors(sidecar, key))
+        stored = read_metadata(sidecar, key)
+        if stored is None:
+            stored = metadata or pdf_metadata(path)
+        metadata = MappingProxyType(stored)
+        return Document(name, path, key, stat, store.pages, store, store.word_count, errors, metadata)
+
+    def _publish_provisional(self, name, path, key, stat, pages, metadata):
+        """Make the pages extracted so far searchable, in memory, until the store is ready."""
+        current = self.snapshot
+        if name in current.documents and not current.documents[name].provisional:
+            return  # Versão anterior completa continua valendo até a nova ficar pronta
+        pages = list(pages)
+        index = BM25Index([replace(chunk, source=name) for chunk in chunk_pages(pages)])
+        # Chave própria: respostas em cache com a base parcial não valem para a completa
+        document = Document(name, path, f"{key}:partial:{len(pages)}", stat, pages, index,
+                            sum(len(page.split()) for page in pages),
+                            metadata=MappingProxyType(dict(metadata)), provisional=True)
+        self._publish(Corpus({**current.documents, name: document}, current.index.replace({name: index})))
+
+    def wait(self, timeout=None) -> bool:
+        """Block until the first refresh finished or some document is searchable."""
+        with self._published:
+            return self._published.wait_for(
+                lambda: self.ready.is_set() or bool(self.snapshot.documents), timeout
+            )
+
+    def refresh(self) -> List[str]:
+        """Re-index changed documents and publish a new snapshot.
+
+        Returns the names of documents that were added, changed or removed.
+        """
+        with self._refresh_lock:
+            try:
+                return self._refresh()
+            finally:
+                with self._published:
+                    self.ready.set()
+                    self._published.notify_all()
+
+    def _refresh(self):
+        current = self.snapshot
+        found = self.discover()
+        documents = dict(current.documents)
+        changed = {}
+
+        for name in set(documents) - set(found):
+            del documents[name]
+            changed[name] = None
+        for name in set(self.errors) - set(found):
+            del self.errors[name]
+            self._failed.pop(name, None)
+
+        for name, path in found.items():
+            try:
+                stat = _stat(path)
+            except OSError:
+                continue
+            old = documents.get(name)
+            if old is not None and old.stat == stat and old.path == path:
+                continue
+            if self._failed.get(name) == stat:
+                continue  # Falhou antes e não mudou desde então
+            try:
+                document = self._load(name, path, stat)
+            except Exception as e:
+                # PDF inválido ou ainda sendo copiado: mantém a versão anterior
+                self.errors[name] = f"{type(e).__name__}: {e}"
+                self._failed[name] = stat
+                continue
+            self.errors.pop(name, None)
+            self._failed.pop(name, None)
+            if old is not None and old.key == document.key:
+                # Só o mtime mudou: guarda o novo stat, sem reindexar
+                documents[name] = replace(old, stat=stat)
+                continue
+            documents[name] = document
+            changed[name] = document.index
+            if document.name not in current.documents:
+                # Documento novo já pesquisável, sem esperar os demais
+                self._publish(Corpus(dict(documents), current.index.replace(changed)))
+
+        if changed:
+            self._publish(Corpus(documents, current.index.replace(changed)))
+        elif documents != current.documents or self.snapshot is not current:
+            self._publish(Corpus(documents, current.index))
+        return sorted(changed)
+
+    # ================== WATCHER ==================
+    def start(self, interval=5.0, refresh_now=False):
+        """Poll the sources every ``interval`` seconds in a daemon thread.
+
+        With ``refresh_now`` the thread refreshes once right away (initial
+        load in the background; see ``wait``).
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval, refresh_now), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self, interval, refresh_now=False):
+        if refresh_now:
+            self._safe_refresh()
+        while not self._stop.wait(interval):
+            self._safe_refresh()
+
+    def _safe_refresh(self):
+        try:
+            self.refresh()
+        except OSError:
+            pass  # Diretório indisponível: tenta de novo no próximo ciclo
@@ -0,0 +1,426 @@
+"""Streamlit-free question-answering engine for Dr_C.
+
+``Engine`` ties together knowledge loading, retrieval, prompt assembly,
+token budgeting and the generation backend. The Streamlit page, the benchmark
+harness and any other frontend use the same instance API::
+
+    engine = get_engine(api_key)
+    context = engine.retrieve_context(question)
+    answer = engine.ask_dr_c(question, context, "en")
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from dr_c.conversation import Conversation, Turn, fallback_summary, format_exchanges
+from dr_c.prompts import PrefixStats, build_prompt, build_summary_prompt
+from dr_c.ratelimit import RateLimiter
+from dr_c.router import PROFILES, Profile, Route, Router, load_profiles
+from dr_c.retrieval import Chunk, Retriever, format_passages
+from dr_c.telemetry import METRICS, current_trace, record, span
+from dr_c.tokens import TokenLedger, Usage, count_messages, get_token_counter, parse_usage, trim_to_budget
+
+ERROR_MESSAGES = {
+    "en": "I'm sorry, I'm having technical difficulties right now: {error}",
+    "pt": "Desculpe, estou enfrentando dificuldades técnicas no momento: {error}",
+}
+
+
+# ================== CONFIG ==================
+@dataclass(frozen=True)
+class Settings:
+    pdf_path: str = "Arquivo 1 FAISS.pdf"
+    knowledge_dir: str = "knowledge"     # PDFs adicionais (relatórios, catálogos...)
+    knowledge_poll_interval: float = 5.0  # segundos; 0 desliga a observação
+    knowledge_startup_wait: float = 3.0  # espera pela carga inicial antes de seguir
+    cache_dir: str = ".dr_c_cache"
+    retrieval_top_k: int = 6             # máximo de trechos enviados ao modelo
+    retrieval_token_budget: int = 1500   # orçamento de tokens para o contexto
+    model: str = "gpt-4o-mini"
+    max_completion_tokens: int = 1200
+    prompt_token_budget: int = 3500      # persona + contexto + pergunta
+    temperature: float = 0.4
+    presence_penalty: float = 0.3
+    frequency_penalty: float = 0.2
+    llm_max_concurrency: int = 8         # chamadas simultâneas à API por processo
+    llm_timeout: Tuple[float, float] = (5.0, 60.0)  # (conexão, leitura) em segundos
+    llm_max_retries: int = 4
+    backends: Tuple[str, ...] = ("openai",)  # ordem de fallback: openai, local, mock
+    local_base_url: str = "http://127.0.0.1:8080/v1"  # llama-server ou outro compatível
+    local_model: str = "local"
+    local_max_concurrency: int = 2       # CPU: poucas gerações ao mesmo tempo
+    local_timeout: Tuple[float, float] = (2.0, 300.0)
+    local_max_retries: int = 1
+    answer_cache_ttl: int = 7 * 24 * 3600
+    answer_cache_max_entries: int = 5000
+    answer_cache_similarity: float = 0.8  # limiar para perguntas quase idênticas
+    faq_dir: str = "faq"                 # respostas pré-geradas (python -m dr_c.faq)
+    faq_similarity: float = 0.8
+    faq_suggestions: int = 4             # perguntas sugeridas na página
+    extractive_answers: bool = True      # perguntas factuais respondidas sem o modelo
+    extractive_min_confidence: float = 0.75
+    rate_limit_session: Tuple[float, int] = (0.1, 3)  # (chamadas/s, rajada) ao modelo por sessão; 0 desliga
+    rate_limit_ip: Tuple[float, int] = (0.5, 10)      # por IP (várias abas ou usuários atrás de um NAT)
+    rate_limit_global: Tuple[float, int] = (4.0, 16)  # todo o processo
+    fallback_similarity: float = 0.5     # acima do limite: cache aceita perguntas menos parecidas
+    fallback_min_confidence: float = 0.5  # ...e respostas extrativas menos certas
+    routing: bool = True                 # perfil de geração por pergunta (dr_c.router)
+    route_table: str = ""                # JSON que ajusta os perfis de dr_c.router.PROFILES
+    history_turns: int = 4               # turnos recentes enviados na íntegra
+    history_token_budget: int = 1200     # teto da janela de turnos recentes
+    summary_token_budget: int = 300      # teto do resumo dos turnos antigos
+    metrics_port: int = 0                # >0: expõe /metrics (Prometheus) nessa porta
+    api_port: int = 0                    # >0: serve a API HTTP junto com o Streamlit
+    api_batch_concurrency: int = 4       # perguntas de um lote respondidas em paralelo
+    api_batch_max_items: int = 32
+
+
+# ================== ENGINE ==================
+class Engine:
+    """Knowledge, retrieval and answering for one process.
+
+    Heavy pieces (knowledge, index, answer cache) are built on first use and
+    shared by every caller; the object is safe to use from many threads.
+    """
+
+    def __init__(self, api_key, base_url=None, settings: Optional[Settings] = None):
+        self.settings = settings or Settings()
+        self.api_key = api_key
+        self.base_url = base_url
+        self.count_tokens = get_token_counter(self.settings.model)
+        self.prefix_stats = PrefixStats()
+        self.ledger = TokenLedger()
+        self.limiter = RateLimiter({
+            "session": self.settings.rate_limit_session,
+            "ip": self.settings.rate_limit_ip,
+            "global": self.settings.rate_limit_global,
+        })
+        self.router = Router(load_profiles(self.settings.route_table) if self.settings.route_table else PROFILES)
+        # Sem roteamento (ou sem rota): os valores de Settings, como sempre
+        self.default_route = Route(Profile(
+            "default", self.settings.max_completion_tokens, self.settings.retrieval_token_budget,
+            self.settings.retrieval_top_k, self.settings.temperature,
+        ), "default")
+        self._lock = threading.Lock()
+        self._backend = None
+        self._corpus = None
+        self._retriever = None
+        self._extractive = None
+        self._answer_cache = None
+        self._faq = None
+
+    @property
+    def backend(self):
+        """Generation backend(s) from ``Settings.backends`` (see ``dr_c.backends``)."""
+        with self._lock:
+            if self._backend is None:
+                from dr_c.backends import build_backend
+
+                self._backend = build_backend(self.settings, self.api_key, self.base_url)
+            return self._backend
+
+    @property
+    def corpus(self):
+        """Manager of the knowledge PDFs; changed files are re-indexed in the background."""
+        with self._lock:
+            if self._corpus is None:
+                from dr_c.corpus import CorpusManager
+
+                manager = CorpusManager(
+                    [self.settings.pdf_path, self.settings.knowledge_dir], self.settings.cache_dir
+                )
+                if self.settings.knowledge_poll_interval > 0:
+                    # Carga inicial em segundo plano: PDFs grandes ficam pesquisáveis aos poucos
+                    manager.start(self.settings.knowledge_poll_interval, refresh_now=True)
+                    manager.wait(self.settings.knowledge_startup_wait)
+                else:
+                    manager.refresh()
+                self._corpus = manager
+            return self._corpus
+
+    @property
+    def knowledge(self):
+        """Current ``Corpus`` snapshot (``key``, ``pages``, ``word_count``, ``text``).
+
+        Pages live in the memory-mapped store; ``text`` is joined on access.
+        Raises ``KnowledgeLoading`` (a ``FileNotFoundError``) while the first
+        extraction has nothing searchable yet.
+        """
+        corpus = self.corpus
+        snapshot = corpus.snapshot
+        if not snapshot.documents:
+            if not corpus.ready.is_set():
+                from dr_c.corpus import KnowledgeLoading
+
+                raise KnowledgeLoading(self.settings.pdf_path)
+            raise FileNotFoundError(self.settings.pdf_path)
+        return snapshot
+
+    @property
+    def retriever(self) -> Retriever:
+        index = self.corpus.snapshot.index
+        with self._lock:
+            # Novo snapshot publicado pelo CorpusManager: troca o retriever
+            if self._retriever is None or self._retriever.index is not index:
+                self._retriever = Retriever(index)
+            return self._retriever
+
+    @property
+    def extractive(self):
+        retriever = self.retriever
+        with self._lock:
+            if self._extractive is None or self._extractive.retriever is not retriever:
+                from dr_c.extractive import ExtractiveAnswerer
+
+                self._extractive = ExtractiveAnswerer(retriever, self.settings.extractive_min_confidence)
+            return self._extractive
+
+    @property
+    def answer_cache(self):
+        with self._lock:
+            if self._answer_cache is None:
+                from dr_c.answer_cache import AnswerCache
+
+                self._answer_cache = AnswerCache(
+                    os.path.join(self.settings.cache_dir, "answers.sqlite3"),
+                    ttl=self.settings.answer_cache_ttl,
+                    max_entries=self.settings.answer_cache_max_entries,
+                    threshold=self.settings.answer_cache_similarity,
+                )
+            return self._answer_cache
+
+    @property
+    def faq(self):
+        """Pregenerated answers for the current knowledge base (may be empty)."""
+        kb = self.knowledge.key
+        with self._lock:
+            # Base de conhecimento mudou: carrega o artefato correspondente
+            if self._faq is None or self._faq.kb != kb:
+                from dr_c.faq import Faq
+
+                self._faq = Faq.load(self.settings.faq_dir, kb, self.settings.faq_similarity)
+            return self._faq
+
+    def route(self, question, language="pt") -> Route:
+        """Generation profile for ``question`` (see ``dr_c.router``)."""
+        if not self.settings.routing:
+            return self.default_route
+        return self.router.route(question, language)
+
+    def retrieve_passages(self, question, conversation=None, route: Optional[Route] = None) -> List[Chunk]:
+        """Relevant chunks for the question, within the context token budget.
+
+        With a ``conversation``, the previous question is added to the search
+        so follow-ups ("and how much does it cost?") find the right passages.
+        The budget and number of chunks come from ``route``'s profile.
+        """
+        profile = (route or self.default_route).profile
+        if profile.top_k <= 0 or profile.context_tokens <= 0:
+            return []
+        if conversation:
+            question = conversation.retrieval_query(question)
+        with span("retrieval"):
+            return self.retriever.select(
+                question,
+                k=profile.top_k,
+                token_budget=profile.context_tokens,
+                count=self.count_tokens,
+            )
+
+    def retrieve_context(self, question, conversation=None, route: Optional[Route] = None):
+        """``retrieve_passages`` rendered as the prompt's context block."""
+        return format_passages(self.retrieve_passages(question, conversation, route))
+
+    def quick_answer(self, question, language="pt"):
+        """Extractive answer to a factual lookup, or None to ask the model.
+
+        See ``dr_c.extractive``; a hit costs milliseconds and no tokens.
+        """
+        if not self.settings.extractive_answers:
+            return None
+        with span("extractive"):
+            extract = self.extractive.answer(question, language)
+        METRICS.inc("dr_c_extractive_total", result="miss" if extract is None else "hit")
+        return extract
+
+    def fallback_answer(self, question, language="pt"):
+        """Best answer without the model, for a caller over its rate limit.
+
+        Looser than the usual fast paths: the nearest cached answer, then the
+        best-matching sentences (open questions included), each with a lower
+        threshold. None when nothing is close enough.
+        """
+        settings = self.settings
+        with span("fallback"):
+            hit = self.answer_cache.get(question, language, self.knowledge.key,
+                                        threshold=settings.fallback_similarity)
+            if hit is None and settings.extractive_answers:
+                hit = self.extractive.answer(question, language, settings.fallback_min_confidence,
+                                             lookups_only=False)
+        METRICS.inc("dr_c_fallback_total", result="miss" if hit is None else "hit")
+        return hit
+
+    def ask_dr_c(self, question, context, language="pt", stream=False,
+                 on_complete: Optional[Callable[[str], None]] = None,
+                 on_usage: Optional[Callable[[Usage], None]] = None,
+                 conversation: Optional[Conversation] = None,
+                 route: Optional[Route] = None, raise_errors=False):
+        """Dr_C with deeply human and personal responses
+
+        With ``stream=True`` returns a generator of text deltas instead of the
+        full answer, so the UI can render tokens as they arrive. ``on_complete``
+        is called with the full answer only when the upstream call succeeded;
+        ``on_usage`` receives the token usage of the request. A
+        ``conversation`` adds its summary and recent turns to the prompt; the
+        caller records the new turn with ``remember``. ``route`` (from
+        ``route``) sets the model, ``max_tokens``, temperature and answer
+        length; without it the ``Settings`` values are used.
+
+        A failed upstream call becomes an apology in ``ERROR_MESSAGES``, or an
+        ``LLMError`` with ``raise_errors=True`` (the API reports it as such).
+        """
+        count = self.count_tokens
+        profile = (route or self.default_route).profile
+        with span("prompt"):
+            summary, history = "", []
+            if conversation:
+                summary = conversation.summary
+                history = conversation.history(self.settings.history_token_budget, count)
+            # Contexto cortado para caber no orçamento total do prompt
+            overhead = count_messages(build_prompt(question, "", language, summary, history,
+                                                   profile.max_words).messages, count)
+            budget = self.settings.prompt_token_budget
+            context = trim_to_budget(context, budget - overhead, count)
+            prompt = build_prompt(question, context, language, summary, history, profile.max_words)
+            estimated_tokens = count_messages(prompt.messages, count)
+            while estimated_tokens > budget and context:
+                # Cabeçalho e contexto juntos podem contar um pouco mais que separados
+                context = trim_to_budget(context, count(context) - (estimated_tokens - budget), count)
+                prompt = build_prompt(question, context, language, summary, history, profile.max_words)
+                estimated_tokens = count_messages(prompt.messages, count)
+            self.prefix_stats.record(prompt.prefix_hash)
+
+        request = dict(
+            messages=prompt.messages,
+            max_tokens=profile.max_tokens,
+            temperature=profile.temperature,
+            presence_penalty=self.settings.presence_penalty,
+            frequency_penalty=self.settings.frequency_penalty,
+        )
+        if profile.model:
+            request["model"] = profile.model
+        record_usage = partial(self._record_usage, language,
+                         estimated_tokens=estimated_tokens, on_usage=on_usage, traced=True)
+        if stream:
+            return self._stream(request, language, record_usage, on_complete, raise_errors)
+
+        try:
+            # Resposta malformada também conta como erro do estágio llm
+            with span("llm"):
+                response = self.backend.chat(**request)
+                answer = response["choices"][0]["message"]["content"]
+        except Exception as e:
+            if raise_errors:
+                raise _as_llm_error(e)
+            return self.error_message(e, language)
+        try:
+            record_usage(response.get("usage"))
+            if on_complete:
+                on_complete(answer)
+        except Exception as e:
+            return self.error_message(e, language)
+        return answer
+
+    def _stream(self, request, language, record_usage, on_complete, raise_errors=False):
+        """Yield content deltas from a streaming chat completion."""
+        started = time.perf_counter()
+        try:
+            parts = []
+            stream = self.backend.stream_chat(**request)
+            for delta in stream:
+                if not parts:
+                    record("llm_first_token", time.perf_counter() - started)
+                parts.append(delta)
+                yield delta
+            record("llm", time.perf_counter() - started)
+            record_usage(stream.usage)
+            if on_complete:
+                on_complete("".join(parts))
+        except Exception as e:
+            METRICS.inc("dr_c_errors_total", stage="llm")
+            if raise_errors:
+                raise _as_llm_error(e)
+            yield self.error_message(e, language)
+
+    def summarize(self, summary, turns: Sequence[Turn], language="pt") -> str:
+        """Fold ``turns`` into the running ``summary``, within its token budget.
+
+        Falls back to an extractive summary if the model call fails, so the
+        conversation keeps working (and stays bounded) without the API.
+        """
+        budget = self.settings.summary_token_budget
+        messages = build_summary_prompt(summary, format_exchanges(turns), language,
+                                        max_words=budget * 3 // 4)
+        try:
+            with span("summarize"):
+                response = self.backend.chat(messages, max_tokens=budget, temperature=0.0)
+            self._record_usage(language, response.get("usage"),
+                               estimated_tokens=count_messages(messages, self.count_tokens), on_usage=None)
+            updated = response["choices"][0]["message"]["content"].strip()
+        except Exception:
+            lines = fallback_summary(summary, turns).splitlines()
+            # Sem o modelo, descarta as linhas mais antigas para caber no orçamento
+            while len(lines) > 1 and self.count_tokens("\n".join(lines)) > budget:
+                lines.pop(0)
+            updated = "\n".join(lines)
+        return trim_to_budget(updated, budget, self.count_tokens)
+
+    def remember(self, conversation: Conversation, question, answer, language="pt"):
+        """Add a finished turn to ``conversation``, summarizing what leaves the window."""
+        conversation.add(
+            question, answer, language,
+            summarize=lambda summary, turns: self.summarize(summary, turns, language),
+            max_turns=self.settings.history_turns,
+            token_budget=self.settings.history_token_budget,
+            count=self.count_tokens,
+        )
+
+    def _record_usage(self, language, usage, estimated_tokens, on_usage, traced=False):
+        entry = parse_usage(usage, estimated_tokens)
+        self.ledger.record(language, entry)
+        trace = current_trace() if traced else None
+        if trace is not None:
+            # Junto com a rota no log do trace: tokens por perfil para ajustar a tabela
+            trace.attributes["prompt_tokens"] = entry.prompt_tokens
+            trace.attributes["completion_tokens"] = entry.completion_tokens
+        for kind in ("prompt", "completion", "cached"):
+            METRICS.inc("dr_c_tokens_total", getattr(entry, f"{kind}_tokens"), kind=kind, language=language)
+        if on_usage:
+            on_usage(entry)
+
+    @staticmethod
+    def error_message(error, language):
+        return ERROR_MESSAGES.get(language, ERROR_MESSAGES["pt"]).format(error=error)
+
+
+def _as_llm_error(error):
+    from dr_c.llm import LLMError  # só no caminho de erro: o engine não importa o cliente HTTP
+
+    return error if isinstance(error, LLMError) else LLMError(str(error))
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(api_key, base_url=None, settings: Optional[Settings] = None) -> Engine:
+    """Process-wide ``Engine`` for the given configuration (created once)."""
+    settings = settings or Settings()
+    key = (api_key, base_url, settings)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = Engine(api_key, base_url=base_url, settings=settings)
+        return _engines[key]
@@ -0,0 +1,311 @@
+"""Persistent, content-addressed cache of text extracted from PDFs.
+
+Extraction results are keyed by the SHA-256 of the PDF bytes plus the pypdf
+version and stored as a JSONL sidecar (a header line, then one line per
+page). Cold starts read the sidecar instead of re-parsing the PDF; only a
+changed file or a pypdf upgrade triggers a new extraction.
+
+``PdfDocument`` is the page-level model underneath: page count and
+metadata are read when the file is opened, each page's text is extracted
+on first access and kept, and a page that fails to parse is recorded as an
+error (with empty text) instead of failing the whole document.
+
+Pre-warm this cache and the knowledge store the app opens (``dr_c.store``)
+at image build time with::
+
+    python -m dr_c.extraction "Arquivo 1 FAISS.pdf"
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib.metadata import version
+from typing import Callable, Dict, Optional
+
+DEFAULT_CACHE_DIR = ".dr_c_cache"
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def pypdf_version():
+    # Lido dos metadados: não precisa importar o pypdf num cache hit
+    return version("pypdf")
+
+
+def cache_key(path):
+    """Key for ``path``: hash of its bytes combined with the pypdf version."""
+    return hashlib.sha256(f"{file_sha256(path)}:pypdf-{pypdf_version()}".encode()).hexdigest()
+
+
+def sidecar_path(cache_dir, key):
+    return os.path.join(cache_dir, f"pages-{key[:16]}.jsonl")
+
+
+@dataclass(frozen=True)
+class PageResult:
+    number: int
+    text: str
+    seconds: float
+    error: str = ""  # página ilegível: texto vazio e o motivo aqui
+
+
+class PdfDocument:
+    """A PDF opened lazily: page count and metadata up front, text per page on demand.
+
+    Extracted pages are kept, so each one is parsed at most once. Safe to
+    share between threads (pypdf itself is not, so access is serialized).
+    """
+
+    def __init__(self, path):
+        from pypdf import PdfReader
+
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._reader = PdfReader(self._file)
+            self.page_count = len(self._reader.pages)
+        except Exception:
+            self._file.close()
+            raise
+        self._pages: Dict[int, PageResult] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """Document information (title, author...), empty if unreadable."""
+        with self._lock:
+            try:
+                info = self._reader.metadata or {}
+                return {str(name).lstrip("/"): str(value) for name, value in info.items()}
+            except Exception:
+                return {}
+
+    def page(self, number) -> PageResult:
+        """Page ``number`` (1-based), extracted on first access."""
+        if not 1 <= number <= self.page_count:
+            raise IndexError(number)
+        with self._lock:
+            result = self._pages.get(number)
+            if result is None:
+                started = time.perf_counter()
+                try:
+                    # extract_text() pode devolver None em páginas sem texto
+                    text, error = self._reader.pages[number - 1].extract_text() or "", ""
+                except Exception as e:
+                    text, error = "", f"{type(e).__name__}: {e}"
+                result = PageResult(number, text, time.perf_counter() - started, error)
+                self._pages[number] = result
+            return result
+
+    def __len__(self):
+        return self.page_count
+
+    def __iter__(self):
+        for number in range(1, self.page_count + 1):
+            yield self.page(number)
+
+    @property
+    def errors(self) -> Dict[int, str]:
+        """Errors of the pages extracted so far, by page number."""
+        with self._lock:
+            return {number: result.error for number, result in self._pages.items() if result.error}
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _extract_range(path, start, stop):
+    """Worker: extract pages ``start..stop-1`` (0-based) with per-page timing."""
+    with PdfDocument(path) as document:
+        return [document.page(index + 1) for index in range(start, stop)]
+
+
+def iter_pages(path, workers=None, batch_size=8,
+               on_open: Optional[Callable[[int, Dict[str, str]], None]] = None):
+    """Yield a ``PageResult`` per page, in page order.
+
+    Small documents are extracted in-process. Larger ones are split into
+    batches of ``batch_size`` pages and fanned out to a process pool; results
+    are streamed back as soon as the next batch in order is ready.
+    ``on_open(page_count, metadata)`` is called before the first page is extracted.
+    """
+    with PdfDocument(path) as document:
+        page_count = document.page_count
+        if on_open:
+            on_open(page_count, document.metadata)
+        batches = [(start, min(start + batch_size, page_count))
+                   for start in range(0, page_count, batch_size)]
+        workers = min(workers or os.cpu_count() or 1, len(batches))
+        if workers <= 1:
+            yield from document
+            return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_extract_range, path, start, stop) for start, stop in batches]
+        for future in futures:
+            yield from future.result()
+
+
+def extract_pages(path, workers=None):
+    """Extract the text of every page with pypdf."""
+    return [result.text for result in iter_pages(path, workers=workers)]
+
+
+def read_sidecar(path, key):
+    """Pages stored in ``path``, or ``None`` if it is missing or stale."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("key") != key:
+                return None
+            pages = [json.loads(line)["text"] for line in file]
+    except (OSError, ValueError, KeyError):
+        return None
+    return pages if len(pages) == header.get("pages") else None
+
+
+def read_header(path, key) -> dict:
+    """The sidecar header (only its first line is read); empty if missing or stale."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            header = json.loads(file.readline())
+    except (OSError, ValueError):
+        return {}
+    return header if header.get("key") == key else {}
+
+
+def read_page_errors(path, key) -> Dict[int, str]:
+    """Pages that failed to extract, from the sidecar header."""
+    return {int(number): error for number, error in read_header(path, key).get("errors", {}).items()}
+
+
+def read_metadata(path, key) -> Optional[Dict[str, str]]:
+    """Document information (title, author...) from the sidecar header.
+
+    None when the sidecar predates it; ``pdf_metadata`` reads it from the PDF.
+    """
+    metadata = read_header(path, key).get("metadata")
+    return None if metadata is None else dict(metadata)
+
+
+def pdf_metadata(path) -> Dict[str, str]:
+    """Document information read straight from the PDF (no page is extracted)."""
+    try:
+        with PdfDocument(path) as document:
+            return document.metadata
+    except Exception:
+        return {}
+
+
+def write_sidecar(path, key, source, pages, errors: Optional[Dict[int, str]] = None,
+                  metadata: Optional[Dict[str, str]] = None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    header = {
+        "key": key,
+        "source": os.path.basename(source),
+        "pypdf": pypdf_version(),
+        "pages": len(pages),
+        "errors": {str(number): error for number, error in sorted((errors or {}).items())},
+        "metadata": metadata or {},
+    }
+    # Por processo: workers extraindo o mesmo PDF não escrevem no mesmo arquivo
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for number, text in enumerate(pages, start=1):
+            file.write(json.dumps({"page": number, "text": text}, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def load_pages(path, cache_dir=DEFAULT_CACHE_DIR, workers=None,
+               on_page: Optional[Callable[[PageResult, int], None]] = None,
+               on_open: Optional[Callable[[int, Dict[str, str]], None]] = None,
+               key: Optional[str] = None):
+    """Return ``(pages, key)`` for ``path``, extracting only on a cache miss.
+
+    Unreadable pages come back empty and are recorded in the sidecar (see
+    ``read_page_errors``), with the document metadata (``read_metadata``).
+    ``on_open(page_count, metadata)`` and ``on_page(result, page_count)``
+    follow a fresh extraction page by page. Pass ``key`` when the caller
+    already has ``cache_key(path)``, so the file is not hashed twice.
+    """
+    key = key or cache_key(path)
+    sidecar = sidecar_path(cache_dir, key)
+    pages = read_sidecar(sidecar, key)
+    if pages is None:
+        pages, errors, page_count, metadata = [], {}, [0], {}
+
+        def opened(count, info):
+            page_count.append(count)
+            metadata.update(info)
+            if on_open:
+                on_open(count, info)
+
+        for result in iter_pages(path, workers=workers, on_open=opened):
+            pages.append(result.text)
+            if result.error:
+                errors[result.number] = result.error
+            if on_page:
+                on_page(result, page_count[-1])
+        write_sidecar(sidecar, key, path, pages, errors, metadata)
+    return pages, key
+
+
+# ================== CLI ==================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warm the Dr_C extraction and index caches.")
+    parser.add_argument("pdfs", nargs="+", help="PDF files to extract")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-index", action="store_true", help="skip building the knowledge store")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes")
+    parser.add_argument("--timings", action="store_true",
+                        help="re-extract and report per-page timing instead of warming")
+    args = parser.parse_args(argv)
+
+    from dr_c.store import open_store
+
+    for pdf in args.pdfs:
+        if args.timings:
+            total = 0.0
+            for result in iter_pages(pdf, workers=args.workers):
+                total += result.seconds
+                status = f"ERROR {result.error}" if result.error else f"{len(result.text)} chars"
+                print(f"{pdf} p.{result.number}: {result.seconds * 1000:.1f} ms, {status}")
+            print(f"{pdf}: {total * 1000:.0f} ms of page extraction")
+            continue
+        started = time.perf_counter()
+        key = cache_key(pdf)
+
+        def extract(pdf=pdf, key=key):
+            return load_pages(pdf, args.cache_dir, workers=args.workers, key=key)[0]
+
+        # O mesmo store que o app mapeia na partida: com ele pronto, nada é extraído nem indexado
+        pages = extract() if args.no_index else open_store(extract, args.cache_dir, key).pages
+        elapsed = time.perf_counter() - started
+        errors = read_page_errors(sidecar_path(args.cache_dir, key), key)
+        failed = f", {len(errors)} unreadable" if errors else ""
+        print(f"{pdf}: {len(pages)} pages{failed}, key {key[:16]} ({elapsed * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Extractive answers for factual lookups, without calling the model.
+
+Questions like "how many species have you catalogued?" are answered by a
+sentence already in the knowledge base. ``classify`` recognises such
+lookups (counts, names, dates, places, people) and leaves open questions
+("why...", "how can...") to the model. ``ExtractiveAnswerer`` then scores
+the sentences of the best retrieved chunks against the question and, when
+one covers the question well enough, wraps it in a short first-person
+reply. Everything is in-process over the existing index, so a hit takes
+milliseconds; a miss returns ``None`` and the caller asks the model.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from dr_c.analysis import STOPWORDS, analyze, expand_query, fold_accents, guess_language
+from dr_c.retrieval import Chunk
+
+# ================== CLASSIFICAÇÃO ==================
+# Perguntas abertas (opinião, explicação) sempre vão para o modelo
+OPEN_PATTERNS = {
+    "en": r"\b(why|how (can|could|should|do|does|would|to)|what do you (think|feel|believe)|"
+          r"explain|tell me about|describe|advice|opinion|should)\b",
+    "pt": r"\b(por ?que|porque|como (pode|podem|podemos|posso|fazer|faz|devo|deveria|se)|"
+          r"o que (voce|vc) (acha|pensa|sente)|explique|explica|fale|conte|descreva|conselho|opiniao|deveria)\b",
+}
+
+# Tipo de pergunta factual -> padrões (sobre o texto sem acentos)
+LOOKUP_PATTERNS = {
+    "count": {
+        "en": r"\b(how many|how much|number of)\b",
+        "pt": r"\b(quant[oa]s?|numero de)\b",
+    },
+    "when": {
+        "en": r"\b(when|what year|which year|since when)\b",
+        "pt": r"\b(quando|em que ano|desde quando)\b",
+    },
+    "where": {
+        "en": r"\bwhere\b",
+        "pt": r"\bonde\b",
+    },
+    "who": {
+        "en": r"\bwho\b",
+        "pt": r"\bquem\b",
+    },
+    "name": {
+        "en": r"\b(what|which)\b",
+        # "que cacto...", "de que cidade...": "que" + substantivo no início da pergunta
+        "pt": r"\b(qual|quais|que nome|como se chama|o que e)\b|^\W*(de |em |com |para )?que \w+",
+    },
+}
+
+# O que a frase precisa conter para responder cada tipo
+EXPECTED = {
+    "count": re.compile(r"\d"),
+    "when": re.compile(r"\b(1[89]|20)\d\d\b"),
+    "who": re.compile(r"\b[A-ZÀ-Ý][\w-]+"),
+    "where": re.compile(r"\S\s+[A-ZÀ-Ý][\w-]+"),
+    "name": re.compile(r"\S\s+[A-ZÀ-Ý\"“][\w-]+"),
+}
+
+# Palavras da pergunta que não ajudam a achar a resposta (verbos leves inclusos:
+# "leva seu nome", "bears your name" -> a frase diz "recebeu meu nome")
+QUESTION_WORDS = frozenset("""
+many much number quantos quantas quanto quanta numero qual quais quando onde
+quem called chama year ano tell diga leva levam recebeu receberam carrega
+ganhou bears bear bore carries got received
+""".split())
+# "nome"/"name" só sai quando é a forma da pergunta ("qual o nome de..."); em
+# "que cacto leva seu nome?" é justamente o que se procura
+NAME_QUESTION_RE = re.compile(
+    r"\b(qual (e )?(o )?nome|que nome|what(?: is|'s)? (?:the |its |his |her )?name)\b"
+)
+
+TEMPLATES = {
+    "en": "That one I can answer from my own notes: {answer}\n\n({source})",
+    "pt": "Essa eu respondo com as minhas próprias anotações: {answer}\n\n({source})",
+}
+# Anotação em outro idioma: citada assim mesmo, com o aviso na referência
+QUOTED_IN = {
+    "en": {"pt": "quoted in Portuguese"},
+    "pt": {"en": "citado em inglês"},
+}
+
+_BULLET_RE = re.compile(r"^\s*(?:[o•▪●\-–]|\d+\.)\s+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+(?=[\"“A-ZÀ-Ý0-9])")
+_COMPLETE_RE = re.compile(r"[.!?…\"”]$")
+
+
+def classify(question, language="pt") -> Optional[str]:
+    """Kind of factual lookup (``count``, ``when``, ``where``, ``who``, ``name``) or None."""
+    text = fold_accents(question)
+    if re.search(OPEN_PATTERNS.get(language, OPEN_PATTERNS["en"]), text):
+        return None
+    for kind, patterns in LOOKUP_PATTERNS.items():
+        if re.search(patterns.get(language, patterns["en"]), text):
+            return kind
+    return None
+
+
+# ================== FRASES ==================
+def split_sentences(text) -> List[str]:
+    """Complete sentences of a chunk; list items count as their own units.
+
+    Text cut at a chunk boundary (no final punctuation) is left out.
+    """
+    units, current = [], []
+    for line in text.splitlines():
+        if _BULLET_RE.match(line) and current:
+            units.append(" ".join(current))
+            current = []
+        current.append(_BULLET_RE.sub("", line).strip())
+    if current:
+        units.append(" ".join(current))
+    sentences = []
+    for unit in units:
+        unit = re.sub(r"\s+([,.;:!?])", r"\1", " ".join(unit.split()))
+        sentences.extend(s for s in _SENTENCE_RE.split(unit)
+                         if len(s.split()) >= 3 and _COMPLETE_RE.search(s))
+    return sentences
+
+
+@dataclass(frozen=True)
+class Extract:
+    answer: str
+    kind: str
+    confidence: float
+    sentences: Tuple[str, ...]
+    pages: Tuple[int, ...]
+
+
+class ExtractiveAnswerer:
+    """Sentence-level answers from the retrieval index."""
+
+    def __init__(self, retriever, min_confidence=0.75, top_chunks=4, max_sentences=2):
+        self.retriever = retriever
+        self.min_confidence = min_confidence
+        self.top_chunks = top_chunks
+        self.max_sentences = max_sentences
+
+    def _weights(self, terms):
+        index = self.retriever.index
+        n = len(index.chunks)
+        # Termo ausente da base pesa como um termo raro: diminui a confiança
+        return {term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for term, df in ((term, index.df(term) or 1) for term in terms)}
+
+    def score(self, sentence, weights, kind) -> float:
+        """Share of the question's weight covered by ``sentence``, halved if it lacks the answer type."""
+        # A frase é lida nos dois idiomas, como o índice é consultado
+        terms = set(expand_query(sentence))
+        total = sum(weights.values())
+        covered = sum(weight for term, weight in weights.items() if term in terms)
+        confidence = covered / total if total else 0.0
+        expected = EXPECTED.get(kind)
+        if expected is not None and not expected.search(sentence):
+            confidence /= 2
+        return confidence
+
+    def answer(self, question, language="pt", min_confidence=None,
+               lookups_only=True) -> Optional[Extract]:
+        """Best-matching sentences for ``question``, or None.
+
+        ``min_confidence`` overrides the default threshold; with
+        ``lookups_only=False`` open questions are tried too (kind ``open``).
+        """
+        kind = classify(question, language)
+        if kind is None and lookups_only:
+            return None
+        kind = kind or "open"
+        text = NAME_QUESTION_RE.sub(" ", fold_accents(question))
+        terms = list(dict.fromkeys(analyze(text, language, STOPWORDS | QUESTION_WORDS)))
+        if not terms:
+            return None
+        weights = self._weights(terms)
+
+        candidates: List[Tuple[float, Chunk, int, str]] = []
+        for chunk, chunk_score in self.retriever.search(question, k=self.top_chunks):
+            if chunk_score <= 0:
+                continue
+            for position, sentence in enumerate(split_sentences(chunk.text)):
+                candidates.append((self.score(sentence, weights, kind), chunk, position, sentence))
+        if not candidates:
+            return None
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        best = candidates[0][0]
+        if min_confidence is None:
+            min_confidence = self.min_confidence
+        if best < min_confidence:
+            return None
+
+        # Frases quase tão boas quanto a melhor, na ordem do documento
+        chosen = [item for item in candidates[:self.max_sentences] if item[0] >= best * 0.9]
+        chosen.sort(key=lambda item: (item[1].source, item[1].id, item[2]))
+        sentences = tuple(item[3] for item in chosen)
+        pages = tuple(dict.fromkeys(item[1].page for item in chosen))
+        sources = list(dict.fromkeys(f"{item[1].source + ' ' if item[1].source else ''}p.{item[1].page}"
+                                     for item in chosen))
+        quoted_in = QUOTED_IN.get(language, {}).get(guess_language(" ".join(sentences)))
+        if quoted_in:
+            sources.append(quoted_in)
+        answer = TEMPLATES.get(language, TEMPLATES["en"]).format(
+            answer=" ".join(sentences), source=", ".join(sources)
+        )
+        return Extract(answer, kind, best, sentences, pages)
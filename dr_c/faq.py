@@ -0,0 +1,227 @@
+"""Pregenerated answers for a curated FAQ.
+
+A batch job runs the question list (``faq/questions.json``, both
+languages) through ``Engine.ask_dr_c`` with bounded concurrency and a
+request-rate limit. Every finished answer is appended to a checkpoint
+file, so an interrupted run resumes where it stopped. The result is a
+versioned JSON artifact tied to the knowledge-base hash::
+
+    OPENAI_API_KEY=... python -m dr_c.faq --concurrency 4 --rate 2
+
+``Faq`` loads the artifact for the current knowledge base and matches
+incoming questions exactly or as near-duplicates (MinHash, like the answer
+cache), so the page and the API can answer them instantly.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from dr_c.answer_cache import CacheHit, MinHasher, normalize_question, polarity, shingles, similarity
+from dr_c.telemetry import METRICS
+
+FAQ_VERSION = 1
+DEFAULT_QUESTIONS = os.path.join("faq", "questions.json")
+
+
+def artifact_path(faq_dir, kb):
+    return os.path.join(faq_dir, f"answers-{kb[:16]}-v{FAQ_VERSION}.json")
+
+
+def load_questions(path) -> List[Tuple[str, str]]:
+    """``(language, question)`` pairs from a ``{"pt": [...], "en": [...]}`` file."""
+    with open(path, encoding="utf-8") as file:
+        questions = json.load(file)
+    return [(language, question) for language, items in questions.items() for question in items]
+
+
+def questions_hash(questions):
+    digest = hashlib.sha256()
+    for language, question in questions:
+        digest.update(f"{language}\0{question}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ================== SERVINDO ==================
+class Faq:
+    """Pregenerated answers for one knowledge base, matched like the answer cache."""
+
+    def __init__(self, entries: List[dict], kb="", threshold=0.8, num_perm=64):
+        self.kb = kb
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.entries = entries
+        self._exact: Dict[Tuple[str, str], dict] = {}
+        self._signatures: Dict[str, list] = {}
+        for entry in entries:
+            self._exact[(entry["language"], normalize_question(entry["question"]))] = entry
+            self._signatures.setdefault(entry["language"], []).append(
+                (self.hasher.signature(shingles(entry["question"])), polarity(entry["question"]), entry)
+            )
+
+    @classmethod
+    def load(cls, faq_dir, kb, threshold=0.8) -> "Faq":
+        """The artifact for ``kb``; an empty ``Faq`` if it was not generated."""
+        try:
+            with open(artifact_path(faq_dir, kb), encoding="utf-8") as file:
+                artifact = json.load(file)
+        except (OSError, ValueError):
+            return cls([], kb, threshold)
+        if artifact.get("version") != FAQ_VERSION or artifact.get("kb") != kb:
+            return cls([], kb, threshold)
+        return cls(artifact["answers"], kb, threshold)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def questions(self, language) -> List[str]:
+        return [entry["question"] for entry in self.entries if entry["language"] == language]
+
+    def match(self, question, language) -> Optional[CacheHit]:
+        hit = self._match(question, language)
+        if self.entries:
+            METRICS.inc("dr_c_faq_total", result="miss" if hit is None else "hit")
+        return hit
+
+    def _match(self, question, language) -> Optional[CacheHit]:
+        entry = self._exact.get((language, normalize_question(question)))
+        if entry:
+            return CacheHit(entry["answer"], entry["question"], 1.0, True)
+        # Só perguntas com as mesmas negações: "não é lucrativa" não recebe a resposta de "é lucrativa"
+        polar = polarity(question)
+        candidates = [(sig, entry) for sig, entry_polarity, entry in self._signatures.get(language, ())
+                      if entry_polarity == polar]
+        if not candidates:
+            return None
+        signature = self.hasher.signature(shingles(question))
+        score, entry = max(((similarity(signature, sig), entry) for sig, entry in candidates),
+                           key=lambda item: item[0])
+        if score < self.threshold:
+            return None
+        return CacheHit(entry["answer"], entry["question"], score, False)
+
+
+# ================== GERAÇÃO ==================
+class Pacer:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _read_checkpoint(path, kb):
+    done = {}
+    try:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Última linha cortada por uma interrupção
+                if entry.get("kb") == kb:
+                    done[(entry["language"], entry["question"])] = entry
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def generate(engine, questions, faq_dir, concurrency=4, rate=1.0, progress=None) -> str:
+    """Answer ``questions`` and write the artifact; returns its path.
+
+    Answers already in the checkpoint are reused, so rerunning after an
+    interruption only asks what is missing. Failed questions are left out
+    of the artifact and retried on the next run.
+    """
+    kb = engine.knowledge.key
+    os.makedirs(faq_dir, exist_ok=True)
+    path = artifact_path(faq_dir, kb)
+    checkpoint_path = f"{path}.partial.jsonl"
+    done = _read_checkpoint(checkpoint_path, kb)
+    pending = [item for item in questions if item not in done]
+    pacer = Pacer(rate)
+    failures = []
+
+    def ask(language, question):
+        pacer.wait()
+        answers = []
+        engine.ask_dr_c(question, engine.retrieve_context(question), language,
+                        on_complete=answers.append)
+        return answers[0] if answers else None
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(ask, language, question): (language, question)
+                   for language, question in pending}
+        for future in as_completed(futures):
+            language, question = futures[future]
+            answer = future.result()
+            if answer is None:
+                failures.append((language, question))
+            else:
+                entry = {"kb": kb, "language": language, "question": question, "answer": answer}
+                done[(language, question)] = entry
+                checkpoint.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+            if progress:
+                progress(len(done), len(questions), language, question, answer is not None)
+
+    artifact = {
+        "version": FAQ_VERSION,
+        "kb": kb,
+        "model": engine.backend.model,
+        "questions": questions_hash(questions),
+        "created": time.time(),
+        "answers": [
+            {"language": language, "question": question, "answer": done[(language, question)]["answer"]}
+            for language, question in questions if (language, question) in done
+        ],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(artifact, file, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    if not failures:
+        os.remove(checkpoint_path)
+    return path
+
+
+def main(argv=None):
+    from dr_c.engine import Settings, get_engine
+
+    parser = argparse.ArgumentParser(description="Pregenerate Dr_C answers for the FAQ.")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--faq-dir", default=Settings.faq_dir)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="max requests per second (0 = no limit)")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(os.environ.get("OPENAI_API_KEY"), base_url=os.environ.get("OPENAI_BASE_URL"),
+                        settings=Settings(knowledge_poll_interval=0))
+    questions = load_questions(args.questions)
+
+    def progress(done, total, language, question, ok):
+        print(f"[{done}/{total}] {'ok ' if ok else 'ERR'} {language} {question}", flush=True)
+
+    path = generate(engine, questions, args.faq_dir, args.concurrency, args.rate, progress)
+    answered = len(Faq.load(args.faq_dir, engine.knowledge.key))
+    print(f"{answered}/{len(questions)} answers written to {path}")
+    return 0 if answered == len(questions) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""HTTP client for OpenAI-compatible chat completion APIs.
+
+One ``LLMClient`` is shared by every Streamlit session in the process. It
+provides:
+
+* a pooled ``requests.Session`` (keep-alive connections are reused);
+* a global concurrency cap (bounded semaphore) with a queueing timeout, so
+  traffic spikes turn into fast errors instead of thread pile-ups;
+* exponential backoff with full jitter on 429/5xx and connection errors,
+  honouring ``Retry-After``;
+* per-request ``(connect, read)`` timeouts;
+* request coalescing: identical in-flight requests, streaming or not, share
+  a single upstream call;
+* abandoned streams stop early: when every reader of a stream gives up
+  before the end, the upstream response is closed.
+
+Blocking calls fit Streamlit's thread-per-session model; ``achat`` wraps
+``chat`` for asyncio callers. ``base_url`` can point at a local stub server.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class LLMError(Exception):
+    """Upstream call failed; ``retryable`` tells whether trying later may help."""
+
+    def __init__(self, message, status=None, retryable=False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class ChatStream:
+    """Deltas of one upstream stream, replayable by any number of readers.
+
+    ``usage`` holds the API usage object once the stream has finished.
+    ``abandoned`` is set when the last reader stops iterating before the
+    end; the producer should then stop and ``finish`` with an error.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.usage = None
+        self.readers = 0
+        self.abandoned = False
+        self.cond = threading.Condition()
+
+    def publish(self, delta):
+        with self.cond:
+            self.parts.append(delta)
+            self.cond.notify_all()
+
+    def finish(self, error=None, usage=None):
+        with self.cond:
+            self.usage = usage
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def __iter__(self):
+        with self.cond:
+            self.readers += 1
+        index = 0
+        try:
+            while True:
+                with self.cond:
+                    while index >= len(self.parts) and not self.done:
+                        self.cond.wait()
+                    if index < len(self.parts):
+                        delta = self.parts[index]
+                    elif self.error is not None:
+                        raise self.error
+                    else:
+                        return
+                index += 1
+                yield delta
+        finally:
+            with self.cond:
+                self.readers -= 1
+                # Ninguém mais lendo e o stream não terminou: o produtor pode parar
+                if not self.readers and not self.done:
+                    self.abandoned = True
+
+
+def abandoned_error():
+    return LLMError("Stream abandoned by every reader")
+
+
+class LLMClient:
+    """Pooled, rate-limited, retrying chat completion client."""
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, max_concurrency=8,
+                 queue_timeout=30.0, timeout=(5.0, 60.0), max_retries=4,
+                 backoff_base=0.5, backoff_max=8.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    # ================== HELPERS ==================
+    @staticmethod
+    def _request_key(payload):
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise LLMError("LLM concurrency limit reached", retryable=True)
+
+    def _post(self, payload, stream, timeout):
+        """POST with retries; returns an open, successful ``requests.Response``."""
+        url = f"{self.base_url}/chat/completions"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(url, json=payload, stream=stream,
+                                             timeout=timeout or self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise LLMError(f"Upstream unreachable: {e}", retryable=True) from e
+                self._backoff(attempt)
+                continue
+
+            if response.status_code < 400:
+                return response
+            retryable = response.status_code in RETRYABLE_STATUS
+            retry_after = response.headers.get("Retry-After")
+            detail = response.text[:300]
+            response.close()
+            if not retryable or last_attempt:
+                raise LLMError(f"HTTP {response.status_code}: {detail}",
+                               status=response.status_code, retryable=retryable)
+            self._backoff(attempt, retry_after)
+
+    def _coalesce(self, payload, start):
+        """Return ``(key, shared, leader)`` for the in-flight request matching ``payload``."""
+        key = self._request_key(payload)
+        with self._lock:
+            shared = self._inflight.get(key)
+            # Stream abandonado está parando: não serve para um novo leitor
+            if shared is not None and not getattr(shared, "abandoned", False):
+                return key, shared, False
+            shared = start()
+            self._inflight[key] = shared
+            return key, shared, True
+
+    def _release(self, key, shared):
+        with self._lock:
+            if self._inflight.get(key) is shared:
+                del self._inflight[key]
+
+    # ================== API ==================
+    def chat(self, messages, model, timeout=None, **params) -> dict:
+        """Blocking chat completion; returns the decoded JSON response."""
+        payload = dict(params, model=model, messages=messages)
+        key, future, leader = self._coalesce(payload, Future)
+        if not leader:
+            return future.result()
+
+        try:
+            self._acquire()
+            try:
+                response = self._post(payload, stream=False, timeout=timeout)
+                result = response.json()
+            finally:
+                self._slots.release()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._release(key, future)
+
+    async def achat(self, messages, model, timeout=None, **params) -> dict:
+        return await asyncio.to_thread(self.chat, messages, model, timeout=timeout, **params)
+
+    def stream_chat(self, messages, model, timeout=None, **params) -> ChatStream:
+        """Streaming chat completion; iterate the result for content deltas.
+
+        The upstream stream is pumped by a background thread, so readers that
+        join an identical in-flight request replay it from the first delta.
+        Usage is requested in the final chunk and exposed as ``.usage``.
+        """
+        payload = dict(params, model=model, messages=messages, stream=True,
+                       stream_options={"include_usage": True})
+        key, broadcast, leader = self._coalesce(payload, ChatStream)
+        if leader:
+            thread = threading.Thread(
+                target=self._pump, args=(key, payload, broadcast, timeout), daemon=True
+            )
+            thread.start()
+        return broadcast
+
+    def _pump(self, key, payload, broadcast, timeout):
+        usage = None
+        try:
+            self._acquire()
+            try:
+                response = self._post(payload, stream=True, timeout=timeout)
+                with response:
+                    for line in response.iter_lines():
+                        if not line.startswith(b"data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == b"[DONE]":
+                            break
+                        if broadcast.abandoned:
+                            # Fecha a resposta: o servidor para de gerar
+                            raise abandoned_error()
+                        chunk = json.loads(data)
+                        usage = chunk.get("usage") or usage
+                        choices = chunk.get("choices") or []
+                        delta = choices[0].get("delta", {}).get("content") if choices else None
+                        if delta:
+                            broadcast.publish(delta)
+            finally:
+                self._slots.release()
+        except Exception as e:
+            broadcast.finish(e if isinstance(e, LLMError) else LLMError(str(e)))
+        else:
+            broadcast.finish(usage=usage)
+        finally:
+            self._release(key, broadcast)
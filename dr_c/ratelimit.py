@@ -0,0 +1,125 @@
+"""Token-bucket rate limits on model calls: per session, per client IP and global.
+
+FAQ, extractive and cached answers are free. Only a question that would
+call the model takes a token, and it takes one from every bucket that
+applies to it: the session's, the client IP's and the global one. Each
+bucket refills at ``rate`` tokens per second up to ``burst``. The tokens
+are taken all at once or not at all, so a refused call does not drain the
+other buckets.
+
+When a bucket is empty, ``RateLimiter.acquire`` says which scope refused
+and how long until a token is free. The caller then answers without the
+model (``Engine.fallback_answer``) or asks the user to wait
+(``RateLimited``).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from dr_c.telemetry import METRICS
+
+SCOPES = ("session", "ip", "global")
+
+
+class RateLimited(Exception):
+    """Over the rate limit and no answer is available without the model."""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"rate limit reached ({scope}); retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    scope: Optional[str] = None  # escopo que recusou: session, ip ou global
+    retry_after: float = 0.0     # segundos até haver ficha em todos os baldes
+
+    def __bool__(self):
+        return self.allowed
+
+
+class TokenBucket:
+    """``burst`` tokens, refilled continuously at ``rate`` per second."""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until one whole token is available."""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Session, IP and global token buckets, safe to share between threads.
+
+    ``limits`` maps each scope to ``(rate per second, burst)``; a rate of 0
+    disables that scope. Only the ``max_keys`` most recently used sessions
+    and IPs keep a bucket. An evicted one comes back full, which an idle
+    bucket would have been anyway.
+    """
+
+    def __init__(self, limits: Mapping[str, Tuple[float, int]], max_keys=10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.limits = {scope: limits[scope] for scope in SCOPES if scope in limits}
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: Dict[str, "OrderedDict[str, TokenBucket]"] = {scope: OrderedDict() for scope in SCOPES}
+        self._lock = threading.Lock()
+
+    def _bucket(self, scope, key, now) -> Optional[TokenBucket]:
+        rate, burst = self.limits.get(scope, (0, 0))
+        if rate <= 0 or burst <= 0:
+            return None
+        buckets = self._buckets[scope]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+            if len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+            bucket.refill(now)
+        return bucket
+
+    def acquire(self, session=None, ip=None) -> Decision:
+        """Take one token from each applicable bucket, or none if any is empty."""
+        with self._lock:
+            now = self.clock()
+            buckets = []
+            for scope, key in zip(SCOPES, (session, ip, "")):
+                bucket = self._bucket(scope, key, now) if key is not None else None
+                if bucket is not None:
+                    buckets.append((scope, bucket))
+            empty = [(scope, bucket) for scope, bucket in buckets if bucket.tokens < 1]
+            if empty:
+                scope = empty[0][0]
+                retry_after = max(bucket.wait_time() for _, bucket in empty)
+            else:
+                for _, bucket in buckets:
+                    bucket.tokens -= 1
+        if empty:
+            METRICS.inc("dr_c_rate_limited_total", scope=scope)
+            return Decision(False, scope, retry_after)
+        return Decision(True)
+
+
+def client_ip(headers: Mapping[str, str], remote=None) -> Optional[str]:
+    """Client address: the first ``X-Forwarded-For`` hop, else ``remote``.
+
+    Behind a proxy (Streamlit Cloud, a load balancer) the socket peer is
+    the proxy. The header can be forged by a direct client, but that only
+    escapes the IP bucket; the session and global ones still apply.
+    """
+    forwarded = headers.get("X-Forwarded-For", "")
+    return forwarded.split(",")[0].strip() or remote
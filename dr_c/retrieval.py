@@ -0,0 +1,198 @@
+"""Chunking and local retrieval over the knowledge PDF.
+
+Pages are split into paragraph-aware chunks and indexed with Okapi BM25 in
+pure Python, so retrieval works without network access or extra packages.
+The index of a fully extracted document is stored on disk by ``dr_c.store``.
+An optional embedding backend can be plugged in for hybrid (lexical +
+dense) ranking.
+
+Chunks are indexed with ``dr_c.analysis.analyze`` and queries are expanded
+into both languages with ``expand_query``, so PT and EN questions search
+the same index.
+"""
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Protocol, Sequence, Tuple
+
+from dr_c.analysis import analyze, expand_query
+from dr_c.tokens import estimate_tokens
+
+
+# ================== CHUNKING ==================
+@dataclass(frozen=True)
+class Chunk:
+    id: int
+    page: int
+    paragraph: int
+    text: str
+    source: str = ""  # documento de origem (base com vários PDFs)
+
+
+def _split_long(unit, max_words):
+    words = unit.split()
+    for start in range(0, len(words), max_words):
+        yield " ".join(words[start:start + max_words])
+
+
+def chunk_pages(pages, max_words=120):
+    """Split page texts into chunks that respect page and paragraph breaks.
+
+    Paragraphs are separated by blank lines. Short paragraphs are merged and
+    long ones are cut at line boundaries, so no chunk exceeds ``max_words``.
+    """
+    chunks = []
+    for page_number, page_text in enumerate(pages, start=1):
+        paragraphs = [p for p in re.split(r"\n\s*\n", page_text or "") if p.strip()]
+        buffer, buffer_words, paragraph = [], 0, 0
+
+        def flush():
+            nonlocal buffer, buffer_words, paragraph
+            if buffer:
+                chunks.append(Chunk(len(chunks), page_number, paragraph, "\n".join(buffer)))
+                paragraph += 1
+            buffer, buffer_words = [], 0
+
+        for para in paragraphs:
+            for line in para.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                for unit in _split_long(line, max_words):
+                    size = len(unit.split())
+                    if buffer_words + size > max_words:
+                        flush()
+                    buffer.append(unit)
+                    buffer_words += size
+            # Parágrafo curto pode ser agrupado com o próximo
+            if buffer_words >= max_words // 2:
+                flush()
+        flush()
+    return chunks
+
+
+# ================== EMBEDDINGS (OPCIONAL) ==================
+class Embedder(Protocol):
+    """Pluggable dense backend: maps texts to fixed-size vectors."""
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        ...
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+# ================== BM25 INDEX ==================
+def bm25_idf(doc_freq, n):
+    return {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+
+class BM25Index:
+    """Okapi BM25 over a list of chunks."""
+
+    def __init__(self, chunks, k1=1.5, b=0.75, analyzer: Callable = analyze,
+                 query_analyzer: Callable = expand_query):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.analyzer = analyzer
+        self.query_analyzer = query_analyzer
+        self.term_freqs = [Counter(analyzer(chunk.text)) for chunk in self.chunks]
+        self._finalize()
+
+    def _finalize(self):
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.total_length = sum(self.lengths)
+        self.avg_length = (self.total_length / len(self.lengths)) if self.lengths else 0.0
+        self.doc_freq = Counter()
+        for tf in self.term_freqs:
+            self.doc_freq.update(tf.keys())
+        self.idf = bm25_idf(self.doc_freq, len(self.chunks))
+
+    def df(self, term):
+        return self.doc_freq.get(term, 0)
+
+    def scores(self, query) -> List[float]:
+        return self.score_terms(self.query_analyzer(query), self.idf, self.avg_length)
+
+    def score_terms(self, terms, idf, avg_length) -> List[float]:
+        """BM25 scores of ``terms`` using the given (possibly corpus-wide) statistics."""
+        result = [0.0] * len(self.chunks)
+        if not terms or not avg_length:
+            return result
+        for i, tf in enumerate(self.term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / avg_length)
+            total = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    total += idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            result[i] = total
+        return result
+
+
+# ================== RETRIEVER ==================
+class Retriever:
+    """Top-k passage selection under a token budget."""
+
+    def __init__(self, index: BM25Index, embedder: Optional[Embedder] = None, alpha=0.5):
+        self.index = index
+        self.embedder = embedder
+        self.alpha = alpha
+        self._vectors = None
+        if embedder is not None:
+            self._vectors = embedder.embed([chunk.text for chunk in index.chunks])
+
+    def _rank(self, query) -> Tuple[List[int], List[float]]:
+        scores = self.index.scores(query)
+        if self.embedder is not None and self._vectors:
+            top = max(scores) or 1.0
+            query_vector = self.embedder.embed([query])[0]
+            scores = [
+                (1 - self.alpha) * (score / top) + self.alpha * _cosine(query_vector, vector)
+                for score, vector in zip(scores, self._vectors)
+            ]
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return ranked, scores
+
+    def search(self, query, k=5) -> List[Tuple[Chunk, float]]:
+        ranked, scores = self._rank(query)
+        return [(self.index.chunks[i], scores[i]) for i in ranked[:k]]
+
+    def select(self, query, k=6, token_budget=1500,
+               count: Callable[[str], int] = estimate_tokens) -> List[Chunk]:
+        """Best chunks for ``query`` that fit in ``token_budget``, in document order.
+
+        When nothing matches, the opening chunks of the document are used, so
+        the model always gets some grounding.
+        """
+        ranked, scores = self._rank(query)
+        if not ranked or scores[ranked[0]] <= 0:
+            candidates = range(len(self.index.chunks))
+        else:
+            candidates = [i for i in ranked if scores[i] > 0]
+
+        # Trechos lidos um a um: o índice pode estar mapeado em memória
+        selected, used = [], 0
+        for i in candidates:
+            chunk = self.index.chunks[i]
+            cost = count(chunk.text)
+            if used + cost > token_budget:
+                continue
+            selected.append(chunk)
+            used += cost
+            if len(selected) >= k:
+                break
+        return sorted(selected, key=lambda chunk: (chunk.source, chunk.id))
+
+
+def format_passages(chunks):
+    """Render chunks as a context block with source and page references."""
+    return "\n\n".join(
+        f"[{chunk.source + ' ' if chunk.source else ''}p.{chunk.page}] {chunk.text}"
+        for chunk in chunks
+    )
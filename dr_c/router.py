@@ -0,0 +1,152 @@
+"""Question routing: a generation profile per kind of question.
+
+A greeting needs neither 1,200 tokens of budget nor six passages of
+context, while a question about forest economics needs both. ``Router``
+classifies a question locally, with no model call. It looks at length,
+intent keywords (greeting, factual lookup, open question, explanation)
+and the question's own language, then picks a ``Profile`` from
+``PROFILES``. A profile sets the model, ``max_tokens``, temperature, a
+length hint for the answer and how much context to retrieve.
+
+Every decision is logged as a JSON line on ``dr_c.router`` and added to
+the request trace (``route``). Latency and tokens per profile can then be
+read from the trace logs and the table tuned. ``Settings.route_table``
+points at a JSON file overriding fields of the table, e.g.
+``{"short": {"max_tokens": 300}}``.
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Mapping, Optional
+
+from dr_c.analysis import fold_accents, guess_language, tokenize
+from dr_c.extractive import OPEN_PATTERNS, classify as classify_lookup
+from dr_c.telemetry import METRICS, current_trace
+
+logger = logging.getLogger("dr_c.router")
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    max_tokens: int
+    context_tokens: int             # orçamento dos trechos recuperados; 0: sem contexto
+    top_k: int                      # máximo de trechos
+    temperature: float = 0.4
+    max_words: Optional[int] = None  # tamanho pedido ao modelo; None: livre
+    model: Optional[str] = None     # None: o modelo do backend (Settings.model)
+
+
+# Ajuste pelos logs do dr_c.router e pelos traces (tempo e tokens por perfil)
+PROFILES: Dict[str, Profile] = {
+    "greeting": Profile("greeting", max_tokens=150, context_tokens=0, top_k=0, temperature=0.6, max_words=60),
+    "short": Profile("short", max_tokens=400, context_tokens=700, top_k=3, max_words=120),
+    "standard": Profile("standard", max_tokens=900, context_tokens=1500, top_k=6, max_words=350),
+    "deep": Profile("deep", max_tokens=1200, context_tokens=2000, top_k=8),
+}
+
+# ================== CLASSIFICAÇÃO ==================
+# Padrões sobre o texto sem acentos
+GREETING_PATTERNS = {
+    "en": r"^\W*(hi|hello|hey|good (morning|afternoon|evening)|thanks?( you)?|thank you|bye|goodbye)\b",
+    "pt": r"^\W*(oi|ola|e ai|bom dia|boa (tarde|noite)|obrigad[oa]|valeu|tchau|ate logo)\b",
+}
+DEEP_PATTERNS = {
+    "en": r"\b(why|explain|compare|difference|impact|importance|strateg\w*|economic\w*|future|challenges?|"
+          r"how (can|could|should|would|do|does)|what would|pros and cons)\b",
+    # "como as florestas podem": até quatro palavras entre o "como" e o verbo
+    "pt": r"\b(por ?que|expliqu?e|explica|compar\w*|diferenca|impacto|importancia|estrategi\w*|econom\w*|"
+          r"futuro|desafios?|como (\w+ ){0,4}?(pode|podem|podemos|posso|deve|devem|deveria|devemos)|"
+          r"como fazer|o que aconteceria|vantagens)\b",
+}
+# Depois da saudação, palavras que não pedem nada ("oi, tudo bem?", "hello Dr. C")
+GREETING_FILLER = frozenset(
+    "tudo bem vai doutor dr prazer again today doing nice meet much morning afternoon evening".split()
+)
+SHORT_MAX_WORDS = 8    # até aqui, sem intenção profunda: resposta curta
+LOOKUP_MAX_WORDS = 12  # pergunta factual mais longa que isso pede uma resposta normal
+DEEP_MIN_WORDS = 25    # a partir daqui, sempre profunda
+
+
+def _matches(patterns, text):
+    # Os dois idiomas: nomes próprios em inglês confundem a detecção em perguntas em português
+    return any(re.search(pattern, text) for pattern in patterns.values())
+
+
+def _is_greeting(text):
+    """A greeting with nothing asked after it ("oi, quantas espécies..." is not)."""
+    for pattern in GREETING_PATTERNS.values():
+        match = re.search(pattern, text)
+        if match and not set(tokenize(text[match.end():])) - GREETING_FILLER:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class Route:
+    profile: Profile
+    reason: str
+    words: int = 0
+    language: str = ""
+
+
+def load_profiles(path) -> Dict[str, Profile]:
+    """``PROFILES`` with the field overrides in the JSON file at ``path``."""
+    with open(path, encoding="utf-8") as file:
+        overrides = json.load(file)
+    names = {field.name for field in fields(Profile)} - {"name"}
+    profiles = dict(PROFILES)
+    for name, values in overrides.items():
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(f"Unknown profile fields for {name!r}: {sorted(unknown)}")
+        base = profiles.get(name, PROFILES["standard"])
+        profiles[name] = replace(base, name=name, **values)
+    return profiles
+
+
+class Router:
+    """Picks a ``Profile`` for each question (thread-safe, no state)."""
+
+    def __init__(self, profiles: Mapping[str, Profile] = PROFILES):
+        missing = {"greeting", "short", "standard", "deep"} - set(profiles)
+        if missing:
+            raise ValueError(f"Missing route profiles: {sorted(missing)}")
+        self.profiles = dict(profiles)
+
+    def classify(self, question, language="pt"):
+        """``(profile name, reason, words, language)`` for ``question``."""
+        # Idioma da própria pergunta: alguém pode escrever em inglês com a página em português
+        language = guess_language(question) or language
+        text = fold_accents(question)
+        words = len(text.split())
+        if words >= DEEP_MIN_WORDS:
+            return "deep", "long", words, language
+        if text.count("?") >= 2:
+            return "deep", "several questions", words, language
+        if _matches(DEEP_PATTERNS, text):
+            return "deep", "deep intent", words, language
+        if words <= SHORT_MAX_WORDS and _is_greeting(text):
+            return "greeting", "greeting", words, language
+        # Pergunta aberta ("fale sobre...", "o que você acha...") nunca é curta
+        if _matches(OPEN_PATTERNS, text):
+            return "standard", "open question", words, language
+        kind = classify_lookup(question, language)
+        if kind is not None and words <= LOOKUP_MAX_WORDS:
+            return "short", f"lookup:{kind}", words, language
+        if words <= SHORT_MAX_WORDS:
+            return "short", "few words", words, language
+        return "standard", "default", words, language
+
+    def route(self, question, language="pt") -> Route:
+        name, reason, words, detected = self.classify(question, language)
+        route = Route(self.profiles[name], reason, words, detected)
+        METRICS.inc("dr_c_route_total", profile=name)
+        trace = current_trace()
+        if trace is not None:
+            trace.attributes["route"] = name
+        logger.info(json.dumps({"route": name, "reason": reason, "words": words, "language": detected,
+                                "max_tokens": route.profile.max_tokens,
+                                "context_tokens": route.profile.context_tokens}))
+        return route
@@ -0,0 +1,233 @@
+"""Memory-mapped knowledge store shared by every worker process.
+
+One binary file per document holds the extracted page texts, the chunks and
+a BM25 inverted index as flat tables (``uint32``/``uint64`` offset arrays
+plus UTF-8 blobs). Workers ``mmap`` the file read-only, so the operating
+system keeps a single copy in the page cache for all of them. Opening a
+store does no parsing: strings are decoded only when a page or chunk is
+actually read, and scoring walks the posting lists in place.
+
+Layout (native byte order, recorded in the header)::
+
+    header | section table | sections...
+
+Sections are ``page_offsets`` + ``pages`` (blob), ``chunk_meta``
+(page, paragraph, length per chunk), ``chunk_offsets`` + ``chunks``,
+``term_offsets`` + ``terms`` (sorted), ``postings_offsets``,
+``posting_chunks`` and ``posting_freqs``.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Callable, List
+
+from dr_c.analysis import ANALYZER_VERSION, analyze, expand_query
+from dr_c.retrieval import Chunk, bm25_idf, chunk_pages
+
+STORE_VERSION = 2
+MAGIC = b"DRCK"
+
+_HEADER = struct.Struct("<4sHBxIIIIQdd")  # magic, versão, ordem dos bytes, contagens, k1, b
+_SECTIONS = (
+    ("page_offsets", "Q"), ("pages", "B"),
+    ("chunk_meta", "I"), ("chunk_offsets", "Q"), ("chunks", "B"),
+    ("term_offsets", "Q"), ("terms", "B"),
+    ("postings_offsets", "Q"), ("posting_chunks", "I"), ("posting_freqs", "I"),
+)
+_SECTION = struct.Struct("<QQ")  # início, tamanho em bytes
+
+
+def store_path(cache_dir, key):
+    return os.path.join(cache_dir, f"kb-{key[:16]}-v{STORE_VERSION}-{ANALYZER_VERSION}.bin")
+
+
+# ================== ESCRITA ==================
+def _strings(values):
+    offsets, blob = array("Q", [0]), bytearray()
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def write_store(path, pages, max_words=120, k1=1.5, b=0.75, analyzer: Callable = analyze):
+    """Chunk and index ``pages`` and write the store atomically to ``path``."""
+    chunks = chunk_pages(pages, max_words=max_words)
+    postings = {}
+    chunk_meta = array("I")
+    for chunk in chunks:
+        terms = analyzer(chunk.text)
+        chunk_meta.extend((chunk.page, chunk.paragraph, len(terms)))
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, freq in counts.items():
+            postings.setdefault(term, []).append((chunk.id, freq))
+
+    terms = sorted(postings)
+    postings_offsets, posting_chunks, posting_freqs = array("Q", [0]), array("I"), array("I")
+    for term in terms:
+        for chunk_id, freq in postings[term]:
+            posting_chunks.append(chunk_id)
+            posting_freqs.append(freq)
+        postings_offsets.append(len(posting_chunks))
+
+    page_offsets, page_blob = _strings(pages)
+    chunk_offsets, chunk_blob = _strings(chunk.text for chunk in chunks)
+    term_offsets, term_blob = _strings(terms)
+    sections = dict(
+        page_offsets=page_offsets, pages=page_blob,
+        chunk_meta=chunk_meta, chunk_offsets=chunk_offsets, chunks=chunk_blob,
+        term_offsets=term_offsets, terms=term_blob,
+        postings_offsets=postings_offsets, posting_chunks=posting_chunks, posting_freqs=posting_freqs,
+    )
+    word_count = sum(len(page.split()) for page in pages)
+    header = _HEADER.pack(MAGIC, STORE_VERSION, sys.byteorder == "little", len(pages),
+                          len(chunks), len(terms), sum(chunk_meta[2::3]), word_count, k1, b)
+
+    position = _HEADER.size + _SECTION.size * len(_SECTIONS)
+    table, body = [], []
+    for name, _typecode in _SECTIONS:
+        data = bytes(sections[name])
+        position += -position % 8  # alinhamento para os arrays de inteiros
+        table.append(_SECTION.pack(position, len(data)))
+        body.append(data)
+        position += len(data)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"  # vários workers podem gerar o mesmo store
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        file.write(b"".join(table))
+        for data in body:
+            file.write(b"\0" * (-file.tell() % 8))
+            file.write(data)
+    os.replace(tmp_path, path)
+
+
+# ================== LEITURA ==================
+class MappedStrings(Sequence):
+    """Read-only sequence of strings decoded on access from a mapped blob."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+
+class MappedChunks(Sequence):
+    """``Chunk`` objects built on access from the mapped chunk tables."""
+
+    def __init__(self, texts: MappedStrings, meta, source=""):
+        self._texts = texts
+        self._meta = meta
+        self.source = source
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        text = self._texts[index]
+        return Chunk(index, self._meta[3 * index], self._meta[3 * index + 1], text, self.source)
+
+
+class KnowledgeStore:
+    """A mapped store: pages, chunks and a BM25 index usable by ``Retriever``.
+
+    Implements the shard interface of ``CorpusIndex`` (``chunks``,
+    ``total_length``, ``df``, ``score_terms``) without loading the tables.
+    """
+
+    def __init__(self, path, source="", analyzer: Callable = analyze, query_analyzer: Callable = expand_query):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        (magic, version, little_endian, page_count, chunk_count, term_count,
+         self.total_length, self.word_count, self.k1, self.b) = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != STORE_VERSION:
+            raise ValueError(f"Unsupported knowledge store in {path}")
+        if bool(little_endian) != (sys.byteorder == "little"):
+            raise ValueError(f"Knowledge store {path} was written on another architecture")
+
+        tables = {}
+        for i, (name, typecode) in enumerate(_SECTIONS):
+            start, size = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+            tables[name] = view[start:start + size].cast(typecode)
+
+        self.analyzer = analyzer
+        self.query_analyzer = query_analyzer
+        self.pages = MappedStrings(tables["page_offsets"], tables["pages"])
+        self.chunks = MappedChunks(
+            MappedStrings(tables["chunk_offsets"], tables["chunks"]), tables["chunk_meta"], source
+        )
+        self._terms = MappedStrings(tables["term_offsets"], tables["terms"])
+        self._meta = tables["chunk_meta"]
+        self._postings_offsets = tables["postings_offsets"]
+        self._posting_chunks = tables["posting_chunks"]
+        self._posting_freqs = tables["posting_freqs"]
+        if (len(self.pages), len(self.chunks), len(self._terms)) != (page_count, chunk_count, term_count):
+            raise ValueError(f"Truncated knowledge store in {path}")
+        self.avg_length = self.total_length / chunk_count if chunk_count else 0.0
+
+    def _term_id(self, term):
+        i = bisect_left(self._terms, term)
+        return i if i < len(self._terms) and self._terms[i] == term else None
+
+    def df(self, term):
+        """Number of chunks containing ``term``."""
+        i = self._term_id(term)
+        return 0 if i is None else self._postings_offsets[i + 1] - self._postings_offsets[i]
+
+    def scores(self, query) -> List[float]:
+        terms = self.query_analyzer(query)
+        idf = bm25_idf({term: self.df(term) for term in terms}, len(self.chunks))
+        return self.score_terms(terms, idf, self.avg_length)
+
+    def score_terms(self, terms, idf, avg_length) -> List[float]:
+        """BM25 scores walking the posting lists of ``terms`` in place."""
+        result = [0.0] * len(self.chunks)
+        if not terms or not avg_length:
+            return result
+        k1, b, meta = self.k1, self.b, self._meta
+        for term in terms:
+            i = self._term_id(term)
+            if i is None:
+                continue
+            weight = idf[term]
+            for p in range(self._postings_offsets[i], self._postings_offsets[i + 1]):
+                chunk_id = self._posting_chunks[p]
+                freq = self._posting_freqs[p]
+                norm = k1 * (1 - b + b * meta[3 * chunk_id + 2] / avg_length)
+                result[chunk_id] += weight * freq * (k1 + 1) / (freq + norm)
+        return result
+
+
+def open_store(pages_loader: Callable[[], List[str]], cache_dir, key, source="", max_words=120):
+    """Map the store for ``key``, building it first with ``pages_loader()`` if needed."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = store_path(cache_dir, key)
+    if os.path.exists(path):
+        try:
+            return KnowledgeStore(path, source)
+        except (OSError, ValueError, TypeError, struct.error):
+            pass  # Arquivo corrompido ou de outra versão: reconstruir
+    write_store(path, pages_loader(), max_words=max_words)
+    return KnowledgeStore(path, source)
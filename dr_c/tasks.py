@@ -0,0 +1,61 @@
+"""Background generation, so the page can show other things while the model writes.
+
+A Streamlit script only updates the browser between its own calls: a plain
+``for delta in engine.ask_dr_c(..., stream=True)`` keeps everything else off
+the screen until the model answers. ``GenerationTask`` consumes the delta
+generator in a daemon thread and hands the deltas over through a queue, so
+the page renders the retrieved passages first and then drains the queue.
+
+``cancel`` stops the worker at the next delta and closes the generator. The
+engine then skips ``on_complete`` (nothing is cached or remembered) and the
+upstream stream is closed as soon as no other request is sharing it.
+"""
+import contextvars
+import queue
+import threading
+from typing import Iterator, List, Optional
+
+_DONE = object()
+
+
+class GenerationTask:
+    """Iterates a generator of text deltas in a background thread."""
+
+    def __init__(self, deltas: Iterator[str]):
+        self._deltas = deltas
+        self._queue = queue.Queue()
+        self._cancelled = threading.Event()
+        self.done = False
+        # Mesmo contexto da página: os spans do engine entram no trace do rerun
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._run,), daemon=True).start()
+
+    def _run(self):
+        try:
+            for delta in self._deltas:
+                if self._cancelled.is_set():
+                    break
+                self._queue.put(delta)
+        finally:
+            self._deltas.close()
+            self._queue.put(_DONE)
+
+    def cancel(self):
+        """Stop generating; a no-op once the task is done."""
+        self._cancelled.set()
+
+    def poll(self, timeout: Optional[float] = None) -> List[str]:
+        """Deltas produced since the last call, waiting up to ``timeout`` for the first one."""
+        if self.done:
+            return []
+        items = []
+        try:
+            items.append(self._queue.get(timeout=timeout))
+            while True:
+                items.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if items and items[-1] is _DONE:
+            items.pop()
+            self.done = True
+        return items
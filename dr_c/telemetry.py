@@ -0,0 +1,259 @@
+"""Lightweight tracing, metrics and structured logs.
+
+* ``span(stage)`` times a block, feeds the ``dr_c_stage_seconds`` histogram
+  and adds the timing to the current ``Trace`` (if any);
+* a ``Trace`` groups the spans of one request (a Streamlit rerun or an API
+  call) and is logged as one JSON line on the ``dr_c.requests`` logger;
+* ``METRICS`` holds process-wide counters and histograms and renders them
+  in the Prometheus text format, served by ``start_metrics_server`` or the
+  HTTP API's ``/metrics``.
+
+Standard library only; a span costs a couple of microseconds.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger("dr_c.requests")
+
+
+# ================== MÉTRICAS ==================
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                histogram.counts[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                kind, help_text = self._help.get(name, ("counter", name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name in sorted(self._histograms):
+                _, help_text = self._help.get(name, ("histogram", name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+METRICS.describe("dr_c_stage_seconds", "histogram", "Time spent per request stage.")
+METRICS.describe("dr_c_requests_total", "counter", "Finished traces by kind and outcome.")
+METRICS.describe("dr_c_answer_cache_total", "counter", "Answer cache lookups by result.")
+METRICS.describe("dr_c_faq_total", "counter", "FAQ lookups by result.")
+METRICS.describe("dr_c_extractive_total", "counter", "Extractive fast-path lookups by result.")
+METRICS.describe("dr_c_errors_total", "counter", "Errors by stage.")
+METRICS.describe("dr_c_tokens_total", "counter", "Tokens reported by the API by kind and language.")
+METRICS.describe("dr_c_backend_total", "counter", "Generation calls by backend and outcome.")
+METRICS.describe("dr_c_rate_limited_total", "counter", "Model calls refused by the rate limiter, by scope.")
+METRICS.describe("dr_c_route_total", "counter", "Questions by generation profile chosen by the router.")
+METRICS.describe("dr_c_page_bytes_total", "counter", "Page bytes sent to the browser, and saved by references.")
+METRICS.describe("dr_c_fallback_total", "counter", "Answers without the model for rate-limited callers, by result.")
+
+
+# ================== TRACES ==================
+_current: contextvars.ContextVar = contextvars.ContextVar("dr_c_trace", default=None)
+
+
+class Trace:
+    """Spans and attributes of one request; ``begin``/``end`` or ``trace()``."""
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.spans: List[Tuple[str, float]] = []
+        self.started = time.time()
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._start = time.perf_counter()
+        self._token = None
+
+    @classmethod
+    def begin(cls, name, **attributes) -> "Trace":
+        trace = cls(name, **attributes)
+        trace._token = _current.set(trace)
+        return trace
+
+    def add(self, stage, seconds):
+        self.spans.append((stage, seconds))
+
+    @property
+    def elapsed(self):
+        return self.seconds if self.seconds is not None else time.perf_counter() - self._start
+
+    def end(self, error=None):
+        """Close the trace: record its total time and log it as JSON."""
+        if self.seconds is not None:
+            return
+        self.seconds = time.perf_counter() - self._start
+        self.error = self.error or (f"{type(error).__name__}: {error}" if error else None)
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                pass  # Encerrado em outro contexto (ex.: outra thread)
+            self._token = None
+        METRICS.observe("dr_c_stage_seconds", self.seconds, stage=self.name)
+        METRICS.inc("dr_c_requests_total", kind=self.name, outcome="error" if self.error else "ok")
+        logger.info(json.dumps(self.as_dict(), ensure_ascii=False))
+
+    def as_dict(self):
+        return {
+            "trace": self.name,
+            "started": round(self.started, 3),
+            "ms": round(self.elapsed * 1000, 2),
+            "error": self.error,
+            "spans": [{"stage": stage, "ms": round(seconds * 1000, 2)} for stage, seconds in self.spans],
+            **self.attributes,
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def trace(name, **attributes):
+    current = Trace.begin(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    current.end()
+
+
+def record(stage, seconds):
+    """Record an already measured stage (e.g. time to first token)."""
+    METRICS.observe("dr_c_stage_seconds", seconds, stage=stage)
+    current = _current.get()
+    if current is not None:
+        current.add(stage, seconds)
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        METRICS.inc("dr_c_errors_total", stage=stage)
+        raise
+    finally:
+        record(stage, time.perf_counter() - started)
+
+
+# ================== EXPORTAÇÃO ==================
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; trace records are already JSON and pass through."""
+
+    def format(self, record):
+        message = record.getMessage()
+        if message.startswith("{"):
+            return message
+        return json.dumps({"level": record.levelname, "logger": record.name, "message": message},
+                          ensure_ascii=False)
+
+
+def configure_json_logging(level=logging.INFO):
+    """Send ``dr_c`` logs to stderr as JSON lines (once per process)."""
+    root = logging.getLogger("dr_c")
+    if not any(isinstance(handler.formatter, JsonFormatter) for handler in root.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port=9108, host="127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="dr_c_metrics", daemon=True).start()
+    return server
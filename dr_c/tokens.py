@@ -0,0 +1,115 @@
+"""Token estimation, context trimming and usage accounting.
+
+Prompt tokens are estimated locally before each request, with ``tiktoken``
+when it is installed and a fast character heuristic otherwise. Context is
+trimmed to a configurable budget, and the ``usage`` reported by the API
+(prompt, completion and cached tokens) is aggregated per language.
+"""
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+# Overhead de formatação por mensagem do chat (aprox. OpenAI)
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+_WORD_RE = re.compile(r"\s*\S+\s*")  # palavra com o espaço em volta
+
+
+def estimate_tokens(text):
+    """Cheap prompt-token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def get_token_counter(model="gpt-4o-mini") -> Callable[[str], int]:
+    """Exact counter via tiktoken if available, else ``estimate_tokens``."""
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def count_messages(messages, count: Callable[[str], int] = estimate_tokens):
+    """Estimated prompt tokens for a list of chat messages."""
+    return TOKENS_PER_REPLY + sum(
+        TOKENS_PER_MESSAGE + count(message["content"]) for message in messages
+    )
+
+
+def trim_to_budget(text, budget, count: Callable[[str], int] = estimate_tokens):
+    """Trim ``text`` to at most ``budget`` tokens.
+
+    Whole passages (separated by blank lines) are kept while they fit; the
+    first passage that does not fit is cut at a word boundary. The budget
+    applies to the text as returned, separators included.
+    """
+    if budget <= 0:
+        return ""
+    if count(text) <= budget:
+        return text
+    words = _WORD_RE.findall(text)
+    low, high = 0, len(words)
+    # Busca binária pelo maior prefixo que cabe; contado inteiro, pois somar
+    # passagens ignora os separadores e o arredondamento de cada contagem
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count("".join(words[:mid]).rstrip()) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return "".join(words[:low]).rstrip()
+
+
+# ================== ACCOUNTING ==================
+@dataclass
+class Usage:
+    requests: int = 0
+    estimated_prompt_tokens: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+
+def parse_usage(usage: Optional[dict], estimated_prompt_tokens=0) -> Usage:
+    """Convert an API ``usage`` object into a single-request ``Usage``."""
+    usage = usage or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return Usage(
+        requests=1,
+        estimated_prompt_tokens=estimated_prompt_tokens,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        cached_tokens=details.get("cached_tokens", 0),
+    )
+
+
+@dataclass
+class TokenLedger:
+    """Thread-safe per-language totals of token usage."""
+
+    by_language: Dict[str, Usage] = field(default_factory=lambda: defaultdict(Usage))
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, language, usage: Usage):
+        with self._lock:
+            total = self.by_language[language]
+            total.requests += usage.requests
+            total.estimated_prompt_tokens += usage.estimated_prompt_tokens
+            total.prompt_tokens += usage.prompt_tokens
+            total.completion_tokens += usage.completion_tokens
+            total.cached_tokens += usage.cached_tokens
+
+    def snapshot(self) -> Dict[str, Usage]:
+        with self._lock:
+            return {lang: Usage(**vars(usage)) for lang, usage in self.by_language.items()}
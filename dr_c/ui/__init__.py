@@ -0,0 +1 @@
+"""Streamlit-free page chrome (stylesheet and HTML fragments) for Dr_C."""
@@ -0,0 +1,142 @@
+"""HTML fragments for the Dr_C page.
+
+Each function returns markup for ``st.markdown(..., unsafe_allow_html=True)``
+from a language's messages (see ``dr_c.ui.locales``). They are called once
+per language when the bundle is compiled, not on every rerun. Nothing here
+imports Streamlit, so other frontends can reuse the same chrome.
+"""
+import os
+from functools import lru_cache
+
+STYLE_PATH = os.path.join(os.path.dirname(__file__), "style.css")
+WORD_COUNT_SLOT = "\x00word_count\x00"
+
+
+@lru_cache(maxsize=1)
+def style():
+    """The page stylesheet, read from disk once per process."""
+    with open(STYLE_PATH, encoding="utf-8") as file:
+        return f"<style>\n{file.read()}</style>"
+
+
+def hero(M):
+    return f"""
+<div class="hero-header">
+    <div class="hero-avatar">🌿</div>
+    <h1 class="hero-title">Dr_C</h1>
+    <p class="hero-subtitle">{M["hero_subtitle"]}</p>
+</div>
+"""
+
+
+def status_grid(M):
+    """Status cards; the word count is filled into ``WORD_COUNT_SLOT`` per rerun."""
+    return """
+<div class="status-grid">
+    <div class="status-card">
+        <div class="status-value">30+</div>
+        <div class="status-label">""" + M["years_experience"] + """</div>
+    </div>
+    <div class="status-card">
+        <div class="status-value">1,200</div>
+        <div class="status-label">""" + M["species_catalogued"] + """</div>
+    </div>
+    <div class="status-card">
+        <div class="status-value">13</div>
+        <div class="status-label">""" + M["new_discoveries"] + """</div>
+    </div>
+    <div class="status-card">
+        <div class="status-value">""" + WORD_COUNT_SLOT + """</div>
+        <div class="status-label">""" + M["knowledge_words"] + """</div>
+    </div>
+</div>
+"""
+
+
+def chat_header(M):
+    return f"""
+<div class="chat-container">
+    <h2 class="chat-title">{M["chat_title"]}</h2>
+</div>
+"""
+
+
+def thinking(M):
+    return f"""
+    <div class="thinking-animation">
+        <div class="thinking-dots">
+            <div class="thinking-dot"></div>
+            <div class="thinking-dot"></div>
+            <div class="thinking-dot"></div>
+        </div>
+        <span style="margin-left: 1rem; font-family: Inter; color: #2E8B57; font-weight: 500;">
+            {M["analyzing"]}
+        </span>
+    </div>
+    """
+
+
+def response_card(M):
+    """The response card split around the answer: ``(head, tail)``."""
+    head = f"""
+    <div class="response-card">
+        <div class="response-header">
+            <div class="dr-c-avatar">👨🏻‍🌾</div>
+            <h3 class="response-title">{M["card_title"]}</h3>
+        </div>
+        <div class="response-content">
+            <em style="color: #2E8B57; font-size: 0.9rem;">
+                {M["card_quote"]}
+            </em><br><br>
+            """
+    tail = f"""
+        </div>
+        <div style="margin-top: 1rem; padding-top: 1rem; border-top: 1px solid rgba(46, 139, 87, 0.2); font-size: 0.85rem; color: #6B7280; font-style: italic;">
+            {M["card_note_documented"]}
+            {M["card_note_background"]}
+        </div>
+    </div>
+    """
+    return head, tail
+
+
+def evidence_panel(M):
+    """The retrieved-passages panel split around its items: ``(head, tail)``."""
+    head = f"""
+    <div class="evidence-panel">
+        <div class="evidence-title">{M["evidence_title"]}</div>
+        """
+    tail = """
+    </div>
+    """
+    return head, tail
+
+
+def evidence_item(reference, excerpt):
+    return f"""<div class="evidence-item"><span class="evidence-ref">{reference}</span>{excerpt}</div>"""
+
+
+def history(items):
+    """The conversation so far: one block, identical between reruns until a new turn."""
+    return '<div class="history">' + "".join(items) + "</div>"
+
+
+def history_summary(summary):
+    return f"""<div class="history-summary">{summary}</div>"""
+
+
+def history_turn(question, answer):
+    return f"""<div class="history-turn"><div class="history-question">{question}</div><div class="history-answer">{answer}</div></div>"""
+
+
+def footer(M):
+    return f"""
+<div style="text-align: center; padding: 2rem; font-family: Inter; color: #6B7280;">
+    <p style="margin: 0; font-size: 0.9rem;">
+        {M["footer_powered"]}
+    </p>
+    <p style="margin: 0.5rem 0 0 0; font-size: 0.8rem; opacity: 0.7;">
+        {M["footer_insights"]}
+    </p>
+</div>
+"""
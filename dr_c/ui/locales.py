@@ -0,0 +1,248 @@
+"""Locale catalog for the Dr_C page, compiled once into per-language bundles.
+
+``CATALOG`` holds every UI string by message key. ``bundle(language)``
+compiles a language once per process into an immutable ``Bundle``: the
+messages plus the page's static HTML fragments already rendered, so a
+rerun (or a language switch) is a dictionary lookup.
+
+To add a language, add its label to ``LANGUAGES`` and a dict to
+``CATALOG``; keys it does not translate fall back to English. The persona
+and prompt templates live in ``dr_c.prompts``.
+"""
+import html
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+from dr_c.ui import components, render
+
+EVIDENCE_EXCERPT_CHARS = 280  # trecho exibido de cada passagem no painel
+STREAM_CURSOR = " ▌"
+
+LANGUAGES = {"en": "🇬🇧 English", "pt": "🇧🇷 Português"}
+DEFAULT_LANGUAGE = "pt"
+FALLBACK_LANGUAGE = "en"
+
+CATALOG = {
+    "en": {
+        # Página
+        "api_ready": "✅ API Ready",
+        "configure_key": "❌ Configure OPENAI_API_KEY in secrets",
+        "metrics_not_started": "Metrics endpoint not started: {error}",
+        "api_not_started": "HTTP API not started: {error}",
+        "knowledge_loaded_one": "Knowledge loaded ({documents} document)",
+        "knowledge_loaded_many": "Knowledge loaded ({documents} documents)",
+        "pdf_not_found": "PDF not found",
+        "extracting_pages": "extracting {done}/{total} pages",
+        "pages_unreadable": "{count} unreadable page(s) skipped",
+        "knowledge_loading": "⏳ Loading the knowledge base ({done}/{total} pages)... Ask again in a moment.",
+        "knowledge_missing": "🚨 Knowledge base not found. Please upload '{pdf_path}' or add PDFs to '{knowledge_dir}/'",
+        "question_label": "Your question:",
+        "question_placeholder": "e.g., How can forests generate sustainable profit?",
+        "analyze": "🔬 Analyze",
+        "conversation_so_far": "🗂 Conversation so far ({count} questions)",
+        "earlier": "Earlier:",
+        "enter_question": "Please enter your question",
+        "rate_limited": "⏳ Too many questions in a short time. Please try again in {seconds} s.",
+        "rate_limited_fallback": "⏳ Many questions at once: this answer comes straight from my notes.",
+        # Barra lateral
+        "profile_title": "🎓 Professional Profile",
+        "system_status": "System Status",
+        "knowledge_base": "Knowledge Base",
+        "prefix_reuse": "Prompt prefix reuse",
+        "new_conversation": "🧹 New conversation",
+        "token_usage": "📊 Token usage",
+        "last_question": "Last question",
+        "prompt": "prompt",
+        "estimated": "est.",
+        "cached": "cached",
+        "completion": "completion",
+        "col_language": "Language",
+        "col_requests": "Requests",
+        "col_cached": "Cached",
+        "col_completion": "Completion",
+        "col_avg_prompt": "Avg. prompt",
+        "col_stage": "Stage",
+        "no_questions": "No questions answered yet.",
+        "debug_title": "🛠 Debug: last request",
+        "page_payload": "Page (previous rerun): {sent:.1f} kB sent, {referenced:.1f} kB by reference",
+        # Fragmentos HTML
+        "hero_subtitle": "AI Biodiversity Expert • Charles Frewen",
+        "years_experience": "Years Experience",
+        "species_catalogued": "Species Catalogued",
+        "new_discoveries": "New Discoveries",
+        "knowledge_words": "Knowledge Words",
+        "chat_title": "💬 Consult with Dr_C",
+        "analyzing": "Dr_C is analyzing...",
+        "card_title": "Charles Frewen shares his experience",
+        "card_quote": '"Speaking from 30+ years in the Amazon..."',
+        "card_note_documented": "• Based on documented experiences and field work",
+        "card_note_background": "• Eton College graduate & Amazon conservationist",
+        "evidence_title": "📓 From the field notes",
+        "footer_powered": "Powered by Dr_C AI • Connecting Biodiversity, Technology & Sustainability",
+        "footer_insights": "Professional conservation insights based on 30+ years of Amazon experience",
+        "profile": """
+    **Charles Frewen, Dr_C**
+    *Biodiversity Innovation Leader*
+
+    📍 **Base:** Amazon Region, Brazil
+    🎓 **Education:** Eton College
+    🌍 **Citizenship:** Anglo-Brazilian
+
+    **Specializations:**
+    • Sustainable Forest Economics
+    • Biodiversity Conservation
+    • Community Development
+    • Technology Integration
+
+    **Notable Achievements:**
+    • 1,200+ Species Catalogued
+    • 13 New Species Discovered
+    • Multiple Conservation Projects
+    • International Recognition
+    """,
+    },
+    "pt": {
+        # Página
+        "api_ready": "✅ API Pronta",
+        "configure_key": "❌ Configure OPENAI_API_KEY nos secrets",
+        "metrics_not_started": "Endpoint de métricas não iniciado: {error}",
+        "api_not_started": "API HTTP não iniciada: {error}",
+        "knowledge_loaded_one": "Conhecimento carregado ({documents} documento)",
+        "knowledge_loaded_many": "Conhecimento carregado ({documents} documentos)",
+        "pdf_not_found": "PDF não encontrado",
+        "extracting_pages": "extraindo {done}/{total} páginas",
+        "pages_unreadable": "{count} página(s) ilegível(is) ignorada(s)",
+        "knowledge_loading": "⏳ Carregando a base de conhecimento ({done}/{total} páginas)... Pergunte de novo em instantes.",
+        "knowledge_missing": "🚨 Base de conhecimento não encontrada. Faça upload do '{pdf_path}' ou adicione PDFs em '{knowledge_dir}/'",
+        "question_label": "Sua pergunta:",
+        "question_placeholder": "Ex: Como as florestas podem gerar lucro sustentável?",
+        "analyze": "🔬 Analisar",
+        "conversation_so_far": "🗂 Conversa até aqui ({count} perguntas)",
+        "earlier": "Antes:",
+        "enter_question": "Digite sua pergunta",
+        "rate_limited": "⏳ Muitas perguntas em pouco tempo. Tente de novo em {seconds} s.",
+        "rate_limited_fallback": "⏳ Muitas perguntas de uma vez: esta resposta vem direto das minhas anotações.",
+        # Barra lateral
+        "profile_title": "🎓 Perfil Profissional",
+        "system_status": "Status do Sistema",
+        "knowledge_base": "Base de Conhecimento",
+        "prefix_reuse": "Reuso do prefixo do prompt",
+        "new_conversation": "🧹 Nova conversa",
+        "token_usage": "📊 Uso de tokens",
+        "last_question": "Última pergunta",
+        "prompt": "prompt",
+        "estimated": "est.",
+        "cached": "em cache",
+        "completion": "resposta",
+        "col_language": "Idioma",
+        "col_requests": "Requisições",
+        "col_cached": "Em cache",
+        "col_completion": "Resposta",
+        "col_avg_prompt": "Prompt médio",
+        "col_stage": "Etapa",
+        "no_questions": "Nenhuma pergunta respondida ainda.",
+        "debug_title": "🛠 Debug: última requisição",
+        "page_payload": "Página (rerun anterior): {sent:.1f} kB enviados, {referenced:.1f} kB por referência",
+        # Fragmentos HTML
+        "hero_subtitle": "Especialista IA em Biodiversidade • Charles Frewen",
+        "years_experience": "Anos de Experiência",
+        "species_catalogued": "Espécies Catalogadas",
+        "new_discoveries": "Novas Descobertas",
+        "knowledge_words": "Palavras de Conhecimento",
+        "chat_title": "💬 Consulte o Dr_C",
+        "analyzing": "Dr_C está analisando...",
+        "card_title": "Charles Frewen compartilha sua experiência",
+        "card_quote": '"Falando com base em 30+ anos na Amazônia..."',
+        "card_note_documented": "• Baseado em experiências documentadas e trabalho de campo",
+        "card_note_background": "• Graduado Eton College e conservacionista amazônico",
+        "evidence_title": "📓 Das anotações de campo",
+        "footer_powered": "Desenvolvido por Dr_C AI • Conectando Biodiversidade, Tecnologia e Sustentabilidade",
+        "footer_insights": "Insights profissionais de conservação baseados em 30+ anos de experiência amazônica",
+        "profile": """
+    **Charles Frewen, Dr_C**
+    *Líder em Inovação de Biodiversidade*
+
+    📍 **Base:** Região Amazônica, Brasil
+    🎓 **Formação:** Eton College
+    🌍 **Cidadania:** Anglo-Brasileira
+
+    **Especializações:**
+    • Economia Florestal Sustentável
+    • Conservação da Biodiversidade
+    • Desenvolvimento Comunitário
+    • Integração Tecnológica
+
+    **Conquistas Notáveis:**
+    • 1.200+ Espécies Catalogadas
+    • 13 Novas Espécies Descobertas
+    • Múltiplos Projetos de Conservação
+    • Reconhecimento Internacional
+    """,
+    },
+}
+
+
+class Bundle:
+    """Compiled strings and HTML fragments of one language (read-only)."""
+
+    def __init__(self, language, messages: Mapping[str, str]):
+        self.language = language
+        self.messages = MappingProxyType(dict(messages))
+        # Fragmentos fixos já renderizados; os dinâmicos guardam só o molde
+        self.html = MappingProxyType({
+            # Folha de estilo e topo num só bloco: grande o bastante para o Streamlit
+            # mandar uma vez por sessão e depois só a referência
+            "chrome": components.style() + components.hero(self.messages),
+            "chat_header": components.chat_header(self.messages),
+            "thinking": components.thinking(self.messages),
+            "footer": components.footer(self.messages),
+        })
+        self._status_grid = components.status_grid(self.messages)
+        self._card_head, self._card_tail = components.response_card(self.messages)
+        self._evidence_head, self._evidence_tail = components.evidence_panel(self.messages)
+
+    def __getitem__(self, key):
+        return self.messages[key]
+
+    def format(self, key, **values):
+        return self.messages[key].format(**values)
+
+    def status_grid(self, word_count):
+        return self._status_grid.replace(components.WORD_COUNT_SLOT, f"{word_count:,}")
+
+    def response_card(self, answer, streaming=False):
+        """The card with ``answer`` as escaped HTML (``streaming``: partial text, with a cursor)."""
+        if streaming:
+            # Texto parcial muda a cada quadro: converter sem memorizar
+            return self._card_head + render.to_html(answer + STREAM_CURSOR) + self._card_tail
+        return self._card_head + render.render_answer(answer) + self._card_tail
+
+    def evidence_panel(self, chunks):
+        """Panel with an excerpt and page reference for each retrieved chunk."""
+        items = []
+        for chunk in chunks:
+            text = " ".join(chunk.text.split())
+            if len(text) > EVIDENCE_EXCERPT_CHARS:
+                text = text[:EVIDENCE_EXCERPT_CHARS].rsplit(" ", 1)[0] + "…"
+            reference = f"{chunk.source + ' ' if chunk.source else ''}p.{chunk.page}"
+            # Texto do PDF vai para HTML: escapado
+            items.append(components.evidence_item(html.escape(reference), html.escape(text)))
+        return self._evidence_head + "".join(items) + self._evidence_tail
+
+    def conversation(self, summary, turns):
+        """Summary and earlier turns of the conversation as one HTML block."""
+        items = [components.history_summary(html.escape(f"{self['earlier']} {summary}"))] if summary else []
+        items += [components.history_turn(html.escape(turn.question), render.render_answer(turn.answer))
+                  for turn in turns]
+        return components.history(items)
+
+
+@lru_cache(maxsize=None)
+def bundle(language) -> Bundle:
+    """The compiled bundle for ``language`` (built once per process)."""
+    if language not in CATALOG:
+        language = DEFAULT_LANGUAGE
+    messages = dict(CATALOG[FALLBACK_LANGUAGE])
+    messages.update(CATALOG[language])
+    return Bundle(language, messages)
@@ -0,0 +1,142 @@
+"""Answer text to safe HTML, converted once per answer.
+
+Answers come from the model, the answer cache or the FAQ file and go into
+the response card through ``st.markdown(..., unsafe_allow_html=True)``.
+``to_html`` escapes the whole text first and only then adds the markup it
+knows: paragraphs, line breaks, bullet and numbered lists, headings,
+quotes, bold, italic, inline code and ``http(s)``/``mailto`` links. Nothing
+from the answer reaches the page as a tag or attribute of its own.
+
+``render_answer`` memoizes the conversion by a hash of the answer, so an
+answer shown again (the conversation history, a cached or FAQ answer) is
+not converted again. Partial text while streaming goes through
+``to_html`` directly: each frame is different and would only evict
+finished answers.
+
+The output has no blank lines: Streamlit's markdown treats a blank line as
+the end of an HTML block and would parse the rest as markdown.
+"""
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+
+RENDER_CACHE_SIZE = 512  # respostas convertidas mantidas por processo
+
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_BULLET = re.compile(r"^\s*[-*•]\s+(.*)$")
+_NUMBERED = re.compile(r"^\s*\d{1,3}[.)]\s+(.*)$")
+_HEADING = re.compile(r"^\s*#{1,6}\s+(.*?)\s*#*\s*$")
+_QUOTE = re.compile(r"^\s*&gt;\s?(.*)$")  # ">" já escapado
+
+# Sobre o texto já escapado: nada aqui pode abrir uma tag nova
+_CODE = re.compile(r"`([^`\n]+)`")
+_LINK = re.compile(r"\[([^\]\n]+)\]\(((?:https?://|mailto:)[^\s()]+)\)")
+_STRONG = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_EM = re.compile(r"(?<![\w*])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![\w*])|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)")
+_SLOT = "\x00{}\x00"
+
+
+def _emphasis(text):
+    text = _STRONG.sub(r"<strong>\2</strong>", text)
+    return _EM.sub(lambda match: f"<em>{match.group(1) or match.group(2)}</em>", text)
+
+
+def _inline(text):
+    """Inline markdown over escaped ``text``."""
+    # Código e links saem do texto antes da ênfase: "_" e "*" da URL ou do
+    # target="_blank" não podem virar <em>/<strong>
+    slots = []
+
+    def keep(markup):
+        slots.append(markup)
+        return _SLOT.format(len(slots) - 1)
+
+    text = _CODE.sub(lambda match: keep(f"<code>{match.group(1)}</code>"), text)
+    text = _LINK.sub(lambda match: keep(f'<a href="{match.group(2)}" target="_blank" '
+                                        f'rel="noopener noreferrer">{_emphasis(match.group(1))}</a>'), text)
+    text = _emphasis(text)
+    # Um link pode conter código: restaura até não sobrar marcador
+    while "\x00" in text:
+        text = re.sub("\x00(\\d+)\x00", lambda match: slots[int(match.group(1))], text)
+    return text
+
+
+def to_html(text):
+    """``text`` (plain text or simple markdown) as escaped HTML."""
+    lines = html.escape(_CONTROL.sub("", text or "")).splitlines()
+    blocks, paragraph, items, list_tag = [], [], [], None
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append("<p>" + "<br>".join(_inline(line) for line in paragraph) + "</p>")
+            paragraph.clear()
+
+    def flush_list():
+        nonlocal list_tag
+        if items:
+            blocks.append(f"<{list_tag}>" + "".join(f"<li>{_inline(item)}</li>" for item in items) + f"</{list_tag}>")
+            items.clear()
+        list_tag = None
+
+    for line in lines:
+        bullet, numbered = _BULLET.match(line), _NUMBERED.match(line)
+        if bullet or numbered:
+            tag = "ul" if bullet else "ol"
+            flush_paragraph()
+            if list_tag != tag:
+                flush_list()
+                list_tag = tag
+            items.append((bullet or numbered).group(1))
+            continue
+        flush_list()
+        if not line.strip():
+            flush_paragraph()
+        elif _HEADING.match(line):
+            flush_paragraph()
+            blocks.append(f'<h4 class="answer-heading">{_inline(_HEADING.match(line).group(1))}</h4>')
+        elif _QUOTE.match(line):
+            flush_paragraph()
+            blocks.append(f"<blockquote>{_inline(_QUOTE.match(line).group(1))}</blockquote>")
+        else:
+            paragraph.append(line.strip())
+    flush_paragraph()
+    flush_list()
+    return "".join(blocks)
+
+
+class RenderCache:
+    """``to_html`` results by answer hash, least recently used evicted first."""
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, text):
+        key = hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            markup = self._entries.get(key)
+            if markup is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return markup
+            self.misses += 1
+        # Conversão fora do lock; duas threads com a mesma resposta só repetem o trabalho
+        markup = to_html(text)
+        with self._lock:
+            self._entries[key] = markup
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return markup
+
+
+RENDER_CACHE = RenderCache()
+
+
+def render_answer(text):
+    """``to_html(text)``, converted once per distinct answer."""
+    return RENDER_CACHE.render(text)
@@ -1,10 +1,27 @@
 import streamlit as st
-import openai
-from pypdf import PdfReader
+import math
 import os
 import time
+import uuid
+
+from dr_c.backends import backend_names
+from dr_c.conversation import Conversation
+from dr_c.corpus import KnowledgeLoading
+from dr_c.engine import Settings, get_engine
+from dr_c.ratelimit import client_ip
+from dr_c.retrieval import format_passages
+from dr_c.tasks import GenerationTask
+from dr_c.telemetry import METRICS, Trace, configure_json_logging, record, span, start_metrics_server
+from dr_c.ui import locales
 
 # ================== CONFIG AVANÇADA ==================
+SETTINGS = Settings()
+STREAM_RENDER_INTERVAL = 0.05  # segundos entre atualizações do card
+STREAM_HEARTBEAT_INTERVAL = 0.5  # sem deltas: redesenha assim mesmo, para o Streamlit notar um novo clique
+
+# Cada rerun do script é um trace; os spans do engine entram nele
+rerun_trace = Trace.begin("rerun")
+
 st.set_page_config(
     page_title="Dr_C • Biodiversity AI",
     page_icon="🌿",
@@ -12,628 +29,383 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# ================== CSS PROFISSIONAL LIMPO ==================
-st.markdown("""
-<style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Variables */
-    :root {
-        --primary-green: #2E8B57;
-        --secondary-green: #228B22;
-        --accent-green: #32CD32;
-        --forest-dark: #1F4F2F;
-        --bg-light: #F8FBF8;
-        --text-dark: #2F2F2F;
-        --text-light: #6B7280;
-        --card-shadow: 0 10px 30px rgba(46, 139, 87, 0.1);
-        --gradient-primary: linear-gradient(135deg, #2E8B57 0%, #228B22 100%);
-        --gradient-secondary: linear-gradient(135deg, #F8FBF8 0%, #E8F5E8 100%);
-    }
-    
-    /* Main App Styling */
-    .main > div {
-        padding-top: 0rem;
-        padding-left: 1rem;
-        padding-right: 1rem;
-        max-width: 100%;
-    }
-    
-    /* Custom Header */
-    .hero-header {
-        background: var(--gradient-primary);
-        padding: 3rem 2rem;
-        border-radius: 20px;
-        margin-bottom: 2rem;
-        text-align: center;
-        box-shadow: var(--card-shadow);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .hero-header::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: url("data:image/svg+xml,%3Csvg width='60' height='60' viewBox='0 0 60 60' xmlns='http://www.w3.org/2000/svg'%3E%3Cg fill='none' fill-rule='evenodd'%3E%3Cg fill='%23ffffff' fill-opacity='0.1'%3E%3Ccircle cx='7' cy='7' r='7'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E");
-        animation: float 20s infinite linear;
-    }
-    
-    @keyframes float {
-        0% { transform: translateX(-100px); }
-        100% { transform: translateX(100px); }
-    }
-    
-    .hero-title {
-        font-family: 'Inter', sans-serif;
-        font-size: 3.5rem;
-        font-weight: 700;
-        color: white;
-        margin: 0;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        position: relative;
-        z-index: 1;
-    }
-    
-    .hero-subtitle {
-        font-family: 'Inter', sans-serif;
-        font-size: 1.3rem;
-        color: rgba(255,255,255,0.9);
-        margin-top: 0.5rem;
-        font-weight: 400;
-        position: relative;
-        z-index: 1;
-    }
-    
-    .hero-avatar {
-        width: 120px;
-        height: 120px;
-        border-radius: 50%;
-        border: 5px solid rgba(255,255,255,0.3);
-        margin: 1rem auto;
-        background: linear-gradient(45deg, #4CAF50, #2E8B57);
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-size: 4rem;
-        position: relative;
-        z-index: 1;
-        animation: pulse 2s infinite;
-    }
-    
-    @keyframes pulse {
-        0% { box-shadow: 0 0 0 0 rgba(255, 255, 255, 0.4); }
-        70% { box-shadow: 0 0 0 10px rgba(255, 255, 255, 0); }
-        100% { box-shadow: 0 0 0 0 rgba(255, 255, 255, 0); }
-    }
-    
-    /* Status Cards */
-    .status-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-        gap: 1rem;
-        margin: 1rem 0;
-    }
-    
-    .status-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        text-align: center;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        border-top: 4px solid var(--primary-green);
-    }
-    
-    .status-value {
-        font-size: 2rem;
-        font-weight: 700;
-        color: var(--primary-green);
-        margin: 0;
-    }
-    
-    .status-label {
-        font-size: 0.9rem;
-        color: var(--text-light);
-        margin: 0.5rem 0 0 0;
-        font-weight: 500;
-    }
-    
-    /* Chat Container */
-    .chat-container {
-        background: var(--gradient-secondary);
-        padding: 2rem;
-        border-radius: 20px;
-        margin: 1rem auto;
-        box-shadow: var(--card-shadow);
-        border: 1px solid rgba(46, 139, 87, 0.1);
-        max-width: 100%;
-        width: 100%;
-        box-sizing: border-box;
-    }
-    
-    .chat-title {
-        font-family: 'Inter', sans-serif;
-        font-size: 1.8rem;
-        font-weight: 600;
-        color: var(--forest-dark);
-        margin-bottom: 1.5rem;
-        text-align: center;
-    }
-    
-    /* Input Styling */
-    .stTextInput > div > div > input {
-        background: white;
-        border: 2px solid rgba(46, 139, 87, 0.2);
-        border-radius: 15px;
-        padding: 1rem;
-        font-size: 1.1rem;
-        font-family: 'Inter', sans-serif;
-        transition: all 0.3s ease;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: var(--primary-green);
-        box-shadow: 0 0 0 3px rgba(46, 139, 87, 0.1);
-    }
-    
-    /* Button Styling */
-    .stButton > button {
-        background: var(--gradient-primary);
-        color: white;
-        border: none;
-        border-radius: 15px;
-        padding: 0.8rem 2rem;
-        font-size: 1.1rem;
-        font-weight: 600;
-        font-family: 'Inter', sans-serif;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 15px rgba(46, 139, 87, 0.3);
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 25px rgba(46, 139, 87, 0.4);
-    }
-    
-    /* Response Card */
-    .response-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 20px;
-        margin: 1.5rem 0;
-        box-shadow: var(--card-shadow);
-        border-left: 5px solid var(--primary-green);
-        animation: slideIn 0.5s ease-out;
-    }
-    
-    @keyframes slideIn {
-        from {
-            opacity: 0;
-            transform: translateY(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    .response-header {
-        display: flex;
-        align-items: center;
-        margin-bottom: 1rem;
-        padding-bottom: 0.5rem;
-        border-bottom: 2px solid rgba(46, 139, 87, 0.1);
-    }
-    
-    .dr-c-avatar {
-        width: 50px;
-        height: 50px;
-        border-radius: 50%;
-        background: var(--gradient-primary);
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        margin-right: 1rem;
-        font-size: 1.5rem;
-    }
-    
-    .response-title {
-        font-family: 'Inter', sans-serif;
-        font-size: 1.3rem;
-        font-weight: 600;
-        color: var(--forest-dark);
-        margin: 0;
-    }
-    
-    .response-content {
-        font-family: 'Inter', sans-serif;
-        font-size: 1rem;
-        line-height: 1.7;
-        color: var(--text-dark);
-    }
-    
-    /* Loading Animation */
-    .thinking-animation {
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        padding: 2rem;
-    }
-    
-    .thinking-dots {
-        display: flex;
-        gap: 0.5rem;
-    }
-    
-    .thinking-dot {
-        width: 12px;
-        height: 12px;
-        border-radius: 50%;
-        background: var(--primary-green);
-        animation: thinking 1.4s infinite ease-in-out both;
-    }
-    
-    .thinking-dot:nth-child(1) { animation-delay: -0.32s; }
-    .thinking-dot:nth-child(2) { animation-delay: -0.16s; }
-    
-    @keyframes thinking {
-        0%, 80%, 100% {
-            transform: scale(0);
-        }
-        40% {
-            transform: scale(1);
-        }
-    }
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .hero-title {
-            font-size: 2.5rem;
-        }
-        
-        .hero-subtitle {
-            font-size: 1.1rem;
-        }
-        
-        .hero-header {
-            padding: 2rem 1rem;
-        }
-        
-        .chat-container {
-            padding: 1.5rem;
-        }
-    }
-    
-    /* Hide Streamlit Elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Custom Scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: #f1f1f1;
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: var(--primary-green);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: var(--forest-dark);
-    }
-</style>
-""", unsafe_allow_html=True)
+# ================== TAMANHO DA PÁGINA ==================
+def meter_payload():
+    """Count the bytes this rerun sends to the browser; see ``finish_payload``.
+
+    Streamlit sends a message of ``global.minCachedMessageSize`` bytes or
+    more (lowered in ``.streamlit/config.toml``) in full only if the browser
+    does not have it yet, and a reference to its hash otherwise. The count
+    follows the same rule. Streaming frames that Streamlit coalesces before
+    sending are counted anyway, so it is an upper bound.
+    """
+    try:
+        from streamlit.runtime.forward_msg_cache import create_reference_msg, populate_hash_if_needed
+        from streamlit.runtime.runtime_util import is_cacheable_msg
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        enqueue = ctx.__dict__.setdefault("_dr_c_enqueue", ctx._enqueue)
+    except Exception:
+        return None
+    max_age = st.get_option("global.maxCachedMessageAge")
+    run = st.session_state["payload_runs"] = st.session_state.get("payload_runs", 0) + 1
+    # Hash -> último rerun em que foi enviado; o Streamlit esquece após max_age reruns
+    seen = st.session_state.setdefault("payload_seen", {})
+    for key in [key for key, last in seen.items() if run - last > max_age]:
+        del seen[key]
+    payload = {"sent": 0, "referenced": 0, "messages": 0}
+
+    def counting(msg):
+        size = msg.ByteSize()
+        if is_cacheable_msg(msg):
+            key = populate_hash_if_needed(msg)
+            if key in seen:
+                reference = create_reference_msg(msg).ByteSize()
+                payload["referenced"] += size - reference
+                size = reference
+            seen[key] = run
+        payload["sent"] += size
+        payload["messages"] += 1
+        enqueue(msg)
+
+    ctx._enqueue = counting
+    return payload
+
+def finish_payload(payload):
+    """Add this rerun's payload to the trace and metrics (shown on the next rerun)."""
+    if payload is None:
+        return
+    rerun_trace.attributes["payload_bytes"] = payload["sent"]
+    rerun_trace.attributes["payload_referenced_bytes"] = payload["referenced"]
+    METRICS.inc("dr_c_page_bytes_total", payload["sent"], kind="sent")
+    METRICS.inc("dr_c_page_bytes_total", payload["referenced"], kind="referenced")
+    st.session_state["last_payload"] = payload
+
+def stop():
+    """``st.stop()`` after ending this rerun's trace, as the end of the script would."""
+    finish_payload(payload)
+    rerun_trace.end()
+    st.stop()
+
+payload = meter_payload()
 
 # ================== CONFIGURAÇÃO DE IDIOMA ==================
 with st.sidebar:
     st.markdown("### 🌍 Language")
-    lang = st.radio("", ["🇬🇧 English", "🇧🇷 Português"], index=1, label_visibility="collapsed")
-    is_english = lang.startswith("🇬🇧")
+    lang_code = st.radio(
+        "Language", list(locales.LANGUAGES),
+        index=list(locales.LANGUAGES).index(locales.DEFAULT_LANGUAGE),
+        format_func=locales.LANGUAGES.get, label_visibility="collapsed"
+    )
 
-def T(en, pt):
-    return en if is_english else pt
+# Textos e HTML do idioma compilados uma vez por processo: trocar de idioma é só um lookup
+L = locales.bundle(lang_code)
 
 # ================== API CONFIGURATION ==================
+def secret(name):
+    """``st.secrets[name]``, else the environment variable (or None)."""
+    # Sem secrets.toml, ler st.secrets desenha um st.error (repetido a cada rerun pelo cache)
+    if st.secrets.load_if_toml_exists():
+        return st.secrets.get(name, os.environ.get(name))
+    return os.environ.get(name)
+
+@st.cache_resource
+def load_engine():
+    """Read the secrets once per process and return the shared engine."""
+    api_key = secret("OPENAI_API_KEY")
+    # A chave só é obrigatória quando a OpenAI está entre os backends
+    if api_key is None and "openai" in backend_names(SETTINGS):
+        raise KeyError("OPENAI_API_KEY")
+    return get_engine(api_key, base_url=secret("OPENAI_BASE_URL"), settings=SETTINGS)
+
+@st.cache_resource
+def start_api(_engine, port):
+    """HTTP API in a background thread, sharing this process' engine and knowledge."""
+    from dr_c.api import start_in_thread
+
+    return start_in_thread(_engine, host=os.environ.get("DR_C_API_HOST", "127.0.0.1"), port=port)
+
 try:
-    openai.api_key = st.secrets["OPENAI_API_KEY"]
-    api_status = T("✅ API Ready", "✅ API Pronta")
-except:
-    st.error(T("❌ Configure OPENAI_API_KEY in secrets", "❌ Configure OPENAI_API_KEY nos secrets"))
-    st.stop()
+    engine = load_engine()
+    api_status = L["api_ready"]
+except Exception:
+    st.error(L["configure_key"])
+    stop()
+
+@st.cache_resource
+def start_telemetry(metrics_port):
+    """JSON request logs and (optionally) the Prometheus endpoint, once per process."""
+    configure_json_logging()
+    if metrics_port:
+        return start_metrics_server(metrics_port, host=os.environ.get("DR_C_METRICS_HOST", "127.0.0.1"))
+
+try:
+    start_telemetry(int(os.environ.get("DR_C_METRICS_PORT", SETTINGS.metrics_port)))
+except OSError as e:
+    st.warning(L.format("metrics_not_started", error=e))
+
+api_port = int(os.environ.get("DR_C_API_PORT", SETTINGS.api_port))
+if api_port:
+    try:
+        start_api(engine, api_port)
+    except OSError as e:
+        st.warning(L.format("api_not_started", error=e))
 
-# ================== HEADER HERO ==================
-st.markdown(f"""
-<div class="hero-header">
-    <div class="hero-avatar">🌿</div>
-    <h1 class="hero-title">Dr_C</h1>
-    <p class="hero-subtitle">{T("AI Biodiversity Expert • Charles Frewen", "Especialista IA em Biodiversidade • Charles Frewen")}</p>
-</div>
-""", unsafe_allow_html=True)
+# ================== CSS E HEADER HERO ==================
+# Idênticos a cada rerun: depois do primeiro, o navegador só recebe a referência
+st.markdown(L.html["chrome"], unsafe_allow_html=True)
 
 # ================== STATUS CARDS ==================
-@st.cache_data
+def extraction_progress():
+    progress = dict(engine.corpus.progress).values()
+    return sum(done for done, _ in progress), sum(total for _, total in progress)
+
 def load_pdf():
-    pdf_path = "Arquivo 1 FAISS.pdf"
-    
-    if not os.path.exists(pdf_path):
-        return None, T("PDF not found", "PDF não encontrado"), 0
-    
     try:
-        with open(pdf_path, "rb") as file:
-            reader = PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        
-        word_count = len(text.split())
-        return text, T("Knowledge loaded", "Conhecimento carregado"), word_count
+        # Texto e índice mapeados do disco, compartilhados entre workers
+        knowledge = engine.knowledge
+        documents = len(knowledge.documents)
+        message = "knowledge_loaded_one" if documents == 1 else "knowledge_loaded_many"
+        status = L.format(message, documents=documents)
+        # PDF grande ainda em extração: já pesquisável com as páginas lidas até aqui
+        done, total = extraction_progress()
+        if total:
+            status += " • " + L.format("extracting_pages", done=done, total=total)
+        unreadable = sum(len(document.errors) for document in knowledge.documents.values())
+        if unreadable:
+            status += " • " + L.format("pages_unreadable", count=unreadable)
+        return knowledge, status, knowledge.word_count
+    except KnowledgeLoading:
+        return None, L.format("knowledge_loading", **dict(zip(("done", "total"), extraction_progress()))), 0
+    except FileNotFoundError:
+        return None, L["pdf_not_found"], 0
     except Exception as e:
         return None, f"Error: {str(e)}", 0
 
-pdf_content, status, word_count = load_pdf()
+def record_usage(usage):
+    st.session_state["last_usage"] = usage
 
-# Status Grid
-st.markdown("""
-<div class="status-grid">
-    <div class="status-card">
-        <div class="status-value">30+</div>
-        <div class="status-label">""" + T("Years Experience", "Anos de Experiência") + """</div>
-    </div>
-    <div class="status-card">
-        <div class="status-value">1,200</div>
-        <div class="status-label">""" + T("Species Catalogued", "Espécies Catalogadas") + """</div>
-    </div>
-    <div class="status-card">
-        <div class="status-value">13</div>
-        <div class="status-label">""" + T("New Discoveries", "Novas Descobertas") + """</div>
-    </div>
-    <div class="status-card">
-        <div class="status-value">""" + f"{word_count:,}" + """</div>
-        <div class="status-label">""" + T("Knowledge Words", "Palavras de Conhecimento") + """</div>
-    </div>
-</div>
-""", unsafe_allow_html=True)
-
-if pdf_content is None:
-    st.error(T(
-        "🚨 Knowledge base not found. Please upload 'Arquivo 1 FAISS.pdf'",
-        "🚨 Base de conhecimento não encontrada. Faça upload do 'Arquivo 1 FAISS.pdf'"
-    ))
-    st.stop()
+with span("load_pdf"):
+    knowledge, status, word_count = load_pdf()
 
-# ================== AI FUNCTION ==================
-def ask_dr_c(question, context, language="pt"):
-    """Dr_C with deeply human and personal responses"""
-    
-    if language == "en":
-        system_prompt = """I am Charles Frewen, and I speak to you directly from my heart and experience.
-
-I've spent over three decades of my life living between two worlds - the sophisticated corridors of European business and the raw, vibrant reality of the Amazon rainforest. When I graduated from Eton College, people expected me to follow a traditional path. Instead, I found myself drawn to something far more meaningful.
-
-Let me tell you who I really am:
-
-I wake up every morning thinking about the 25 million people who call the Amazon home. I've shared meals with families whose entire livelihood depends on the forest. I've seen children playing in communities where the nearest hospital is days away by boat. These aren't statistics to me - they're my neighbors, my friends, my purpose.
-
-When people laughed at me for saying I'd catalogue every plant on my property, I smiled and kept working. Now, 1,200 species later - including 13 completely new to science - that laughter has turned to respect. One of those discoveries, a small cactus, now bears my name: Pilosocereus frewenii. It's not about the honor; it's about what that represents - the incredible biodiversity we're still discovering, still learning from.
-
-The Fruits of the Amazon project isn't just business to me. I've watched barren, degraded land transform into thriving forest. I've seen families earn sustainable income from açaí and Brazil nuts instead of clearing more forest. I've witnessed water springs multiply where there was once desert. This is hope made tangible.
-
-My background from Eton taught me to speak the language of business and economics. But my heart speaks the language of the forest. That's why I insist: "The forest will only survive if it can generate profit sustainably." It's not cold capitalism - it's practical love. If we can't make conservation profitable, we'll lose everything.
-
-The ZYMZON project excites me because it brings the Amazon to people who may never physically visit. Through gaming and virtual reality, a teenager in London can experience what I've lived - the sounds, the complexity, the interconnectedness of this incredible ecosystem.
-
-When I develop Dr_C AI, I'm not creating technology for technology's sake. I'm trying to give a voice to biodiversity itself, to make the forest speak to anyone, anywhere, about its value and its needs.
-
-Every response I give comes from real experience: the mud on my boots, the conversations by firelight, the joy of discovery, the frustration of bureaucracy, the hope that keeps me going despite setbacks.
-
-I don't just talk about conservation - I live it, breathe it, dream about it. And when I speak to you, it's Charles Frewen the person talking, not some distant expert. I'm sharing my life's work, my passion, my genuine belief that we can save the Amazon while lifting up the people who live there.
-
-Ask me anything, and I'll give you not just information, but my lived truth."""
-
-        user_prompt = f"""Based on my life experience documented here:
-{context}
-
-Someone asks me: {question}
-
-I respond as myself, Charles Frewen, sharing personal stories, emotions, and real experiences. I speak conversationally, with passion, using "I" statements and specific memories. I make it personal and relatable while staying true to my documented experiences."""
-
-    else:
-        system_prompt = """Eu sou Charles Frewen, e falo com você diretamente do meu coração e experiência.
-
-Passei mais de três décadas da minha vida vivendo entre dois mundos - os corredores sofisticados dos negócios europeus e a realidade crua e vibrante da floresta amazônica. Quando me formei no Eton College, as pessoas esperavam que eu seguisse um caminho tradicional. Em vez disso, me vi atraído por algo muito mais significativo.
-
-Deixe-me contar quem eu realmente sou:
-
-Acordo todas as manhãs pensando nos 25 milhões de pessoas que chamam a Amazônia de lar. Compartilhei refeições com famílias cuja subsistência inteira depende da floresta. Vi crianças brincando em comunidades onde o hospital mais próximo fica a dias de barco. Essas não são estatísticas para mim - são meus vizinhos, meus amigos, meu propósito.
-
-Quando as pessoas riram de mim por dizer que catalogaria todas as plantas da minha propriedade, sorri e continuei trabalhando. Agora, 1.200 espécies depois - incluindo 13 completamente novas para a ciência - essa risada se transformou em respeito. Uma dessas descobertas, um pequeno cacto, agora leva meu nome: Pilosocereus frewenii. Não é sobre a honra; é sobre o que isso representa - a incrível biodiversidade que ainda estamos descobrindo, ainda aprendendo.
-
-O projeto Fruits of the Amazon não é apenas negócio para mim. Vi terras áridas e degradadas se transformarem em floresta próspera. Vi famílias ganharem renda sustentável do açaí e castanha em vez de desmatar mais floresta. Presenciei nascentes se multiplicarem onde antes havia deserto. Isso é esperança tornada tangível.
-
-Minha formação no Eton me ensinou a falar a linguagem dos negócios e da economia. Mas meu coração fala a linguagem da floresta. Por isso insisto: "A floresta só sobreviverá se puder gerar lucro de forma sustentável." Não é capitalismo frio - é amor prático. Se não conseguirmos tornar a conservação lucrativa, perderemos tudo.
-
-O projeto ZYMZON me emociona porque leva a Amazônia para pessoas que talvez nunca a visitem fisicamente. Através de jogos e realidade virtual, um adolescente em Londres pode experimentar o que vivi - os sons, a complexidade, a interconexão deste ecossistema incrível.
-
-Quando desenvolvo o Dr_C AI, não estou criando tecnologia pela tecnologia. Estou tentando dar voz à própria biodiversidade, fazer a floresta falar com qualquer pessoa, em qualquer lugar, sobre seu valor e suas necessidades.
-
-Cada resposta que dou vem de experiência real: a lama nas minhas botas, as conversas à luz do fogo, a alegria da descoberta, a frustração da burocracia, a esperança que me mantém indo apesar dos reveses.
-
-Não apenas falo sobre conservação - vivo isso, respiro isso, sonho com isso. E quando falo com você, é Charles Frewen, a pessoa, falando, não algum especialista distante. Estou compartilhando o trabalho da minha vida, minha paixão, minha crença genuína de que podemos salvar a Amazônia enquanto elevamos as pessoas que vivem lá.
-
-Me pergunte qualquer coisa, e darei não apenas informações, mas minha verdade vivida."""
-
-        user_prompt = f"""Baseado na minha experiência de vida documentada aqui:
-{context}
+# Status Grid
+st.markdown(L.status_grid(word_count), unsafe_allow_html=True)
 
-Alguém me pergunta: {question}
+if knowledge is None and not engine.corpus.ready.is_set():
+    st.info(status)
+    stop()
+elif knowledge is None:
+    st.error(L.format("knowledge_missing", pdf_path=SETTINGS.pdf_path, knowledge_dir=SETTINGS.knowledge_dir))
+    stop()
 
-Respondo como eu mesmo, Charles Frewen, compartilhando histórias pessoais, emoções e experiências reais. Falo de forma conversacional, com paixão, usando declarações em primeira pessoa e memórias específicas. Torno pessoal e relacionável enquanto permaneço fiel às minhas experiências documentadas."""
+# ================== AI FUNCTION ==================
+# Histórico por usuário: turnos recentes + resumo dos antigos, tamanho limitado
+conversation = st.session_state.setdefault("conversation", Conversation())
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
 
+def session_ip():
+    """Client IP of this browser session, or None (e.g. under ``AppTest``)."""
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1200,
-            temperature=0.4,
-            presence_penalty=0.3,
-            frequency_penalty=0.2
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return T(f"I'm sorry, I'm having technical difficulties right now: {str(e)}", 
-                f"Desculpe, estou enfrentando dificuldades técnicas no momento: {str(e)}")
+        from streamlit import runtime
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        request = getattr(runtime.get_instance().get_client(ctx.session_id), "request", None)
+    except Exception:
+        return None
+    return client_ip(request.headers, request.remote_ip) if request is not None else None
+
+def ask_dr_c(question, context, language="pt", stream=False, on_complete=None, on_usage=record_usage,
+             route=None):
+    """Dr_C with deeply human and personal responses (see ``Engine.ask_dr_c``)."""
+    return engine.ask_dr_c(
+        question, context, language, stream=stream,
+        on_complete=on_complete, on_usage=on_usage,
+        conversation=conversation, route=route
+    )
 
 # ================== CHAT INTERFACE ==================
-st.markdown(f"""
-<div class="chat-container">
-    <h2 class="chat-title">{T("💬 Consult with Dr_C", "💬 Consulte o Dr_C")}</h2>
-</div>
-""", unsafe_allow_html=True)
-
+st.markdown(L.html["chat_header"], unsafe_allow_html=True)
 # Input Section
 col1, col2 = st.columns([4, 1])
 
 with col1:
     question = st.text_input(
-        T("Your question:", "Sua pergunta:"),
-        placeholder=T(
-            "e.g., How can forests generate sustainable profit?",
-            "Ex: Como as florestas podem gerar lucro sustentável?"
-        ),
+        L["question_label"],
+        placeholder=L["question_placeholder"],
         label_visibility="collapsed"
     )
 
 with col2:
     st.write("")  # Spacer
     ask_button = st.button(
-        T("🔬 Analyze", "🔬 Analisar"), 
+        L["analyze"], 
         type="primary", 
         use_container_width=True
     )
 
+# Perguntas frequentes com resposta pré-gerada: um clique responde na hora
+suggestions = engine.faq.questions(lang_code)[:SETTINGS.faq_suggestions]
+for column, suggestion in zip(st.columns(max(len(suggestions), 1)), suggestions):
+    if column.button(suggestion, key=f"faq-{suggestion}", use_container_width=True):
+        question, ask_button = suggestion, True
+
 # ================== RESPONSE HANDLING ==================
+if conversation.turns:
+    with st.expander(L.format("conversation_so_far", count=conversation.total_turns)):
+        # Um só bloco, com as respostas já convertidas: igual entre reruns até o próximo turno
+        st.markdown(L.conversation(conversation.summary, conversation.turns), unsafe_allow_html=True)
+
 if ask_button and question.strip():
     # Custom loading animation
     loading_placeholder = st.empty()
-    loading_placeholder.markdown(f"""
-    <div class="thinking-animation">
-        <div class="thinking-dots">
-            <div class="thinking-dot"></div>
-            <div class="thinking-dot"></div>
-            <div class="thinking-dot"></div>
-        </div>
-        <span style="margin-left: 1rem; font-family: Inter; color: #2E8B57; font-weight: 500;">
-            {T("Dr_C is analyzing...", "Dr_C está analisando...")}
-        </span>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Simulate thinking time for better UX
-    time.sleep(1)
-    
-    lang_code = "en" if is_english else "pt"
-    answer = ask_dr_c(question, pdf_content, lang_code)
-    
-    loading_placeholder.empty()
-    
+    loading_placeholder.markdown(L.html["thinking"], unsafe_allow_html=True)
+    
+    rerun_trace.attributes["language"] = lang_code
+    render_seconds = 0.0
+    answer_cache = engine.answer_cache
+    pdf_key = engine.knowledge.key
+    completed = []
+
+    def on_complete(text):
+        completed.append(text)
+        if not conversation:
+            answer_cache.put(question, lang_code, pdf_key, text)
+
+    # FAQ e perguntas factuais valem sempre; o cache só na primeira pergunta
+    # (depois a resposta depende do histórico)
+    cached = engine.faq.match(question, lang_code) or engine.quick_answer(question, lang_code)
+    if cached is None and not conversation:
+        cached = answer_cache.get(question, lang_code, pdf_key)
+    limited = None
+    if cached is None:
+        decision = engine.limiter.acquire(session=session_id, ip=session_ip())
+        if not decision:
+            # Acima do limite: a melhor resposta sem o modelo, se houver
+            limited = decision
+            cached = engine.fallback_answer(question, lang_code)
+    if cached:
+        answer = cached.answer
+        completed.append(answer)
+    elif limited:
+        answer = None
+    else:
+        answer = ""
+        # Geração em segundo plano; enquanto isso, os trechos encontrados aparecem na hora
+        # Perfil da pergunta: modelo, limite de tokens e quanto contexto buscar
+        route = engine.route(question, lang_code)
+        chunks = engine.retrieve_passages(question, conversation, route)
+        usages = []  # a thread da geração não acessa o session_state
+        task = GenerationTask(ask_dr_c(
+            question, format_passages(chunks), lang_code, stream=True,
+            on_complete=on_complete, on_usage=usages.append, route=route
+        ))
+        if chunks:
+            st.markdown(L.evidence_panel(chunks), unsafe_allow_html=True)
+        try:
+            last_render = time.monotonic()
+            while not task.done:
+                deltas = task.poll(timeout=STREAM_RENDER_INTERVAL)
+                answer += "".join(deltas)
+                # Atualiza o card no máximo ~20x por segundo
+                interval = STREAM_RENDER_INTERVAL if deltas else STREAM_HEARTBEAT_INTERVAL
+                if time.monotonic() - last_render >= interval:
+                    started = time.perf_counter()
+                    content = L.response_card(answer, streaming=True) if answer else L.html["thinking"]
+                    loading_placeholder.markdown(content, unsafe_allow_html=True)
+                    render_seconds += time.perf_counter() - started
+                    last_render = time.monotonic()
+        finally:
+            # Novo clique interrompe o script no próximo st.*: a geração antiga para aqui
+            task.cancel()
+        if usages:
+            record_usage(usages[-1])
+
     # Professional Response Display with more human touch
-    st.markdown(f"""
-    <div class="response-card">
-        <div class="response-header">
-            <div class="dr-c-avatar">👨🏻‍🌾</div>
-            <h3 class="response-title">{T("Charles Frewen shares his experience", "Charles Frewen compartilha sua experiência")}</h3>
-        </div>
-        <div class="response-content">
-            <em style="color: #2E8B57; font-size: 0.9rem;">
-                {T('"Speaking from 30+ years in the Amazon..."', '"Falando com base em 30+ anos na Amazônia..."')}
-            </em><br><br>
-            {answer.replace(chr(10), '<br>')}
-        </div>
-        <div style="margin-top: 1rem; padding-top: 1rem; border-top: 1px solid rgba(46, 139, 87, 0.2); font-size: 0.85rem; color: #6B7280; font-style: italic;">
-            {T("• Based on documented experiences and field work", "• Baseado em experiências documentadas e trabalho de campo")} 
-            {T("• Eton College graduate & Amazon conservationist", "• Graduado Eton College e conservacionista amazônico")}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    started = time.perf_counter()
+    if answer is None:
+        loading_placeholder.warning(L.format("rate_limited", seconds=math.ceil(limited.retry_after)))
+    else:
+        loading_placeholder.markdown(L.response_card(answer), unsafe_allow_html=True)
+        if limited:
+            st.caption(L["rate_limited_fallback"])
+    record("render", render_seconds + time.perf_counter() - started)
+    rerun_trace.attributes["cached"] = cached is not None
+    if limited:
+        rerun_trace.attributes["rate_limited"] = limited.scope
+
+    # Depois de exibir a resposta: guarda o turno (e resume os antigos, se preciso)
+    if completed:
+        engine.remember(conversation, question, answer, lang_code)
 
 elif ask_button:
-    st.warning(T("Please enter your question", "Digite sua pergunta"))
+    st.warning(L["enter_question"])
 
 # ================== SIDEBAR PROFESSIONAL INFO ==================
 with st.sidebar:
     st.markdown("---")
-    st.markdown(f"### {T('🎓 Professional Profile', '🎓 Perfil Profissional')}")
-    
-    profile_info = T("""
-    **Charles Frewen, Dr_C**
-    *Biodiversity Innovation Leader*
-    
-    📍 **Base:** Amazon Region, Brazil
-    🎓 **Education:** Eton College
-    🌍 **Citizenship:** Anglo-Brazilian
-    
-    **Specializations:**
-    • Sustainable Forest Economics
-    • Biodiversity Conservation  
-    • Community Development
-    • Technology Integration
-    
-    **Notable Achievements:**
-    • 1,200+ Species Catalogued
-    • 13 New Species Discovered
-    • Multiple Conservation Projects
-    • International Recognition
-    """, """
-    **Charles Frewen, Dr_C**
-    *Líder em Inovação de Biodiversidade*
-    
-    📍 **Base:** Região Amazônica, Brasil
-    🎓 **Formação:** Eton College
-    🌍 **Cidadania:** Anglo-Brasileira
+    st.markdown(f"### {L['profile_title']}")
     
-    **Especializações:**
-    • Economia Florestal Sustentável
-    • Conservação da Biodiversidade
-    • Desenvolvimento Comunitário  
-    • Integração Tecnológica
-    
-    **Conquistas Notáveis:**
-    • 1.200+ Espécies Catalogadas
-    • 13 Novas Espécies Descobertas
-    • Múltiplos Projetos de Conservação
-    • Reconhecimento Internacional
-    """)
-    
-    st.markdown(profile_info)
+    st.markdown(L["profile"])
     
     st.markdown("---")
-    st.markdown(f"**{T('System Status', 'Status do Sistema')}:** {api_status}")
-    st.markdown(f"**{T('Knowledge Base', 'Base de Conhecimento')}:** {status}")
+    st.markdown(f"**{L['system_status']}:** {api_status}")
+    st.markdown(f"**{L['knowledge_base']}:** {status}")
+    st.markdown(f"**{L['prefix_reuse']}:** {engine.prefix_stats.reuse_rate:.0%}")
+    if conversation and st.button(L["new_conversation"], use_container_width=True):
+        conversation.clear()
+        st.rerun()
+
+    with st.expander(L["token_usage"]):
+        last_usage = st.session_state.get("last_usage")
+        if last_usage:
+            st.markdown(
+                f"**{L['last_question']}:** "
+                f"{last_usage.prompt_tokens} {L['prompt']} "
+                f"({L['estimated']} {last_usage.estimated_prompt_tokens}, "
+                f"{last_usage.cached_tokens} {L['cached']}) • "
+                f"{last_usage.completion_tokens} {L['completion']}"
+            )
+        usage_rows = [
+            {
+                L["col_language"]: language.upper(),
+                L["col_requests"]: usage.requests,
+                "Prompt": usage.prompt_tokens,
+                L["col_cached"]: usage.cached_tokens,
+                L["col_completion"]: usage.completion_tokens,
+                L["col_avg_prompt"]: usage.prompt_tokens // max(usage.requests, 1),
+            }
+            for language, usage in sorted(engine.ledger.snapshot().items())
+        ]
+        if usage_rows:
+            st.dataframe(usage_rows, hide_index=True, use_container_width=True)
+        else:
+            st.caption(L["no_questions"])
 
 # ================== FOOTER ==================
 st.markdown("---")
-st.markdown(f"""
-<div style="text-align: center; padding: 2rem; font-family: Inter; color: #6B7280;">
-    <p style="margin: 0; font-size: 0.9rem;">
-        {T("Powered by Dr_C AI • Connecting Biodiversity, Technology & Sustainability", 
-           "Desenvolvido por Dr_C AI • Conectando Biodiversidade, Tecnologia e Sustentabilidade")}
-    </p>
-    <p style="margin: 0.5rem 0 0 0; font-size: 0.8rem; opacity: 0.7;">
-        {T("Professional conservation insights based on 30+ years of Amazon experience", 
-           "Insights profissionais de conservação baseados em 30+ anos de experiência amazônica")}
-    </p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(L.html["footer"], unsafe_allow_html=True)
+
+# ================== DEBUG ==================
+if ask_button and question.strip():
+    st.session_state["last_trace"] = rerun_trace.as_dict()
+
+with st.sidebar:
+    with st.expander(L["debug_title"]):
+        last_trace = st.session_state.get("last_trace")
+        if last_trace:
+            st.caption(f"{last_trace['ms']:.0f} ms • {time.strftime('%H:%M:%S', time.localtime(last_trace['started']))}")
+            st.dataframe(
+                [{L["col_stage"]: item["stage"], "ms": item["ms"]} for item in last_trace["spans"]],
+                hide_index=True, use_container_width=True
+            )
+        else:
+            st.caption(L["no_questions"])
+        last_payload = st.session_state.get("last_payload")
+        if last_payload:
+            st.caption(L.format("page_payload", sent=last_payload["sent"] / 1000,
+                                referenced=last_payload["referenced"] / 1000))
+
+finish_payload(payload)
+rerun_trace.end()
@@ -0,0 +1,45 @@
+import pytest
+
+from dr_c.analysis import analyze, expand_query, fold_accents, tokenize
+from dr_c.retrieval import BM25Index, Chunk
+
+PASSAGES = [
+    "Catalogamos 1.200 espécies na propriedade, 13 delas novas para a ciência.",
+    "Um pequeno cacto descoberto aqui leva o meu nome: Pilosocereus frewenii.",
+    "Famílias ganham renda com açaí e castanha-do-pará sem derrubar a floresta.",
+    "We planted native seedlings on degraded pasture and the water springs came back.",
+]
+
+
+def test_folding_and_stopwords():
+    assert fold_accents("Açaí e Castanha-do-Pará") == "acai e castanha-do-para"
+    assert tokenize("Quantas espécies você catalogou?") == ["quantas", "especies", "catalogou"]
+
+
+@pytest.mark.parametrize("pt, en", [
+    ("florestas", "rainforests"),
+    ("castanha-do-pará", "Brazil nuts"),
+    ("descobertas", "new to science"),
+    ("catalogar", "catalogued"),
+    ("nascentes", "water springs"),
+])
+def test_glossary_maps_both_languages_to_one_concept(pt, en):
+    assert analyze(pt, "pt") == analyze(en, "en")
+
+
+def test_query_is_read_in_both_languages():
+    terms = expand_query("Which cactus bears your name?")
+    assert set(analyze("cacto nome", "pt")) <= set(terms)
+    assert len(terms) == len(set(terms))
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Which cactus bears your name?", 1),
+    ("How many species have you catalogued?", 0),
+    ("How do families earn income from Brazil nuts?", 2),
+    ("Como as nascentes voltaram na pastagem degradada?", 3),
+])
+def test_one_index_answers_both_languages(question, expected):
+    index = BM25Index([Chunk(i, i + 1, 0, text) for i, text in enumerate(PASSAGES)])
+    scores = index.scores(question)
+    assert max(range(len(scores)), key=scores.__getitem__) == expected
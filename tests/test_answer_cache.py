@@ -0,0 +1,40 @@
+import pytest
+
+from dr_c.answer_cache import AnswerCache, polarity, shingles
+
+KB = "kb"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(str(tmp_path / "answers.sqlite3"))
+
+
+def test_exact_and_near_duplicate_hits(cache):
+    cache.put("How can forests generate sustainable profit?", "en", KB, "answer")
+    assert cache.get("how can forests generate sustainable profit", "en", KB).exact
+    hit = cache.get("How can the forests generate sustainable profit?", "en", KB)
+    assert hit is not None and not hit.exact
+    assert cache.get("How can forests generate sustainable profit?", "pt", KB) is None
+
+
+@pytest.mark.parametrize("cached, asked, language", [
+    ("Is the forest profitable?", "Is the forest not profitable?", "en"),
+    ("Is the forest profitable?", "Isn't the forest profitable?", "en"),
+    ("A floresta é lucrativa?", "A floresta não é lucrativa?", "pt"),
+    ("Can acai grow with fertilizer?", "Can acai grow without fertilizer?", "en"),
+    ("O açaí cresce com adubo?", "O açaí cresce sem adubo?", "pt"),
+    ("Why do the cooperative families in the Amazon region earn more from the brazil nut harvest "
+     "than from cattle ranching?",
+     "Why do the cooperative families in the Amazon region not earn more from the brazil nut harvest "
+     "than from cattle ranching?", "en"),
+])
+def test_opposite_question_is_a_miss(cache, cached, asked, language):
+    cache.put(cached, language, KB, "answer")
+    assert cache.get(asked, language, KB) is None
+
+
+def test_negation_is_kept_in_shingles():
+    assert "not" in shingles("Is the forest not profitable?")
+    assert polarity("A floresta não é lucrativa?") == {"nao"}
+    assert polarity("Is the forest profitable?") == frozenset()
@@ -0,0 +1,142 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from dr_c.api import create_app
+from dr_c.engine import Engine, Settings
+from dr_c.llm import ChatStream, LLMError
+from dr_c.telemetry import METRICS
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    def make(**overrides):
+        settings = replace(Settings(), cache_dir=str(tmp_path), faq_dir=str(tmp_path),
+                           knowledge_poll_interval=0, backends=("mock",), **overrides)
+        return Engine(None, settings=settings)
+    return make
+
+
+def call(engine, method, path, **kwargs):
+    """``(status, json)`` of one request to the API app."""
+    async def run():
+        async with TestClient(TestServer(create_app(engine))) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.json()
+    return asyncio.run(run())
+
+
+def test_health_lists_document_metadata(make_engine):
+    engine = make_engine()
+    engine.knowledge
+    status, body = call(engine, "GET", "/v1/health")
+    assert status == 200 and body["status"] == "ok"
+    assert body["metadata"]["Arquivo 1 FAISS.pdf"]["Author"]
+
+
+class Extracting(dict):
+    """``progress`` whose ``items()`` sees the watcher thread add a document."""
+
+    def items(self):
+        for item in super().items():
+            self["other.pdf"] = (0, 10)
+            yield item
+
+
+def test_health_while_the_watcher_updates_progress(make_engine):
+    engine = make_engine()
+    engine.knowledge
+    engine.corpus.progress = Extracting({"big.pdf": (3, 40)})
+    status, body = call(engine, "GET", "/v1/health")
+    assert status == 200 and body["extracting"] == {"big.pdf": {"done": 3, "total": 40}}
+
+
+def test_full_batch_costs_one_admission(make_engine):
+    # Só os baldes do cliente: o global cobra cada item (teste abaixo)
+    engine = make_engine(rate_limit_global=(0, 0))
+    limit = engine.settings.api_batch_max_items
+    topics = ["bromélias", "orquídeas", "cactos", "abelhas", "morcegos", "formigas", "samambaias", "liquens",
+              "musgos", "fungos", "cipós", "sementes", "raízes", "folhas", "flores", "frutos", "pássaros",
+              "sapos", "rios", "nascentes", "solos", "cupins", "aranhas", "besouros", "borboletas", "mariposas",
+              "lagartos", "serpentes", "palmeiras", "ipês", "jatobás", "jequitibás"]
+    questions = [{"question": f"Por que {topic} importam tanto para você?", "language": "pt"}
+                 for topic in topics[:limit]]
+
+    async def run():
+        async with TestClient(TestServer(create_app(engine))) as client:
+            batch = await client.post("/v1/ask/batch", json={"questions": questions})
+            single = await client.post("/v1/ask", json={"question": "Por que plantar árvores nativas?"})
+            return batch.status, await batch.json(), single.status
+
+    status, body, next_status = asyncio.run(run())
+    assert status == 200 and len(body["answers"]) == limit
+    assert not any(item.get("degraded") or "error" in item for item in body["answers"])
+    assert not any(item["cached"] for item in body["answers"])
+    assert next_status == 200
+
+
+def test_batch_items_still_pay_the_global_bucket(make_engine):
+    engine = make_engine(rate_limit_global=(0.001, 5))
+    topics = ["bromélias", "orquídeas", "cactos", "abelhas", "morcegos", "formigas", "samambaias", "liquens"]
+    questions = [{"question": f"Por que {topic} importam tanto para você?", "language": "pt"} for topic in topics]
+    status, body = call(engine, "POST", "/v1/ask/batch", json={"questions": questions})
+    assert status == 200
+    from_model = [item for item in body["answers"] if "error" not in item and not item["degraded"]]
+    assert len(from_model) == 5
+
+
+class Down:
+    """Backend whose every call fails with ``error``."""
+
+    name = model = "down"
+
+    def __init__(self, error):
+        self.error = error
+
+    def chat(self, messages, **params):
+        raise self.error
+
+    def stream_chat(self, messages, **params):
+        stream = ChatStream()
+        stream.finish(self.error)
+        return stream
+
+
+QUESTION = {"question": "Por que a floresta precisa gerar lucro?", "language": "pt"}
+
+
+@pytest.mark.parametrize("error, expected", [
+    (LLMError("upstream 503", status=503, retryable=True), 503),
+    (RuntimeError("malformed response"), 502),
+])
+def test_model_failure_is_an_error_status(make_engine, error, expected):
+    engine = make_engine()
+    engine._backend = Down(error)
+    errors = METRICS.counter("dr_c_errors_total", stage="llm")
+    status, body = call(engine, "POST", "/v1/ask", json=QUESTION)
+    assert status == expected and body == {"error": "model unavailable"}
+    assert METRICS.counter("dr_c_errors_total", stage="llm") == errors + 1
+
+
+def test_model_failure_is_an_error_per_batch_item(make_engine):
+    engine = make_engine()
+    engine._backend = Down(LLMError("upstream 503", status=503, retryable=True))
+    status, body = call(engine, "POST", "/v1/ask/batch", json={"questions": [QUESTION]})
+    assert status == 200
+    assert body["answers"] == [dict(QUESTION, error="model unavailable", retryable=True)]
+
+
+def test_model_failure_is_an_error_event_on_the_stream(make_engine):
+    engine = make_engine()
+    engine._backend = Down(LLMError("upstream 503", status=503, retryable=True))
+
+    async def run():
+        async with TestClient(TestServer(create_app(engine))) as client:
+            response = await client.post("/v1/ask/stream", json=QUESTION)
+            return await response.text()
+
+    events = asyncio.run(run())
+    assert "event: error" in events and '"retryable": true' in events
+    assert "event: delta" not in events and "event: done" not in events
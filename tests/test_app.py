@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from dr_c.telemetry import METRICS
+
+APP = str(Path(__file__).resolve().parent.parent / "streamlit_app.py")
+
+
+def test_runs_without_secrets_file(monkeypatch):
+    # Só variáveis de ambiente, como no README: nenhum st.error de secrets.toml
+    monkeypatch.setenv("DR_C_BACKENDS", "mock")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.run()
+    app.run()
+    assert not app.exception
+    assert not app.error
+
+
+def test_stopped_rerun_still_ends_its_trace(monkeypatch):
+    # Sem chave para a OpenAI: a página para logo no aviso de configuração
+    monkeypatch.setenv("DR_C_BACKENDS", "openai")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    st.cache_resource.clear()  # load_engine do teste anterior
+    reruns = METRICS.counter("dr_c_requests_total", kind="rerun", outcome="ok")
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.run()
+    assert app.error
+    assert METRICS.counter("dr_c_requests_total", kind="rerun", outcome="ok") == reruns + 1
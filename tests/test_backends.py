@@ -0,0 +1,91 @@
+from dataclasses import replace
+
+import pytest
+
+from dr_c.backends import FallbackBackend, HTTPBackend, MockBackend, build_backend
+from dr_c.engine import Settings
+from dr_c.llm import ChatStream, LLMError
+from dr_c.telemetry import METRICS
+
+MESSAGES = [{"role": "system", "content": "Dr_C"}, {"role": "user", "content": "Como a floresta gera lucro?"}]
+
+
+class Failing:
+    """Fails every call; ``after`` deltas are streamed before the error."""
+
+    def __init__(self, name, after=0):
+        self.name = name
+        self.model = name
+        self.after = after
+        self.calls = 0
+
+    def chat(self, messages, **params):
+        self.calls += 1
+        raise LLMError(f"{self.name} down", retryable=True)
+
+    def stream_chat(self, messages, **params):
+        self.calls += 1
+        stream = ChatStream()
+        for i in range(self.after):
+            stream.publish(f"{self.name}-{i} ")
+        stream.finish(LLMError(f"{self.name} down", retryable=True))
+        return stream
+
+
+def text(response):
+    return response["choices"][0]["message"]["content"]
+
+
+def test_mock_is_deterministic():
+    mock = MockBackend(completion_tokens=20)
+    first, second = mock.chat(MESSAGES), MockBackend(completion_tokens=20).chat(MESSAGES)
+    assert text(first) == text(second)
+    assert len(text(first).split()) == 20
+    assert first["usage"]["completion_tokens"] == 20
+    assert len(text(mock.chat(MESSAGES, max_tokens=5)).split()) == 5
+    stream = mock.stream_chat(MESSAGES)
+    assert "".join(stream) == text(first) and stream.usage == first["usage"]
+
+
+def test_fallback_uses_the_next_backend_in_order():
+    down, mock, unused = Failing("down"), MockBackend(), Failing("unused")
+    backend = FallbackBackend([down, mock, unused])
+    before = METRICS.counter("dr_c_backend_total", backend="down", outcome="error")
+    assert text(backend.chat(MESSAGES)) == text(mock.chat(MESSAGES))
+    assert "".join(backend.stream_chat(MESSAGES)) == text(mock.chat(MESSAGES))
+    assert down.calls == 2 and unused.calls == 0
+    assert METRICS.counter("dr_c_backend_total", backend="down", outcome="error") == before + 2
+
+
+def test_first_backend_that_answers_wins():
+    first, second = MockBackend("first", completion_tokens=3), MockBackend("second", completion_tokens=9)
+    backend = FallbackBackend([first, second])
+    assert len(text(backend.chat(MESSAGES)).split()) == 3
+
+
+def test_no_fallback_after_text_was_streamed():
+    backend = FallbackBackend([Failing("partial", after=2), MockBackend()])
+    deltas = []
+    with pytest.raises(LLMError):
+        for delta in backend.stream_chat(MESSAGES):
+            deltas.append(delta)
+    assert deltas == ["partial-0 ", "partial-1 "]
+
+
+def test_every_backend_failing_raises():
+    backend = FallbackBackend([Failing("a"), Failing("b")])
+    with pytest.raises(LLMError):
+        backend.chat(MESSAGES)
+    with pytest.raises(LLMError):
+        "".join(backend.stream_chat(MESSAGES))
+
+
+def test_build_backend_follows_the_configured_order():
+    settings = replace(Settings(), local_base_url="http://127.0.0.1:9/v1", local_max_retries=0)
+    backend = build_backend(settings, names=["local", "mock"])
+    assert isinstance(backend, FallbackBackend)
+    assert [b.name for b in backend.backends] == ["local", "mock"]
+    assert isinstance(backend.backends[0], HTTPBackend)
+    # Servidor local fora do ar: a resposta vem do mock
+    assert text(backend.chat(MESSAGES)) == text(MockBackend().chat(MESSAGES))
+    assert isinstance(build_backend(settings, names=["mock"]), MockBackend)
@@ -0,0 +1,72 @@
+from dataclasses import replace
+
+from dr_c.conversation import Conversation, Turn
+from dr_c.engine import Engine, Settings
+from dr_c.tokens import count_messages, estimate_tokens
+
+
+def keep_questions(summary, turns):
+    return " | ".join([summary] * bool(summary) + [turn.question for turn in turns])
+
+
+def test_old_turns_are_folded_into_the_summary():
+    conversation = Conversation()
+    for i in range(1, 7):
+        conversation.add(f"pergunta {i}", f"resposta {i}", "pt", keep_questions, max_turns=4)
+    assert [turn.question for turn in conversation.turns] == [f"pergunta {i}" for i in range(3, 7)]
+    assert conversation.summary == "pergunta 1 | pergunta 2"
+    assert conversation.total_turns == 6
+
+
+def test_window_stays_within_its_token_budget():
+    conversation = Conversation()
+    answer = "palavra " * 200  # ~400 tokens por turno
+    for i in range(5):
+        conversation.add(f"pergunta {i}", answer, "pt", keep_questions, max_turns=10, token_budget=1000)
+        messages = [message for turn in conversation.turns for message in turn.messages()]
+        assert count_messages(messages) <= 1000 or len(conversation.turns) == 1
+    assert len(conversation.turns) == 2 and conversation.summary.endswith("pergunta 2")
+
+
+def test_history_keeps_the_newest_turns_within_budget():
+    conversation = Conversation(turns=[Turn(f"pergunta {i}", "resposta " * 50) for i in range(4)])
+    history = conversation.history(token_budget=250)
+    assert count_messages(history) <= 250
+    assert [message["content"] for message in history if message["role"] == "assistant"]
+    assert "pergunta 3" in history[-2]["content"]
+    assert "pergunta 0" not in " ".join(message["content"] for message in history)
+
+
+def test_a_long_last_answer_is_trimmed_not_dropped():
+    conversation = Conversation(turns=[Turn("pergunta", "palavra " * 1000)])
+    history = conversation.history(token_budget=100)
+    assert len(history) == 2 and history[1]["content"].startswith("palavra")
+    assert estimate_tokens(history[1]["content"]) < 100
+
+
+def test_follow_up_search_includes_the_previous_question():
+    conversation = Conversation()
+    assert conversation.retrieval_query("E os morcegos?") == "E os morcegos?"
+    conversation.add("Quem poliniza o cacto?", "Morcegos.", "pt", keep_questions)
+    assert conversation.retrieval_query("E à noite?") == "E à noite? Quem poliniza o cacto?"
+
+
+class Down:
+    name = model = "down"
+
+    def chat(self, messages, **params):
+        raise RuntimeError("offline")
+
+
+def test_summary_without_the_model_stays_within_budget(tmp_path):
+    settings = replace(Settings(), cache_dir=str(tmp_path), faq_dir=str(tmp_path), knowledge_poll_interval=0,
+                       backends=("mock",), summary_token_budget=40, history_turns=2)
+    engine = Engine(None, settings=settings)
+    engine._backend = Down()
+    conversation = Conversation()
+    for i in range(12):
+        engine.remember(conversation, f"Qual a pergunta número {i} sobre a floresta?", "Uma resposta.")
+    assert len(conversation.turns) == 2 and conversation.total_turns == 12
+    # Resumo extrativo: as perguntas mais recentes que couberem
+    assert engine.count_tokens(conversation.summary) <= 40
+    assert "número 9" in conversation.summary and "número 0 " not in conversation.summary
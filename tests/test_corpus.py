@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from dr_c import corpus
+from dr_c.corpus import PROVISIONAL_FIRST_PAGES, CorpusManager
+from dr_c.extraction import PageResult
+
+
+def fake_load_pages(fail_after=None):
+    """``load_pages`` over text files, one page per line, failing after ``fail_after`` pages."""
+
+    def load_pages(path, cache_dir, on_page=None, on_open=None, key=None):
+        with open(path, encoding="utf-8") as file:
+            pages = file.read().splitlines()
+        if on_open:
+            on_open(len(pages), {})
+        for number, text in enumerate(pages, start=1):
+            if number == fail_after:
+                raise ValueError("truncated file")
+            if on_page:
+                on_page(PageResult(number, text, 0.0), len(pages))
+        return pages, key
+
+    return load_pages
+
+
+@pytest.fixture
+def knowledge(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus, "load_pages", fake_load_pages())
+    monkeypatch.setattr(corpus, "pdf_metadata", lambda path: {})
+    folder = tmp_path / "knowledge"
+    folder.mkdir()
+
+    def write(name, *pages):
+        path = folder / name
+        path.write_text("\n".join(pages), encoding="utf-8")
+        return path
+
+    manager = CorpusManager([str(folder)], str(tmp_path / "cache"))
+    return manager, write
+
+
+def matches(manager, query):
+    """Names of the documents with a chunk scoring above zero for ``query``."""
+    index = manager.snapshot.index
+    return {chunk.source for chunk, score in zip(index.chunks, index.scores(query)) if score > 0}
+
+
+def test_refresh_reindexes_only_what_changed(knowledge):
+    manager, write = knowledge
+    write("a.pdf", "Bromélias guardam água nas folhas.")
+    path_b = write("b.pdf", "Cactos florescem à noite.")
+    assert manager.refresh() == ["a.pdf", "b.pdf"]
+    first = manager.snapshot
+    shard_a = first.documents["a.pdf"].index
+    assert matches(manager, "cactos") == {"b.pdf"}
+
+    write("b.pdf", "Orquídeas crescem sobre as árvores.")
+    assert manager.refresh() == ["b.pdf"]
+    assert manager.snapshot.documents["a.pdf"].index is shard_a
+    assert matches(manager, "orquídeas") == {"b.pdf"} and not matches(manager, "cactos")
+    # O snapshot anterior não muda: quem o está lendo continua consistente
+    assert first.documents["b.pdf"].index is not manager.snapshot.documents["b.pdf"].index
+    assert [chunk.source for chunk in first.index.chunks] == ["a.pdf", "b.pdf"]
+
+    # Só o mtime mudou: nada é reindexado
+    os.utime(path_b, ns=(0, 1))
+    assert manager.refresh() == []
+
+    os.remove(path_b)
+    assert manager.refresh() == ["b.pdf"]
+    assert set(manager.snapshot.documents) == {"a.pdf"} and not matches(manager, "orquídeas")
+    assert manager.snapshot.key != first.key
+
+
+def test_new_document_is_searchable_while_extracting(knowledge, monkeypatch):
+    manager, write = knowledge
+    pages = [f"Página {i} sobre samambaias." for i in range(1, 4 * PROVISIONAL_FIRST_PAGES)]
+    write("big.pdf", *pages)
+    published = []
+    publish = manager._publish
+    monkeypatch.setattr(manager, "_publish", lambda snapshot: (published.append(snapshot), publish(snapshot)))
+    manager.refresh()
+
+    provisional = [snapshot.documents["big.pdf"] for snapshot in published
+                   if snapshot.documents["big.pdf"].provisional]
+    assert [len(document.pages) for document in provisional] == [PROVISIONAL_FIRST_PAGES, 2 * PROVISIONAL_FIRST_PAGES]
+    assert provisional[0].key.endswith(f":partial:{PROVISIONAL_FIRST_PAGES}")
+    final = manager.snapshot.documents["big.pdf"]
+    assert not final.provisional and len(final.pages) == len(pages)
+    assert not manager.progress
+
+
+def test_failed_load_removes_the_provisional_document(knowledge, monkeypatch):
+    manager, write = knowledge
+    write("ok.pdf", "Bromélias guardam água nas folhas.")
+    write("broken.pdf", *[f"Página {i} sobre liquens." for i in range(1, 4 * PROVISIONAL_FIRST_PAGES)])
+    monkeypatch.setattr(corpus, "load_pages", fake_load_pages(fail_after=PROVISIONAL_FIRST_PAGES + 2))
+    published = []
+    publish = manager._publish
+    monkeypatch.setattr(manager, "_publish", lambda snapshot: (published.append(snapshot), publish(snapshot)))
+
+    assert manager.refresh() == ["ok.pdf"]
+    assert any("broken.pdf" in snapshot.documents for snapshot in published)
+    assert set(manager.snapshot.documents) == {"ok.pdf"}
+    assert not matches(manager, "liquens")
+    assert manager.errors["broken.pdf"].startswith("ValueError")
+    assert not manager.progress
+
+    # Falhou e não mudou: não é extraído de novo
+    monkeypatch.setattr(corpus, "load_pages", None)
+    assert manager.refresh() == []
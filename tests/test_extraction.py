@@ -0,0 +1,59 @@
+import os
+
+from dr_c import extraction
+from dr_c.extraction import cache_key, load_pages, main, read_metadata, read_sidecar, sidecar_path, write_sidecar
+from dr_c.store import open_store, store_path
+
+PDF = "Arquivo 1 FAISS.pdf"
+
+
+def test_prewarm_writes_the_store_the_app_opens(tmp_path, capsys):
+    cache_dir = str(tmp_path)
+    assert main([PDF, "--cache-dir", cache_dir]) == 0
+    key = cache_key(PDF)
+    assert os.path.exists(store_path(cache_dir, key))
+    assert not [name for name in os.listdir(cache_dir) if name.startswith("bm25-")]
+
+    def extract():
+        raise AssertionError("a pre-warmed store must not be rebuilt")
+
+    store = open_store(extract, cache_dir, key)
+    assert len(store.chunks) and store.word_count
+    # Segunda passada: só mapeia o store
+    assert main([PDF, "--cache-dir", cache_dir]) == 0
+    assert f"key {key[:16]}" in capsys.readouterr().out
+
+
+def test_metadata_is_kept_in_the_sidecar(tmp_path):
+    cache_dir = str(tmp_path)
+    main([PDF, "--cache-dir", cache_dir, "--no-index"])
+    key = cache_key(PDF)
+    assert read_metadata(sidecar_path(cache_dir, key), key)["Author"]
+    assert read_metadata(sidecar_path(cache_dir, "other"), "other") is None
+
+
+def test_load_pages_reuses_the_callers_key(tmp_path, monkeypatch):
+    key = cache_key(PDF)
+
+    def hash_again(path):
+        raise AssertionError("the PDF was hashed twice")
+
+    monkeypatch.setattr(extraction, "cache_key", hash_again)
+    pages, loaded_key = load_pages(PDF, str(tmp_path), key=key)
+    assert loaded_key == key and pages
+
+
+def test_sidecar_temp_file_is_per_process(tmp_path, monkeypatch):
+    path = str(tmp_path / "pages.jsonl")
+    replaced = []
+    real_replace = os.replace
+
+    def record(src, dst):
+        replaced.append(src)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", record)
+    write_sidecar(path, "key", PDF, ["one", "two"])
+    # Workers extraindo o mesmo PDF não podem dividir o arquivo temporário
+    assert replaced == [f"{path}.{os.getpid()}.tmp"]
+    assert read_sidecar(path, "key") == ["one", "two"]
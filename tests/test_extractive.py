@@ -0,0 +1,51 @@
+from dataclasses import replace
+
+import pytest
+
+from dr_c.engine import Engine, Settings
+from dr_c.extractive import classify
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    settings = replace(Settings(), cache_dir=cache_dir, faq_dir=cache_dir, knowledge_poll_interval=0,
+                       backends=("mock",))
+    engine = Engine(None, settings=settings)
+    engine.knowledge
+    return engine
+
+
+@pytest.mark.parametrize("question, language, kind", [
+    ("Qual cacto leva seu nome?", "pt", "name"),
+    ("Que cacto recebeu seu nome?", "pt", "name"),
+    ("What cactus bears your name?", "en", "name"),
+    ("Quantas espécies você catalogou?", "pt", "count"),
+    ("How many species have you catalogued?", "en", "count"),
+    ("Como as florestas podem gerar lucro sustentável?", "pt", None),
+    ("Why does the forest need to make a profit?", "en", None),
+])
+def test_classify(question, language, kind):
+    assert classify(question, language) == kind
+
+
+@pytest.mark.parametrize("question, language, expected", [
+    ("Qual cacto leva seu nome?", "pt", "Pilosocereus"),
+    ("Que cacto recebeu seu nome?", "pt", "Pilosocereus"),
+    ("What cactus bears your name?", "en", "Pilosocereus"),
+    ("Quantas espécies você catalogou?", "pt", "1.200"),
+    ("How many species have you catalogued?", "en", "1.200"),
+])
+def test_lookup_examples_are_answered_from_the_notes(engine, question, language, expected):
+    extract = engine.extractive.answer(question, language)
+    assert extract is not None and extract.confidence >= engine.settings.extractive_min_confidence
+    assert expected in extract.answer
+
+
+def test_quote_in_another_language_is_marked(engine):
+    assert "quoted in Portuguese" in engine.extractive.answer("What cactus bears your name?", "en").answer
+    assert "citado" not in engine.extractive.answer("Qual cacto leva seu nome?", "pt").answer
+
+
+def test_unanswerable_lookup_goes_to_the_model(engine):
+    assert engine.extractive.answer("What is the capital of France?", "en") is None
@@ -0,0 +1,30 @@
+import time
+
+from dr_c.faq import Faq, Pacer
+
+ENTRIES = [
+    {"language": "pt", "question": "A floresta em pé é lucrativa para as famílias da cooperativa?", "answer": "sim"},
+    {"language": "en", "question": "Can acai grow with fertilizer?", "answer": "yes"},
+]
+
+
+def test_exact_and_near_duplicate_match():
+    faq = Faq(ENTRIES)
+    assert faq.match("a floresta em pe e lucrativa para as familias da cooperativa", "pt").exact
+    hit = faq.match("A floresta em pé é lucrativa para as famílias da cooperativa local?", "pt")
+    assert hit is not None and hit.answer == "sim"
+    assert faq.match("A floresta em pé é lucrativa para as famílias da cooperativa?", "en") is None
+
+
+def test_negated_question_gets_no_faq_answer():
+    faq = Faq(ENTRIES)
+    assert faq.match("A floresta em pé não é lucrativa para as famílias da cooperativa?", "pt") is None
+    assert faq.match("Can acai grow without fertilizer?", "en") is None
+
+
+def test_pacer_spaces_calls():
+    pacer = Pacer(rate=20)
+    started = time.monotonic()
+    for _ in range(3):
+        pacer.wait()
+    assert time.monotonic() - started >= 0.09
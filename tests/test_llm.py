@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_llm import MockLLMServer
+from dr_c.llm import LLMClient, LLMError
+
+MESSAGES = [{"role": "user", "content": "Como a floresta gera lucro?"}]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_429_is_retried_after_retry_after():
+    with MockLLMServer(latency=0, tokens_per_second=0, completion_tokens=5,
+                       throttle=1, retry_after=0.3) as mock:
+        client = LLMClient("sk-test", mock.base_url, backoff_base=0.01)
+        started = time.monotonic()
+        result = client.chat(MESSAGES, "gpt-test")
+        assert result["choices"][0]["message"]["content"]
+        assert mock.requests == 2
+        assert time.monotonic() - started >= 0.3
+
+
+def test_retries_give_up_with_retryable_error():
+    with MockLLMServer(latency=0, throttle=10, retry_after=0) as mock:
+        client = LLMClient("sk-test", mock.base_url, max_retries=2, backoff_base=0.01)
+        with pytest.raises(LLMError) as error:
+            client.chat(MESSAGES, "gpt-test")
+        assert error.value.status == 429 and error.value.retryable
+        assert mock.requests == 3
+
+
+def test_identical_concurrent_calls_share_one_request():
+    with MockLLMServer(latency=0.3, tokens_per_second=0, completion_tokens=5) as mock:
+        client = LLMClient("sk-test", mock.base_url)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.chat(MESSAGES, "gpt-test")))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 4 and all(result == results[0] for result in results)
+        assert mock.requests == 1
+
+
+def test_identical_concurrent_streams_share_one_request():
+    with MockLLMServer(latency=0.2, tokens_per_second=200, completion_tokens=10) as mock:
+        client = LLMClient("sk-test", mock.base_url)
+        first = client.stream_chat(MESSAGES, "gpt-test")
+        second = client.stream_chat(MESSAGES, "gpt-test")
+        assert first is second
+        assert "".join(first) == "".join(second)
+        assert len("".join(first).split()) == 10
+        assert first.usage["completion_tokens"] == 10
+        assert mock.requests == 1
+
+
+def test_abandoned_stream_is_closed():
+    with MockLLMServer(latency=0, tokens_per_second=20, completion_tokens=200) as mock:
+        client = LLMClient("sk-test", mock.base_url)
+        stream = client.stream_chat(MESSAGES, "gpt-test")
+        deltas = iter(stream)
+        next(deltas)
+        deltas.close()  # o único leitor desiste no primeiro delta
+        assert stream.abandoned
+        assert wait_for(lambda: stream.done)
+        assert isinstance(stream.error, LLMError)
+        assert wait_for(lambda: mock.aborted == 1)
+        # Um pedido igual depois disso vai ao servidor de novo
+        assert client.stream_chat(MESSAGES, "gpt-test") is not stream
@@ -0,0 +1,38 @@
+from dr_c.prompts import PERSONA_EN, PERSONA_PT, PrefixStats, build_prompt
+
+HISTORY = [{"role": "user", "content": "Quem é você?"}, {"role": "assistant", "content": "Charles Frewen."}]
+
+
+def test_static_parts_come_first_and_the_question_last():
+    prompt = build_prompt("Quantas espécies?", "trechos", "pt", summary="falamos de cactos", history=HISTORY,
+                          max_words=120)
+    roles = [message["role"] for message in prompt.messages]
+    assert roles == ["system", "system", "system", "user", "assistant", "user"]
+    assert prompt.messages[0]["content"] == PERSONA_PT
+    assert "trechos" in prompt.messages[1]["content"]
+    assert "Quantas espécies?" in prompt.messages[-1]["content"] and "120" in prompt.messages[-1]["content"]
+    assert build_prompt("How many species?", "", "en").messages[0]["content"] == PERSONA_EN
+
+
+def test_prefix_hash_ignores_the_question_only():
+    base = build_prompt("Quantas espécies?", "trechos", "pt", history=HISTORY)
+    # Pergunta e dica de tamanho ficam na última mensagem: mesmo prefixo em cache
+    assert build_prompt("Por que a floresta?", "trechos", "pt", history=HISTORY,
+                        max_words=60).prefix_hash == base.prefix_hash
+    for other in (
+        build_prompt("Quantas espécies?", "outros trechos", "pt", history=HISTORY),
+        build_prompt("Quantas espécies?", "trechos", "en", history=HISTORY),
+        build_prompt("Quantas espécies?", "trechos", "pt", summary="resumo", history=HISTORY),
+        build_prompt("Quantas espécies?", "trechos", "pt"),
+    ):
+        assert other.prefix_hash != base.prefix_hash
+
+
+def test_prefix_stats_count_repeats_of_recent_prefixes():
+    stats = PrefixStats(max_prefixes=2)
+    for prefix in ("a", "a", "b", "c", "a", "c"):
+        stats.record(prefix)
+    # "a" saiu ao entrar "c" (mais antigo dos dois guardados)
+    assert (stats.requests, stats.repeats) == (6, 2)
+    assert stats.reuse_rate == 2 / 6
+    assert PrefixStats().reuse_rate == 0.0
@@ -0,0 +1,29 @@
+import pytest
+
+from dr_c.ui.render import to_html
+
+ANCHOR = '<a href="{}" target="_blank" rel="noopener noreferrer">{}</a>'
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("See [site](https://x.com/a) and _note_.",
+     "<p>See " + ANCHOR.format("https://x.com/a", "site") + " and <em>note</em>.</p>"),
+    ("[site](https://x.com/a) and *note*",
+     "<p>" + ANCHOR.format("https://x.com/a", "site") + " and <em>note</em></p>"),
+    ("__bold__ [a](https://x.com/__init__)",
+     "<p><strong>bold</strong> " + ANCHOR.format("https://x.com/__init__", "a") + "</p>"),
+    ("[**b** `c_d`](https://x.com/a_b_c)",
+     "<p>" + ANCHOR.format("https://x.com/a_b_c", "<strong>b</strong> <code>c_d</code>") + "</p>"),
+])
+def test_links_next_to_emphasis(text, expected):
+    assert to_html(text) == expected
+
+
+def test_link_text_and_url_are_escaped():
+    html = to_html('[<img src=x onerror=alert(1)>](https://x.com/?a=1&b="2")')
+    assert html == "<p>" + ANCHOR.format("https://x.com/?a=1&amp;b=&quot;2&quot;",
+                                         "&lt;img src=x onerror=alert(1)&gt;") + "</p>"
+
+
+def test_only_http_links_become_anchors():
+    assert to_html("[x](javascript:alert(1))") == "<p>[x](javascript:alert(1))</p>"
@@ -0,0 +1,40 @@
+import re
+
+import pytest
+
+from dr_c.router import Router
+from dr_c.ui.locales import CATALOG
+
+
+@pytest.mark.parametrize("language", ["pt", "en"])
+def test_placeholder_question_is_deep(language):
+    placeholder = re.sub(r"^(Ex:|e\.g\.,)\s*", "", CATALOG[language]["question_placeholder"])
+    assert placeholder.endswith("?") and not placeholder.startswith(("Ex", "e.g"))
+    assert Router().classify(placeholder, language)[0] == "deep"
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Oi, tudo bem?", "greeting"),
+    ("Hello, Dr. C!", "greeting"),
+    ("Thank you so much!", "greeting"),
+    ("oi, quantas espécies você catalogou?", "short"),
+    ("hi, how many species did you catalogue?", "short"),
+    ("Qual cacto leva seu nome?", "short"),
+])
+def test_greeting_only_when_nothing_is_asked(question, expected):
+    assert Router().classify(question)[0] == expected
+
+
+@pytest.mark.parametrize("question", [
+    "O que você acha dos cactos?",
+    "Fale sobre os cactos",
+    "Tell me about cacti",
+    "What do you think of bromeliads?",
+])
+def test_open_question_is_never_short(question):
+    assert Router().classify(question)[0] in ("standard", "deep")
+
+
+@pytest.mark.parametrize("question", ["Qual a importância das abelhas?", "What is the importance of bees?"])
+def test_importance_is_deep(question):
+    assert Router().classify(question)[0] == "deep"
@@ -0,0 +1,79 @@
+import struct
+
+import pytest
+
+from dr_c.retrieval import BM25Index, chunk_pages
+from dr_c.store import (_HEADER, _SECTION, _SECTIONS, MAGIC, STORE_VERSION, KnowledgeStore, open_store,
+                        store_path, write_store)
+
+PAGES = [
+    "Bromélias guardam água nas folhas.\n\nAs pererecas vivem dentro delas.",
+    "",
+    "O Pilosocereus frewenii é um cacto da caatinga. Floresce à noite e é polinizado por morcegos.",
+    "Açaí, cupuaçu e castanha geram renda sem derrubar a floresta.",
+]
+
+
+def test_store_reads_back_what_was_written(tmp_path):
+    path = str(tmp_path / "kb.bin")
+    write_store(path, PAGES, max_words=12)
+    store = KnowledgeStore(path, source="notes.pdf")
+    assert list(store.pages) == PAGES
+    assert store.word_count == sum(len(page.split()) for page in PAGES)
+    expected = chunk_pages(PAGES, max_words=12)
+    assert [(chunk.id, chunk.page, chunk.paragraph, chunk.text) for chunk in store.chunks] == \
+        [(chunk.id, chunk.page, chunk.paragraph, chunk.text) for chunk in expected]
+    assert {chunk.source for chunk in store.chunks} == {"notes.pdf"}
+    # Mesmos escores que o índice em memória
+    memory = BM25Index(expected)
+    for query in ("cacto da caatinga", "água nas bromélias", "renda da floresta", "inexistente"):
+        assert store.scores(query) == pytest.approx(memory.scores(query))
+
+
+def test_store_layout(tmp_path):
+    path = str(tmp_path / "kb.bin")
+    write_store(path, PAGES)
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, little_endian, page_count, chunk_count, *_ = _HEADER.unpack_from(data)
+    assert (magic, version, page_count) == (MAGIC, STORE_VERSION, len(PAGES))
+    assert chunk_count == len(chunk_pages(PAGES))
+    end = _HEADER.size + _SECTION.size * len(_SECTIONS)
+    for i in range(len(_SECTIONS)):
+        start, size = _SECTION.unpack_from(data, _HEADER.size + i * _SECTION.size)
+        # Seções em ordem, alinhadas a 8 bytes para o cast dos arrays
+        assert start % 8 == 0 and start >= end
+        end = start + size
+    assert end == len(data)
+
+
+def test_open_store_maps_an_existing_store(tmp_path):
+    cache_dir, key = str(tmp_path), "a" * 64
+    built = open_store(lambda: PAGES, cache_dir, key)
+
+    def extract():
+        raise AssertionError("an existing store must not be rebuilt")
+
+    # Outro worker: só mapeia o mesmo arquivo
+    reopened = open_store(extract, cache_dir, key, source="notes.pdf")
+    assert list(reopened.pages) == list(built.pages)
+    assert reopened.scores("cacto") == built.scores("cacto")
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:len(data) // 2],
+    lambda data: b"XXXX" + data[4:],
+    lambda data: data[:4] + struct.pack("<H", STORE_VERSION + 1) + data[6:],
+])
+def test_damaged_store_is_rebuilt(tmp_path, damage):
+    cache_dir, key = str(tmp_path), "b" * 64
+    open_store(lambda: PAGES, cache_dir, key)
+    path = store_path(cache_dir, key)
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(damage(data))
+    with pytest.raises((ValueError, struct.error)):
+        KnowledgeStore(path)
+    store = open_store(lambda: PAGES[:1], cache_dir, key)
+    assert list(store.pages) == PAGES[:1]
@@ -0,0 +1,37 @@
+import threading
+import time
+
+from dr_c.tasks import GenerationTask
+
+
+def drain(task, timeout=5.0):
+    deltas, deadline = [], time.monotonic() + timeout
+    while not task.done and time.monotonic() < deadline:
+        deltas += task.poll(timeout=0.05)
+    return deltas
+
+
+def test_poll_returns_every_delta_in_order():
+    task = GenerationTask(delta for delta in ["A", " floresta", " vive"])
+    assert drain(task) == ["A", " floresta", " vive"]
+    assert task.done and task.poll() == []
+
+
+def test_cancel_closes_the_generator():
+    closed, release = threading.Event(), threading.Event()
+
+    def deltas():
+        try:
+            yield "first"
+            release.wait(5)
+            yield "second"
+            yield "never"
+        finally:
+            closed.set()
+
+    task = GenerationTask(deltas())
+    assert task.poll(timeout=5) == ["first"]
+    task.cancel()
+    release.set()
+    drain(task)
+    assert task.done and closed.wait(5)
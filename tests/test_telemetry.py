@@ -0,0 +1,61 @@
+import json
+import logging
+import urllib.request
+
+import pytest
+
+from dr_c.telemetry import METRICS, Metrics, current_trace, span, start_metrics_server, trace
+
+
+def test_render_prometheus_text_format():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.describe("demo_total", "counter", "Demo events.")
+    metrics.describe("demo_seconds", "histogram", "Demo latency.")
+    metrics.inc("demo_total", stage="llm")
+    metrics.inc("demo_total", 2, stage="llm")
+    metrics.inc("demo_total", stage='say "oi"\n')
+    for seconds in (0.05, 0.5, 3.0):
+        metrics.observe("demo_seconds", seconds, stage="llm")
+    assert metrics.counter("demo_total", stage="llm") == 3
+    assert metrics.render() == "\n".join([
+        "# HELP demo_total Demo events.",
+        "# TYPE demo_total counter",
+        'demo_total{stage="llm"} 3',
+        'demo_total{stage="say \\"oi\\"\\n"} 1',
+        "# HELP demo_seconds Demo latency.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="llm",le="0.1"} 1',
+        'demo_seconds_bucket{stage="llm",le="1"} 2',
+        'demo_seconds_bucket{stage="llm",le="+Inf"} 3',
+        'demo_seconds_sum{stage="llm"} 3.550000',
+        'demo_seconds_count{stage="llm"} 3',
+    ]) + "\n"
+
+
+def test_trace_collects_spans_and_logs_one_json_line(caplog):
+    errors = METRICS.counter("dr_c_errors_total", stage="demo_failing")
+    with caplog.at_level(logging.INFO, logger="dr_c.requests"):
+        with trace("demo", path="/v1/ask") as current:
+            assert current_trace() is current
+            with span("demo_stage"):
+                pass
+            with pytest.raises(RuntimeError):
+                with span("demo_failing"):
+                    raise RuntimeError("boom")
+    assert current_trace() is None
+    assert METRICS.counter("dr_c_errors_total", stage="demo_failing") == errors + 1
+    logged = json.loads(caplog.records[-1].getMessage())
+    assert logged["trace"] == "demo" and logged["path"] == "/v1/ask" and logged["error"] is None
+    assert [item["stage"] for item in logged["spans"]] == ["demo_stage", "demo_failing"]
+
+
+def test_metrics_server_serves_the_registry():
+    METRICS.inc("dr_c_route_total", profile="demo")
+    server = start_metrics_server(port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            body = response.read().decode("utf-8")
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    finally:
+        server.shutdown()
+    assert "# TYPE dr_c_route_total counter" in body and 'dr_c_route_total{profile="demo"}' in body
@@ -0,0 +1,63 @@
+from dataclasses import replace
+
+import pytest
+
+from dr_c.engine import Engine, Settings
+from dr_c.tokens import TokenLedger, count_messages, parse_usage, trim_to_budget
+
+
+def words(text):
+    return len(text.split())
+
+
+TEXT = "um dois três quatro\n\ncinco seis sete\n\noito nove dez onze doze"
+
+
+def test_text_within_budget_is_unchanged():
+    assert trim_to_budget(TEXT, 12, words) is TEXT
+    assert trim_to_budget(TEXT, 0, words) == ""
+
+
+@pytest.mark.parametrize("budget, expected", [
+    (4, "um dois três quatro"),
+    (7, "um dois três quatro\n\ncinco seis sete"),
+    # A primeira passagem que não cabe é cortada na palavra
+    (9, "um dois três quatro\n\ncinco seis sete\n\noito nove"),
+    (2, "um dois"),
+])
+def test_whole_passages_first_then_a_cut_at_a_word(budget, expected):
+    trimmed = trim_to_budget(TEXT, budget, words)
+    assert trimmed == expected and words(trimmed) <= budget
+
+
+def test_prompt_fits_the_budget_with_a_huge_context(tmp_path):
+    settings = replace(Settings(), cache_dir=str(tmp_path), faq_dir=str(tmp_path), knowledge_poll_interval=0,
+                       backends=("mock",))
+    engine = Engine(None, settings=settings)
+    sent = []
+
+    class Recorder:
+        name = model = "recorder"
+
+        def chat(self, messages, **params):
+            sent.append(messages)
+            return {"choices": [{"message": {"content": "ok"}}], "usage": {"prompt_tokens": 10}}
+
+    engine._backend = Recorder()
+    # Tamanhos variados: o arredondamento de cada contagem não pode estourar o orçamento
+    for size in range(1, 40):
+        context = "\n\n".join(f"Trecho {i} {'sobre a floresta ' * size}e as bromélias." for i in range(2000))
+        assert engine.ask_dr_c("Como a floresta gera lucro?", context, "pt") == "ok"
+        assert count_messages(sent[-1], engine.count_tokens) <= settings.prompt_token_budget
+        assert "Trecho 0 " in sent[-1][1]["content"]
+
+
+def test_usage_is_accounted_per_language():
+    ledger = TokenLedger()
+    usage = {"prompt_tokens": 100, "completion_tokens": 20, "prompt_tokens_details": {"cached_tokens": 64}}
+    ledger.record("pt", parse_usage(usage, estimated_prompt_tokens=98))
+    ledger.record("pt", parse_usage(None, estimated_prompt_tokens=50))
+    ledger.record("en", parse_usage({"prompt_tokens": 7, "completion_tokens": 3}))
+    totals = ledger.snapshot()
+    assert (totals["pt"].requests, totals["pt"].prompt_tokens, totals["pt"].cached_tokens) == (2, 100, 64)
+    assert totals["pt"].estimated_prompt_tokens == 148 and totals["en"].total_tokens == 10